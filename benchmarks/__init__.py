@@ -0,0 +1,4 @@
+"""
+Offline, seeded benchmarks for the recommendation, signal-processing and
+optimizer hot paths. Run with `python -m benchmarks.run --help`.
+"""
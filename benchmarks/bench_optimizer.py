@@ -0,0 +1,50 @@
+import numpy as np #type: ignore
+
+from .fixtures import base_catalog
+from .harness import benchmark
+from src.backend import SongFinder
+from src.optimizer import NeuroManager
+from src.spotify import OfflineSpotifyHandler
+
+
+def _manager(observations):
+    dj = NeuroManager(
+        backend=SongFinder.from_dataframe(base_catalog()),
+        handler=OfflineSpotifyHandler(),
+        skip_window=0,
+    )
+    rng = np.random.default_rng(observations)
+    for v, e in rng.random((observations, 2)):
+        dj.bo.register(params={"valence": v, "energy": e}, target=float(rng.random() < 0.5))
+    return dj, rng
+
+
+@benchmark(
+    "NeuroManager.feedback_suggest",
+    params={"observations": [10, 100, 300, 1000]},
+    quick={"observations": [10, 100]},
+    repeats=3,
+)
+def bench_feedback_suggest(observations):
+    # One register + GP refit/suggest cycle with `observations` points already in the model
+    dj, rng = _manager(observations)
+
+    def call():
+        v, e = rng.random(2)
+        dj.current_song_data = {"name": f"probe {v:.6f}", "features": {"valence": v, "energy": e}}
+        dj.register_feedback(1.0)
+        return dj.suggest()
+    return call
+
+
+@benchmark(
+    "NeuroManager.skip",
+    params={"observations": [10, 100, 300]},
+    quick={"observations": [10]},
+    repeats=3,
+)
+def bench_skip(observations):
+    # The full synchronous skip path: feedback, suggest, catalog search, (stubbed) play
+    dj, _ = _manager(observations)
+    dj.start_with_mood("focus")
+    return lambda: dj.register_feedback(0.0, current_mood="focus")
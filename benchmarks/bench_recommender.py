@@ -0,0 +1,41 @@
+import itertools
+
+import numpy as np #type: ignore
+
+from .fixtures import MOOD_FILTERS, catalog
+from .harness import benchmark
+from src.backend import SongFinder
+
+
+@benchmark(
+    "SongFinder.get_next_song",
+    params={"rows": [10**3, 10**4, 10**5, 10**6], "filters": list(MOOD_FILTERS)},
+    quick={"rows": [10**3, 10**4], "filters": list(MOOD_FILTERS)},
+)
+def bench_get_next_song(rows, filters):
+    finder = SongFinder.from_dataframe(catalog(rows))
+    rng = np.random.default_rng(rows)
+    targets = itertools.cycle(
+        [{"valence": v, "energy": e} for v, e in rng.random((64, 2))]
+    )
+    mood_filters = MOOD_FILTERS[filters]
+    return lambda: finder.get_next_song(next(targets), filters=mood_filters)
+
+
+@benchmark(
+    "SongFinder.get_next_song.themes",
+    params={"rows": [10**3, 10**4, 10**5, 10**6], "query": ["themes", "like_track"]},
+    quick={"rows": [10**3, 10**4], "query": ["themes", "like_track"]},
+)
+def bench_theme_query(rows, query):
+    finder = SongFinder.from_dataframe(catalog(rows))
+    rng = np.random.default_rng(rows)
+    targets = itertools.cycle(
+        [{"valence": v, "energy": e} for v, e in rng.random((64, 2))]
+    )
+    if query == "themes":
+        filters = {"themes": ("hope", "blue"), "exclude_cluster": "Glitter Gel Pen"}
+    else:
+        filters = {"like_track": int(finder.catalog.track_ids[0])}
+    finder.get_next_song(next(targets), filters=filters)  # Builds the theme index outside the timing
+    return lambda: finder.get_next_song(next(targets), filters=filters)
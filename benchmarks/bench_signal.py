@@ -0,0 +1,56 @@
+from .fixtures import eeg_recording, pink_eeg
+from .harness import benchmark
+from data.brain import get_multichannel_eeg
+from utils.bci_pipe import extract_features
+from utils.classifier import classify_mood
+from utils.recording import evaluate
+
+
+@benchmark(
+    "extract_features",
+    params={"seconds": [2, 5, 10, 30], "channels": [4, 8, 16, 32]},
+    quick={"seconds": [2, 10], "channels": [4, 16]},
+    repeats=10,
+)
+def bench_extract_features(seconds, channels):
+    eeg = pink_eeg(channels, seconds)
+    return lambda: extract_features(eeg, 256)
+
+
+@benchmark("classify_mood", params={"mood": ["sad", "anger", "happy", "neutral"]}, repeats=50)
+def bench_classify_mood(mood):
+    raw_eeg, fs = get_multichannel_eeg(mood=mood)
+    features = extract_features(raw_eeg, fs)
+    return lambda: classify_mood(features)
+
+
+@benchmark("eeg_to_mood", params={"seconds": [5, 10]}, repeats=10)
+def bench_eeg_to_mood(seconds):
+    # The whole scan the app runs on SCAN & START / mood change
+    def call():
+        raw_eeg, fs = get_multichannel_eeg(mood="happy", duration_sec=seconds)
+        return classify_mood(extract_features(raw_eeg, fs))
+    return call
+
+
+@benchmark("eeg_replay", params={"seconds_per_mood": [60, 600]}, quick={"seconds_per_mood": [60]}, repeats=3)
+def bench_eeg_replay(seconds_per_mood):
+    # The same recorded EEG every run: 4 s windows, 1 s hop, as fast as possible
+    recording = eeg_recording(seconds_per_mood)
+    return lambda: evaluate(recording, speed=None)
+
+
+@benchmark(
+    "extract_features_decimated",
+    params={"fs": [512, 1000], "target_fs": [0, 128], "dtype": ["float64", "float32"]},
+    quick={"fs": [1000], "target_fs": [0, 128], "dtype": ["float32"]},
+    repeats=10,
+)
+def bench_extract_features_decimated(fs, target_fs, dtype):
+    # A batch of 16 four-channel headsets at high rate, full-rate (0) vs decimated
+    eeg = pink_eeg(64, 4, fs=fs).astype(dtype)
+    features = extract_features(eeg, fs, target_fs=target_fs or None)
+    for band in ('theta', 'alpha', 'beta'):
+        # A float32 run that quietly promotes to float64 would time the wrong thing
+        assert features[band].dtype == eeg.dtype, f"{band} came out {features[band].dtype}, not {eeg.dtype}"
+    return lambda: extract_features(eeg, fs, target_fs=target_fs or None)
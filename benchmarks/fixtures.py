@@ -0,0 +1,67 @@
+import functools
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np #type: ignore
+import pandas as pd #type: ignore
+
+# Benchmarks run from anywhere: make the project root importable
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+CATALOG_CSV = PROJECT_ROOT / "data" / "neurodj_data.csv"
+
+# The filter set each mood applies in NeuroManager._get_mood_filters
+MOOD_FILTERS = {
+    "none": None,
+    "focus": {"max_complexity": 0.45},
+    "neutral": {"min_bridge_shift": 0.7},
+    "sad": {"exclude_cluster": "Glitter Gel Pen"},
+}
+
+
+@functools.lru_cache(maxsize=None)
+def base_catalog():
+    df = pd.read_csv(CATALOG_CSV)
+    df.columns = [c.lower() for c in df.columns]
+    return df
+
+
+@functools.lru_cache(maxsize=1)
+def catalog_model():
+    from data.synth_catalog import CatalogModel
+    return CatalogModel.fit(base_catalog())
+
+
+@functools.lru_cache(maxsize=4)
+def catalog(n_rows, seed=0):
+    """
+    A deterministic `n_rows` synthetic catalog with the neurodj_data.csv schema
+    and its per-cluster feature distributions (see data/synth_catalog.py).
+    """
+    chunks = catalog_model().iter_chunks(n_rows, chunk_size=250_000, seed=seed)
+    return pd.concat(list(chunks), ignore_index=True)
+
+
+def pink_eeg(n_channels, seconds, fs=256):
+    """Multichannel pink-noise EEG with an alpha rhythm, any channel count."""
+    from utils import generate_pink_noise, add_wave
+
+    n_points = int(seconds * fs)
+    eeg = np.zeros((n_channels, n_points))
+    for ch in range(n_channels):
+        eeg[ch] = add_wave(generate_pink_noise(n_points), fs, freq=10, amp=10)
+    return eeg
+
+
+@functools.lru_cache(maxsize=4)
+def eeg_recording(seconds_per_mood, seed=0):
+    """A deterministic labelled recording (sad, happy, anger, neutral in turn), memory-mapped."""
+    from utils.recording import Recording, record_simulated
+
+    path = Path(tempfile.gettempdir()) / f"neurodj_bench_{seconds_per_mood}s_{seed}.eegrec"
+    if not path.exists():
+        record_simulated(path, ["sad", "happy", "anger", "neutral"], seconds=seconds_per_mood, seed=seed)
+    return Recording(path)
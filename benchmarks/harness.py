@@ -0,0 +1,146 @@
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np #type: ignore
+
+# name -> (function, {param: [values]}, quick {param: [values]} or None)
+REGISTRY = {}
+
+
+def benchmark(name, params=None, quick=None, repeats=5, warmup=1):
+    """
+    Register a benchmark case.
+
+    The decorated function receives one combination of `params` as keyword
+    arguments and returns a zero-argument callable - the code that is timed.
+    Everything before the return (fixtures, model state) is setup and is not timed.
+
+        @benchmark("extract_features", params={"seconds": [2, 10]})
+        def bench(seconds):
+            eeg = make_eeg(seconds)
+            return lambda: extract_features(eeg, 256)
+    """
+    def decorator(fn):
+        REGISTRY[name] = {
+            "fn": fn,
+            "params": params or {},
+            "quick": quick,
+            "repeats": repeats,
+            "warmup": warmup,
+        }
+        return fn
+    return decorator
+
+
+def _combinations(params):
+    combos = [{}]
+    for key, values in params.items():
+        combos = [dict(c, **{key: v}) for c in combos for v in values]
+    return combos
+
+
+def case_id(name, combo):
+    if not combo:
+        return name
+    return name + "[" + ",".join(f"{k}={v}" for k, v in combo.items()) + "]"
+
+
+def run_case(spec, combo, seed):
+    """Setup + warmup + timed repeats for one parameter combination."""
+    # Fixed seeds: numpy's global RNG drives the EEG simulator and the optimizer fixtures
+    np.random.seed(seed)
+
+    # The pipeline prints debug lines; keep them out of the timings' console output
+    with contextlib.redirect_stdout(io.StringIO()):
+        call = spec["fn"](**combo)
+        for _ in range(spec["warmup"]):
+            call()
+
+        times = []
+        for _ in range(spec["repeats"]):
+            start = time.perf_counter()
+            call()
+            times.append(time.perf_counter() - start)
+
+    return {
+        "params": combo,
+        "repeats": len(times),
+        "median_s": statistics.median(times),
+        "min_s": min(times),
+        "mean_s": statistics.fmean(times),
+        "stdev_s": statistics.stdev(times) if len(times) > 1 else 0.0,
+    }
+
+
+def run_all(selected=None, quick=False, seed=1234, log=print):
+    results = {}
+    for name, spec in REGISTRY.items():
+        if selected and not any(s in name for s in selected):
+            continue
+        params = spec["quick"] if quick and spec["quick"] is not None else spec["params"]
+        for combo in _combinations(params):
+            cid = case_id(name, combo)
+            results[cid] = run_case(spec, combo, seed)
+            log(f"{cid:<60} median={results[cid]['median_s'] * 1e3:10.3f} ms")
+    return results
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def write_results(results, path, quick=False, seed=1234):
+    payload = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.platform(),
+            "quick": quick,
+            "seed": seed,
+        },
+        "results": results,
+    }
+    Path(path).write_text(json.dumps(payload, indent=2, sort_keys=True))
+
+
+def load_results(path):
+    return json.loads(Path(path).read_text())["results"]
+
+
+def compare(baseline, current, threshold=0.10, log=print):
+    """
+    Compare two result sets by median time.
+    Returns the list of case ids that got slower than `threshold` (e.g. 0.10 = +10%).
+    """
+    regressions = []
+    log(f"{'case':<60} {'base ms':>10} {'new ms':>10} {'change':>8}")
+    for cid in sorted(set(baseline) & set(current)):
+        old = baseline[cid]["median_s"]
+        new = current[cid]["median_s"]
+        change = (new - old) / old if old > 0 else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  <-- REGRESSION"
+            regressions.append(cid)
+        elif change < -threshold:
+            flag = "  (faster)"
+        log(f"{cid:<60} {old * 1e3:10.3f} {new * 1e3:10.3f} {change:+8.1%}{flag}")
+
+    for cid in sorted(set(baseline) - set(current)):
+        log(f"{cid:<60} missing from the new run")
+    for cid in sorted(set(current) - set(baseline)):
+        log(f"{cid:<60} new case (no baseline)")
+    return regressions
@@ -0,0 +1,72 @@
+"""
+Cold-import budget check.
+
+Each module is imported in a fresh interpreter; the check fails if the import
+takes longer than its budget or drags in a heavy dependency it must not load
+at import time (plotting, the optimizer stack, the Spotify client).
+
+    python -m benchmarks.import_budget          # exit code 1 on any violation
+"""
+import json
+import subprocess
+import sys
+
+from .fixtures import PROJECT_ROOT
+
+HEAVY = ["matplotlib", "scipy", "pandas", "sklearn", "bayes_opt", "spotipy", "dotenv", "streamlit"]
+
+# module -> (budget in ms, heavy modules it may load)
+BUDGETS = {
+    "utils": (30, []),
+    "utils.profiling": (30, []),
+    "data.brain": (400, []),
+    "utils.bci_pipe": (400, []),
+    "src.optimizer": (400, []),
+    "src.spotify": (100, []),
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1e3, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module, runs=3):
+    """Best-of-`runs` cold import time (ms) and the heavy modules that got loaded."""
+    best = None
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        if best is None or result["ms"] < best["ms"]:
+            best = result
+    return best
+
+
+def check(budgets=BUDGETS, log=print):
+    """Returns a list of violation messages (empty = within budget)."""
+    violations = []
+    for module, (budget_ms, allowed) in budgets.items():
+        result = measure(module)
+        unexpected = [m for m in result["loaded"] if m not in allowed]
+        ok = result["ms"] <= budget_ms and not unexpected
+        log(f"{'ok ' if ok else 'BAD'} {module:<18} {result['ms']:8.1f} ms (budget {budget_ms} ms)"
+            + (f"  loads: {', '.join(unexpected)}" if unexpected else ""))
+        if result["ms"] > budget_ms:
+            violations.append(f"{module}: {result['ms']:.1f} ms > {budget_ms} ms")
+        if unexpected:
+            violations.append(f"{module}: imports {', '.join(unexpected)} at import time")
+    return violations
+
+
+if __name__ == "__main__":
+    problems = check()
+    if problems:
+        print("\nImport budget exceeded:\n  " + "\n  ".join(problems))
+        sys.exit(1)
+    print("\nAll imports within budget")
@@ -0,0 +1,52 @@
+import argparse
+import sys
+
+from .harness import REGISTRY, compare, load_results, run_all, write_results
+
+# Importing the case modules registers their benchmarks
+from . import bench_optimizer, bench_recommender, bench_signal  # noqa: F401
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Run NeuroDJ benchmarks (offline, fixed seeds) and optionally compare to a baseline.",
+    )
+    parser.add_argument("--quick", action="store_true", help="Smaller parameter grid (CI / pre-commit)")
+    parser.add_argument("--only", nargs="*", metavar="NAME", help="Run cases whose name contains NAME")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--out", metavar="FILE", help="Write results as JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="Baseline JSON to compare against")
+    parser.add_argument("--against", metavar="FILE",
+                        help="With --compare: compare this results file instead of running")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative slowdown of the median that counts as a regression (default 0.10)")
+    parser.add_argument("--list", action="store_true", help="List benchmark names and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, spec in REGISTRY.items():
+            print(f"{name:<40} {spec['params']}")
+        return 0
+
+    if args.against:
+        if not args.compare:
+            parser.error("--against requires --compare")
+        current = load_results(args.against)
+    else:
+        current = run_all(selected=args.only, quick=args.quick, seed=args.seed)
+        if args.out:
+            write_results(current, args.out, quick=args.quick, seed=args.seed)
+            print(f"Wrote {len(current)} results to {args.out}")
+
+    if args.compare:
+        regressions = compare(load_results(args.compare), current, threshold=args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}")
+            return 1
+        print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,16 @@
 import sys
 from pathlib import Path
 
-# Add project root to Python path
+# Add project root to Python path (once - not on every import)
 project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
 
 from utils import generate_pink_noise, add_wave
+from utils.profiling import timed
 import numpy as np #type: ignore
 
+@timed("get_multichannel_eeg")
 def get_multichannel_eeg(mood="neutral", duration_sec=10):
     fs = 256
     n_points = duration_sec * fs
@@ -0,0 +1,246 @@
+"""
+Synthetic large-catalog generator.
+
+Learns the joint structure of `data/neurodj_data.csv` and streams out catalogs of any
+size with the same schema, so SongFinder and its mood filters can be load-tested
+at 10^4 - 10^7 rows.
+
+    python -m data.synth_catalog --rows 1000000 --out data/synth_1m.csv
+    python -m data.synth_catalog --rows 10000000 --out data/synth_10m.parquet
+
+What is modelled (per archetype cluster, so cross-column structure is preserved):
+  - energy, valence, reading_grade, syllable_density, lexical_diversity, bridge_shift,
+    umap_x, umap_y  -> multivariate Gaussian (full covariance), clipped to the cluster's range
+  - cluster_id / archetype_name / archetype_desc -> tied to the cluster
+  - top_driver, symbol, album_name -> categorical frequencies within the cluster
+  - (energy_is_predicted, valence_is_predicted, data_type) -> joint categorical
+  - thematic_dna -> missing rate + 5 distinct tokens drawn from the cluster's token frequencies
+Rows with no lyrical analysis (no cluster) are kept as their own small group.
+"""
+import argparse
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np #type: ignore
+import pandas as pd #type: ignore
+
+NUMERIC = ['energy', 'valence', 'reading_grade', 'syllable_density',
+           'lexical_diversity', 'bridge_shift', 'umap_x', 'umap_y']
+AUDIO = ['energy', 'valence']
+COLUMNS = ['track_name', 'album_name', 'energy', 'valence', 'reading_grade', 'syllable_density',
+           'lexical_diversity', 'bridge_shift', 'thematic_dna', 'energy_is_predicted',
+           'valence_is_predicted', 'cluster_id', 'umap_x', 'umap_y', 'top_driver',
+           'archetype_name', 'archetype_desc', 'symbol', 'data_type']
+TOKENS_PER_TRACK = 5
+GLOBAL_TOKEN_SHARE = 0.2  # Blend in catalog-wide token frequencies so small clusters aren't too narrow
+
+
+def _none(value):
+    """NaN -> None so categorical values round-trip as empty cells."""
+    return None if pd.isna(value) else value
+
+
+def _categorical(series):
+    counts = series.map(_none).value_counts(dropna=False)
+    values = np.empty(len(counts), dtype=object)
+    values[:] = list(counts.index)
+    return values, (counts.values / counts.values.sum())
+
+
+def _tokens(series):
+    return [[t.strip() for t in dna.split(',') if t.strip()] for dna in series.dropna()]
+
+
+class CatalogModel:
+    """
+    Per-cluster generative model of the catalog. Fit once, sample many chunks.
+    """
+    def __init__(self, groups, group_weights, vocab):
+        self.groups = groups
+        self.group_weights = group_weights
+        self.vocab = vocab
+
+    @classmethod
+    def fit(cls, df):
+        df = df.copy()
+        df.columns = [c.lower() for c in df.columns]
+
+        all_tokens = _tokens(df['thematic_dna'])
+        global_counts = Counter(t for row in all_tokens for t in row)
+        vocab = np.array(sorted(global_counts), dtype=object)
+        vocab_index = {t: i for i, t in enumerate(vocab)}
+        global_p = np.array([global_counts[t] for t in vocab], dtype=float)
+        global_p /= global_p.sum()
+
+        groups = []
+        weights = []
+        has_cluster = df['archetype_name'].notna()
+        for name, rows in list(df[has_cluster].groupby('archetype_name')) + [(None, df[~has_cluster])]:
+            if rows.empty:
+                continue
+            numeric = NUMERIC if name is not None else AUDIO
+            values = rows[numeric].to_numpy(dtype=float)
+            cov = np.cov(values, rowvar=False) if len(rows) > 1 else np.zeros((len(numeric), len(numeric)))
+            cov = np.atleast_2d(cov) + np.eye(len(numeric)) * 1e-6
+
+            token_p = global_p.copy()
+            rows_tokens = _tokens(rows['thematic_dna'])
+            if rows_tokens:
+                counts = np.zeros(len(vocab))
+                for row in rows_tokens:
+                    for t in row:
+                        counts[vocab_index[t]] += 1
+                token_p = (1 - GLOBAL_TOKEN_SHARE) * counts / counts.sum() + GLOBAL_TOKEN_SHARE * global_p
+
+            flags = rows[['energy_is_predicted', 'valence_is_predicted', 'data_type']]
+            flag_values, flag_p = _categorical(pd.Series(
+                [tuple(_none(v) for v in row) for row in flags.itertuples(index=False)], dtype=object))
+
+            groups.append({
+                'archetype_name': name,
+                'cluster_id': _none(rows['cluster_id'].iloc[0]),
+                'archetype_desc': _none(rows['archetype_desc'].iloc[0]),
+                'numeric': numeric,
+                'mean': values.mean(axis=0),
+                'cov': cov,
+                'low': values.min(axis=0),
+                'high': values.max(axis=0),
+                'dna_missing': rows['thematic_dna'].isna().mean(),
+                'token_p': token_p,
+                'flags': (flag_values, flag_p),
+                'top_driver': _categorical(rows['top_driver']),
+                'symbol': _categorical(rows['symbol']),
+                'album': _categorical(rows['album_name']),
+            })
+            weights.append(len(rows))
+
+        weights = np.array(weights, dtype=float)
+        return cls(groups, weights / weights.sum(), vocab)
+
+    @classmethod
+    def from_csv(cls, csv_path="data/neurodj_data.csv"):
+        return cls.fit(pd.read_csv(csv_path))
+
+    def _sample_dna(self, group, n, rng):
+        idx = rng.choice(len(self.vocab), size=(n, TOKENS_PER_TRACK), p=group['token_p'])
+        # Tokens within a track are distinct: redraw rows that picked a token twice
+        while True:
+            s = np.sort(idx, axis=1)
+            dup = (s[:, 1:] == s[:, :-1]).any(axis=1)
+            if not dup.any():
+                break
+            idx[dup] = rng.choice(len(self.vocab), size=(int(dup.sum()), TOKENS_PER_TRACK), p=group['token_p'])
+
+        tokens = self.vocab[idx]
+        dna = tokens[:, 0]
+        for k in range(1, TOKENS_PER_TRACK):
+            dna = dna + ", " + tokens[:, k]
+        dna[rng.random(n) < group['dna_missing']] = None
+        return dna
+
+    def sample(self, n, rng, start_index=0):
+        """
+        Sample `n` rows as a DataFrame with the catalog's columns.
+        `start_index` numbers the synthetic track names so chunks stay unique.
+        """
+        which = rng.choice(len(self.groups), size=n, p=self.group_weights)
+        out = {c: np.full(n, np.nan, dtype=object) for c in COLUMNS}
+        for c in NUMERIC + ['cluster_id']:
+            out[c] = np.full(n, np.nan)
+
+        for g, group in enumerate(self.groups):
+            rows = np.flatnonzero(which == g)
+            m = len(rows)
+            if m == 0:
+                continue
+
+            values = rng.multivariate_normal(group['mean'], group['cov'], size=m, method='cholesky')
+            values = np.clip(values, group['low'], group['high'])
+            for j, col in enumerate(group['numeric']):
+                out[col][rows] = values[:, j]
+
+            flag_values, flag_p = group['flags']
+            flags = flag_values[rng.choice(len(flag_values), size=m, p=flag_p)]
+            out['energy_is_predicted'][rows] = [f[0] for f in flags]
+            out['valence_is_predicted'][rows] = [f[1] for f in flags]
+            out['data_type'][rows] = [f[2] for f in flags]
+
+            for col, key in (('top_driver', 'top_driver'), ('symbol', 'symbol'), ('album_name', 'album')):
+                values_, p = group[key]
+                out[col][rows] = values_[rng.choice(len(values_), size=m, p=p)]
+
+            if group['archetype_name'] is not None:
+                out['cluster_id'][rows] = group['cluster_id']
+                out['archetype_name'][rows] = group['archetype_name']
+                out['archetype_desc'][rows] = group['archetype_desc']
+                out['thematic_dna'][rows] = self._sample_dna(group, m, rng)
+
+        for col in ('energy', 'valence'):
+            out[col] = np.round(np.clip(out[col], 0.0, 1.0), 6)
+
+        out['track_name'] = ("Synthetic Track " + pd.Series(np.arange(start_index, start_index + n)).astype(str)).to_numpy(dtype=object)
+        return pd.DataFrame(out, columns=COLUMNS)
+
+    def iter_chunks(self, rows, chunk_size=100_000, seed=0):
+        """Yield DataFrames of at most `chunk_size` rows until `rows` have been produced."""
+        rng = np.random.default_rng(seed)
+        for start in range(0, rows, chunk_size):
+            yield self.sample(min(chunk_size, rows - start), rng, start_index=start)
+
+
+def generate_frame(rows, seed=0, csv_path="data/neurodj_data.csv", chunk_size=100_000):
+    """In-memory catalog of `rows` rows (for tests/benchmarks; use write_catalog for big ones)."""
+    model = CatalogModel.from_csv(csv_path)
+    return pd.concat(list(model.iter_chunks(rows, chunk_size=chunk_size, seed=seed)), ignore_index=True)
+
+
+def write_catalog(out_path, rows, seed=0, chunk_size=100_000, csv_path="data/neurodj_data.csv", fmt=None):
+    """
+    Stream a synthetic catalog to disk chunk by chunk (constant memory).
+    Format follows the extension (.csv or .parquet) unless `fmt` is given.
+    Parquet needs the optional `pyarrow` package.
+    """
+    out_path = Path(out_path)
+    fmt = fmt or ('parquet' if out_path.suffix == '.parquet' else 'csv')
+    model = CatalogModel.from_csv(csv_path)
+    chunks = model.iter_chunks(rows, chunk_size=chunk_size, seed=seed)
+
+    if fmt == 'csv':
+        with open(out_path, 'w', newline='') as f:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, header=(i == 0), index=False)
+    elif fmt == 'parquet':
+        try:
+            import pyarrow as pa #type: ignore
+            import pyarrow.parquet as pq #type: ignore
+        except ImportError:
+            raise ImportError("Parquet output needs pyarrow: pip install pyarrow")
+
+        # Explicit schema: a chunk where a column happens to be all-null must not change its type
+        schema = pa.schema([
+            (c, pa.float64() if c in NUMERIC + ['cluster_id']
+             else pa.bool_() if c.endswith('_is_predicted') else pa.string())
+            for c in COLUMNS
+        ])
+        with pq.ParquetWriter(out_path, schema) as writer:
+            for chunk in chunks:
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    else:
+        raise ValueError(f"Unknown format '{fmt}' (use 'csv' or 'parquet')")
+
+    return out_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic NeuroDJ catalog")
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--out", required=True, help="Output path (.csv or .parquet)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--source", default="data/neurodj_data.csv", help="Catalog to learn from")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    path = write_catalog(args.out, args.rows, seed=args.seed, chunk_size=args.chunk_size, csv_path=args.source)
+    print(f"Wrote {args.rows:,} rows to {path} in {time.perf_counter() - start:.1f}s")
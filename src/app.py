@@ -10,15 +10,27 @@ from dotenv import load_dotenv
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+# Loads SPOTIFY_CLIENT_ID/SECRET (and NEURODJ_PROFILE) from .env
+# before the pipeline modules are imported, so profiling can wire itself in
+load_dotenv()
+
 # Import your actual backend logic
+from src.backend import SongFinder
+from src.catalog import Catalog
+from src.client import RemoteNeuroManager
+from src.coldstart import ColdStartTable
+from src.history import SessionHistory
 from src.optimizer import NeuroManager
+from src.preferences import PreferenceLog
+from src.reload import CatalogWatcher
+from src.spotify import SpotifyHandler
 from data.brain import get_multichannel_eeg
 from utils.bci_pipe import extract_features
 from utils.classifier import classify_mood
+from utils import profiling
 
 # --- CONFIGURATION ---
 st.set_page_config(page_title="Neuro-DJ", layout="centered")
-load_dotenv()  # Loads SPOTIFY_CLIENT_ID and SECRET from .env
 
 # --- CUSTOM CSS (SPOTIFY DARK MODE) ---
 st.markdown("""
@@ -62,6 +74,27 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# --- SHARED RESOURCES (built once per server process, reused by every session) ---
+@st.cache_resource(show_spinner=False)
+def watch_catalog(csv_path="data/neurodj_data.csv"):
+    """
+    Catalog + filter masks + per-mood cold-start rankings, kept in sync with the file:
+    edits are applied in place of a restart and sessions pick them up on their next song.
+    """
+    catalog = Catalog.load(csv_path)
+    ColdStartTable.for_catalog(catalog)
+    watcher = CatalogWatcher(catalog, csv_path)
+    try:
+        watcher.start()
+    except Exception as e:
+        print(f"⚠️ Catalog hot reload disabled: {e}")
+    return watcher
+
+@st.cache_resource(show_spinner=False)
+def get_spotify_handler():
+    """One OAuth manager, token keeper and HTTP connection pool for the (single) Spotify account."""
+    return SpotifyHandler()
+
 # --- SESSION STATE INITIALIZATION ---
 if 'dj' not in st.session_state:
     # Initialize the Manager with credentials from .env
@@ -74,17 +107,31 @@ if 'dj' not in st.session_state:
         
     with st.spinner("Booting Neuro-DJ..."):
         try:
-            # NeuroManager now loads credentials from .env automatically
-            st.session_state.dj = NeuroManager()
-            st.success("Connected to Spotify & Brain Backend!")
-            time.sleep(1) # Show success briefly
+            service_url = os.getenv("NEURODJ_SERVICE_URL")
+            if service_url:
+                # Thin client: the session lives in the recommendation service (src/service.py);
+                # this process only renders and reads playback state
+                st.session_state.dj = RemoteNeuroManager(
+                    service_url,
+                    handler=get_spotify_handler(),
+                    user=os.getenv("NEURODJ_USER", "default")
+                )
+            else:
+                # Only the per-user parts are built here: taboo list, optimizer and
+                # preference log. The manager warm-starts from this user's earlier sessions.
+                st.session_state.dj = NeuroManager(
+                    backend=SongFinder(catalog=watch_catalog().catalog.latest()),
+                    handler=get_spotify_handler(),
+                    preference_log=PreferenceLog.for_user(os.getenv("NEURODJ_USER", "default"))
+                )
+            st.toast("Connected to Spotify & Brain Backend!")
             st.rerun()
         except Exception as e:
             st.error(f"Failed to connect: {e}")
             st.stop()
 
 if 'history' not in st.session_state:
-    st.session_state.history = []
+    st.session_state.history = SessionHistory()
 
 if 'mood_change_confirmed' not in st.session_state:
     st.session_state.mood_change_confirmed = False  # Flag to indicate mood change was confirmed
@@ -158,109 +205,50 @@ def get_current_spotify_state():
     """
     Polls the real Spotify app to get accurate Album Art and Progress.
     Returns None if no playback or error occurs.
-    Handles token refresh and re-authentication if needed.
+    Reads go through the handler's shared snapshot cache, so calling this
+    several times in one rerun only hits Spotify once (token refresh on 401
+    is handled there too).
     """
-    sp = st.session_state.dj.handler.sp
     try:
-        current = sp.current_playback()
-        if current and current.get('item'):
-            track = current['item']
-            track_id = track.get('id')  # Unique identifier for the track
-            if not track_id:
-                return None
-            
-            progress_ms = current.get('progress_ms', 0)
-            current_time = time.time()
-            
-            # Check if song changed - set flags for main script to handle
-            if st.session_state.last_track_id != track_id:
-                # If we have a queued song and track changed, set flag to play it
-                if st.session_state.next_song_queued and st.session_state.queued_song_data:
-                    st.session_state.should_play_queued_song = True
-                
-                st.session_state.last_track_id = track_id
-                # Reset song start time when new song starts
-                st.session_state.song_start_time = current_time
-                # Set flag to trigger rerun (handled in main script)
-                st.session_state.track_changed_pending_rerun = True
-            
-            # Track song start time for reference (auto-like now uses progress_ms directly)
-            if st.session_state.song_start_time is None or st.session_state.last_track_id != track_id:
-                st.session_state.song_start_time = current_time
-            
-            # Safely extract track information with fallbacks
-            artists = track.get('artists', [])
-            artist_name = artists[0]['name'] if artists else 'Unknown Artist'
-            
-            album = track.get('album', {})
-            album_name = album.get('name', 'Unknown Album')
-            
-            images = album.get('images', [])
-            cover_url = images[0]['url'] if images else 'https://via.placeholder.com/300'
-            
-            return {
-                "title": track.get('name', 'Unknown Track'),
-                "artist": artist_name,
-                "album": album_name,
-                "cover": cover_url,
-                "progress_ms": progress_ms,
-                "duration_ms": track.get('duration_ms', 0),
-                "is_playing": current.get('is_playing', False),
-                "track_id": track_id
-            }
+        snapshot = st.session_state.dj.handler.playback_snapshot()
     except Exception as e:
         error_msg = str(e)
-        # Handle 401 Unauthorized - token expired
+        # Handle 401 Unauthorized - token expired and the refresh didn't help
         if "401" in error_msg or "Unauthorized" in error_msg:
-            print("⚠️ Spotify token expired. Attempting to refresh...")
-            try:
-                # Try to refresh the token using get_cached_token (recommended method)
-                auth_manager = st.session_state.dj.handler.sp.auth_manager
-                if hasattr(auth_manager, 'get_cached_token'):
-                    # Get cached token (will refresh if needed)
-                    token_info = auth_manager.get_cached_token()
-                    if token_info:
-                        print("✅ Token refreshed successfully")
-                        # Retry the request
-                        current = sp.current_playback()
-                        if current and current.get('item'):
-                            # Continue with normal processing
-                            track = current['item']
-                            track_id = track.get('id')
-                            if not track_id:
-                                return None
-                            
-                            progress_ms = current.get('progress_ms', 0)
-                            artists = track.get('artists', [])
-                            artist_name = artists[0]['name'] if artists else 'Unknown Artist'
-                            album = track.get('album', {})
-                            album_name = album.get('name', 'Unknown Album')
-                            images = album.get('images', [])
-                            cover_url = images[0]['url'] if images else 'https://via.placeholder.com/300'
-                            
-                            return {
-                                "title": track.get('name', 'Unknown Track'),
-                                "artist": artist_name,
-                                "album": album_name,
-                                "cover": cover_url,
-                                "progress_ms": progress_ms,
-                                "duration_ms": track.get('duration_ms', 0),
-                                "is_playing": current.get('is_playing', False),
-                                "track_id": track_id
-                            }
-            except Exception as refresh_error:
-                print(f"❌ Token refresh failed: {refresh_error}")
-                print("💡 Please re-authenticate by restarting the app")
-                # Set a flag to show re-auth message
-                if 'auth_error' not in st.session_state:
-                    st.session_state.auth_error = True
+            print(f"❌ Token refresh failed: {e}")
+            print("💡 Please re-authenticate by restarting the app")
+            # Set a flag to show re-auth message
+            if 'auth_error' not in st.session_state:
+                st.session_state.auth_error = True
         else:
             # Log other errors but don't crash
             print(f"Error fetching Spotify state: {e}")
         return None
-    
+
     # Fallback if nothing is playing
-    return None
+    if snapshot is None:
+        return None
+
+    track_id = snapshot.track_id
+    current_time = time.time()
+
+    # Check if song changed - set flags for main script to handle
+    if st.session_state.last_track_id != track_id:
+        # If we have a queued song and track changed, set flag to play it
+        if st.session_state.next_song_queued and st.session_state.queued_song_data:
+            st.session_state.should_play_queued_song = True
+
+        st.session_state.last_track_id = track_id
+        # Reset song start time when new song starts
+        st.session_state.song_start_time = current_time
+        # Set flag to trigger rerun (handled in main script)
+        st.session_state.track_changed_pending_rerun = True
+
+    # Track song start time for reference (auto-like now uses progress_ms directly)
+    if st.session_state.song_start_time is None:
+        st.session_state.song_start_time = current_time
+
+    return snapshot.as_dict()
 
 # --- ACTION FUNCTIONS ---
 def handle_skip():
@@ -269,8 +257,7 @@ def handle_skip():
         current = get_current_spotify_state()
         if current:
             # Check if this track_id is already in history (duplicate)
-            track_ids_in_history = [h.get('track_id') for h in st.session_state.history if 'track_id' in h]
-            is_duplicate = current.get('track_id') in track_ids_in_history
+            is_duplicate = current.get('track_id') in st.session_state.history
             
             # Only submit feedback if NOT a duplicate
             if not is_duplicate:
@@ -278,18 +265,17 @@ def handle_skip():
                 current_mood = st.session_state.get('current_brain_state')
                 new_song = st.session_state.dj.register_feedback(0.0, current_mood=current_mood)
             else:
-                # Duplicate song - just skip without feedback
+                # Duplicate song (e.g. repeated taps before Spotify switched tracks)
+                # - just skip without feedback; rapid skips coalesce into one play
                 current_mood = st.session_state.get('current_brain_state')
-                new_song = st.session_state.dj.next_song(mood=current_mood)
+                new_song = st.session_state.dj.request_next(mood=current_mood)
             
             # Log to history (prevent duplicates)
             if not is_duplicate:
-                st.session_state.history.insert(0, {
-                    "Track": current['title'],
-                    "Artist": current['artist'],
-                    "Reaction": "Skipped",
-                    "track_id": current.get('track_id')
-                })
+                st.session_state.history.add(
+                    current.get('track_id'), current['title'], current['artist'], "Skipped",
+                    mood=current_mood, skipped=True
+                )
             
             # Clear the queue when skipping
             st.session_state.next_song_queued = False
@@ -329,18 +315,23 @@ def handle_play_pause():
     """Toggle Playback directly on Spotify"""
     handler = st.session_state.dj.handler
     try:
-        # Get current state to check if playing
-        current = handler.sp.current_playback()
-        is_playing = current and current.get('is_playing', False) if current else False
+        # Get current state to check if playing (shared snapshot, no extra request)
+        current = handler.playback_snapshot()
+        is_playing = current.is_playing if current else False
         
+        # The handler's commands time themselves and invalidate the shared snapshot
         if is_playing:
             # Currently playing - pause it
-            handler.sp.pause_playback()
-            st.toast("Paused")
+            success = handler.pause_playback()
+            action = "Paused"
         else:
             # Not playing - start/resume playback
-            handler.sp.start_playback()
-            st.toast("Playing")
+            success = handler.start_playback()
+            action = "Playing"
+        if not success:
+            st.warning("Couldn't reach the player. Please open Spotify and start playing a song first.")
+            return
+        st.toast(action)
         # Set flag to trigger refresh
         st.session_state.playback_toggled = True
     except Exception as e:
@@ -352,11 +343,26 @@ def handle_play_pause():
 
 def handle_quit_session():
     """End the session, reset state, and clear cache (but keep music playing)"""
+    # Feedback is already in the persistent preference log; tidy it up while we're idle
+    # (a remote session's log lives with the service, which tidies it on eviction)
+    if st.session_state.dj.preferences is not None:
+        st.session_state.dj.preferences.maybe_compact()
+    if isinstance(st.session_state.dj, RemoteNeuroManager):
+        # Free the server-side session and start the next one under a fresh id
+        dj = st.session_state.dj
+        try:
+            dj.end()
+        except Exception as e:
+            print(f"⚠️ Couldn't end remote session {dj.session_id}: {e}")
+        st.session_state.dj = RemoteNeuroManager(
+            f"http://{dj.host}:{dj.port}", handler=dj.handler, user=dj.user, timeout=dj.timeout
+        )
+
     # Clear all session state
     st.session_state.session_started = False
     st.session_state.current_brain_state = None
     st.session_state.pending_mood_change = None
-    st.session_state.history = []
+    st.session_state.history.clear()
     st.session_state.last_track_id = None
     st.session_state.auto_liked_tracks = set()
     st.session_state.next_song_queued = False
@@ -416,6 +422,19 @@ with st.sidebar:
     - Energy: Energy level (0-1)
     """)
 
+    # Per-stage latency (only when running with NEURODJ_PROFILE=1)
+    if profiling.enabled():
+        st.divider()
+        with st.expander("⏱️ Pipeline Latency"):
+            latency = profiling.snapshot()
+            if latency:
+                st.dataframe(
+                    pd.DataFrame.from_dict(latency, orient='index').round(2),
+                    width='stretch'
+                )
+            else:
+                st.caption("No timings recorded yet")
+
 # Check for authentication errors
 if st.session_state.get('auth_error', False):
     st.error("⚠️ Spotify authentication expired. Please restart the app to re-authenticate.")
@@ -538,21 +557,18 @@ if st.session_state.session_started:
             # Only update if brain state actually changed (preserves state between reruns)
             if st.session_state.current_brain_state != detected_mood:
                 if st.session_state.current_brain_state is not None:
-                    # Brain state changed - queue the next song for the new mood
-                    st.session_state.pending_mood_change = detected_mood
-                    
-                    # Queue the next song immediately so user can see it
-                    mood_map = {
-                        "sad":   {'valence': 0.2, 'energy': 0.2},
-                        "happy": {'valence': 0.9, 'energy': 0.8},
-                        "anger": {'valence': 0.1, 'energy': 0.9},
-                        "focus": {'valence': 0.5, 'energy': 0.3}
-                    }
-                    target_features = mood_map.get(detected_mood, mood_map['happy'])
-                    filters = st.session_state.dj._get_mood_filters(detected_mood) if detected_mood else None
-                    queued_song = st.session_state.dj.backend.get_next_song(target_features, filters=filters)
-                    st.session_state.queued_song_data = queued_song
-                    st.session_state.next_song_queued = True
+                    # Brain state changed - queue the next song for the new mood so user can see it:
+                    # the first stop of a smooth glide from this song to the new mood.
+                    # The rest of the glide plays through next_song (pick_next), so no
+                    # pending mood change here: start_with_mood would drop the path
+                    queued_song = st.session_state.dj.glide_to_mood(detected_mood)
+                    if queued_song:
+                        st.session_state.queued_song_data = queued_song
+                        st.session_state.next_song_queued = True
+                        st.session_state.pending_mood_change = None
+                    else:
+                        # Nothing to glide through - reseed for the new mood when this song ends
+                        st.session_state.pending_mood_change = detected_mood
                     
                     st.toast(f"Brain State Changed: {detected_mood.upper()} (Queued for after current song)")
                 # Update brain state only when it changes
@@ -593,24 +609,20 @@ if st.session_state.session_started and state and state.get('track_id'):
             st.session_state.dj.register_feedback(1.0, current_mood=current_mood)
         
         # Add to history (prevent duplicates)
-        track_ids_in_history = [h.get('track_id') for h in st.session_state.history if 'track_id' in h]
-        if track_id not in track_ids_in_history:
-            st.session_state.history.insert(0, {
-                "Track": state['title'],
-                "Artist": state['artist'],
-                "Reaction": "Auto-Liked (30s+)",
-                "track_id": track_id
-            })
+        st.session_state.history.add(
+            track_id, state['title'], state['artist'], "Auto-Liked (30s+)",
+            mood=st.session_state.get('current_brain_state')
+        )
         
         st.toast("Auto-liked! (Listened 30+ seconds)")
         
         # Queue next song immediately after auto-like - preview it
-        current_mood = st.session_state.get('current_brain_state')
-        target = st.session_state.dj.bo.suggest()
-        filters = st.session_state.dj._get_mood_filters(current_mood) if current_mood else None
-        queued_song = st.session_state.dj.backend.get_next_song(target, filters=filters)
-        st.session_state.queued_song_data = queued_song
-        st.session_state.next_song_queued = True
+        # (unless one is already queued: picking again would pop and lose a glide stop)
+        if not st.session_state.next_song_queued:
+            current_mood = st.session_state.get('current_brain_state')
+            queued_song = st.session_state.dj.pick_next(current_mood)
+            st.session_state.queued_song_data = queued_song
+            st.session_state.next_song_queued = True
         # Set flag to trigger rerun after delay
         st.session_state.auto_like_pending_rerun = True
 
@@ -740,11 +752,15 @@ st.divider()
 st.subheader("Session History")
 # Use container to prevent duplicate rendering
 with st.container():
-    if st.session_state.history:
-        # Remove track_id from display (it's just for deduplication)
-        display_history = [{k: v for k, v in item.items() if k != 'track_id'} for item in st.session_state.history]
+    history = st.session_state.history
+    if history:
+        # Counted as reactions come in, not recomputed from the table
+        summary = history.summary()
+        skips = ", ".join(f"{mood} {n}" for mood, n in summary['skips_per_mood'].items()) or "none"
+        st.caption(f"Like rate {summary['like_rate']:.0%} over {summary['reactions']} reactions · Skips: {skips}")
+        # Cached between reruns; only new reactions are added to it
         st.dataframe(
-            pd.DataFrame(display_history), 
+            history.frame(), 
             width='stretch', 
             hide_index=True,
             key="session_history_df"  # Add key to prevent duplicate rendering
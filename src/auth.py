@@ -0,0 +1,158 @@
+# src/auth.py
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from spotipy.cache_handler import CacheFileHandler #type: ignore
+
+try:
+    import fcntl #type: ignore
+except ImportError:  # Windows: no advisory locks, fall back to in-process locking only
+    fcntl = None
+
+
+@contextmanager
+def _file_lock(path):
+    """
+    Cross-process advisory lock on `<path>.lock`.
+    Lets several worker processes share one token cache without racing refreshes.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    with open(f"{path}.lock", "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+class AtomicCacheFileHandler(CacheFileHandler):
+    """
+    Drop-in replacement for spotipy's CacheFileHandler.
+
+    - Writes go to a temp file that is renamed over the cache, so readers
+      in other processes never see a half-written token.
+    - Reads are memoized on the file's inode/mtime/size, so the per-request
+      `get_cached_token()` spotipy does is a stat() instead of a JSON parse.
+    """
+    def __init__(self, cache_path=".spotify_token_cache"):
+        super().__init__(cache_path=cache_path)
+        self._memo_key = None
+        self._memo_token = None
+
+    def get_cached_token(self):
+        try:
+            stat = os.stat(self.cache_path)
+        except OSError:
+            return None
+
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if key != self._memo_key:
+            self._memo_token = super().get_cached_token()
+            self._memo_key = key
+        # Hand out a copy - spotipy mutates token dicts in place
+        return dict(self._memo_token) if self._memo_token else None
+
+    def save_token_to_cache(self, token_info):
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".token-", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(json.dumps(token_info, cls=self.encoder_cls))
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"⚠️ Couldn't write token cache: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+class TokenKeeper:
+    """
+    The 'Night Watchman'.
+    Refreshes the OAuth token in the background shortly before `expires_at`,
+    so user-visible requests never pay for an expired token.
+
+    - In-process: concurrent callers of `refresh()` share a single refresh.
+    - Cross-process: refreshes happen under a file lock and re-check the
+      cache first, so only one worker actually hits the token endpoint.
+    """
+    def __init__(self, auth_manager, margin=120, retry_interval=30):
+        """
+        Args:
+            auth_manager: The SpotifyOAuth instance (its cache_handler is shared)
+            margin: Refresh this many seconds before the token expires
+            retry_interval: Seconds to wait when there is no token yet or a refresh failed
+        """
+        self.auth_manager = auth_manager
+        self.cache = auth_manager.cache_handler
+        self.margin = margin
+        self.retry_interval = retry_interval
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _is_fresh(self, token_info):
+        return bool(token_info) and token_info.get('expires_at', 0) - time.time() > self.margin
+
+    def refresh(self, force=False):
+        """
+        Refresh the token if it is close to expiry (or unconditionally with force=True,
+        e.g. after a 401). Returns the current token_info, or None if there is no token.
+        """
+        stale = self.cache.get_cached_token()
+        stale_access = (stale or {}).get('access_token')
+
+        with self._lock:
+            token_info = self.cache.get_cached_token()
+            if not token_info:
+                return None
+            # Someone refreshed while we were waiting for the lock
+            if token_info.get('access_token') != stale_access:
+                return token_info
+            if self._is_fresh(token_info) and not force:
+                return token_info
+
+            with _file_lock(self.cache.cache_path):
+                # Another process may have refreshed while we waited for the file lock
+                token_info = self.cache.get_cached_token()
+                if not token_info or token_info.get('access_token') != stale_access:
+                    return token_info
+                return self.auth_manager.refresh_access_token(token_info['refresh_token'])
+
+    def _seconds_until_refresh(self):
+        token_info = self.cache.get_cached_token()
+        if not token_info:
+            return self.retry_interval
+        # Small jitter so a fleet of workers doesn't wake up in lockstep
+        return max(0.0, token_info.get('expires_at', 0) - time.time() - self.margin) + random.uniform(0, 5)
+
+    def _run(self):
+        while not self._stop.wait(self._seconds_until_refresh()):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠️ Background token refresh failed: {e}")
+                self._stop.wait(self.retry_interval)
+
+    def start(self):
+        """Start the background refresh thread (idempotent)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="spotify-token-keeper", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background refresh thread"""
+        self._stop.set()
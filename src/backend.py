@@ -1,24 +1,46 @@
-import pandas as pd #type: ignore
 import numpy as np #type: ignore
+from utils.profiling import timed
+from .catalog import Catalog
+from .taboo import TabooStore
 
 class SongFinder:
-    def __init__(self, csv_path="data/neurodj_data.csv"):
+    def __init__(self, csv_path="data/neurodj_data.csv", catalog: Catalog = None, taboo_window: int = None):
         """
         Initialize the SongFinder with the enhanced dataset (Audio + Lyrics).
+        Accepts the CSV or a Parquet export of it (e.g. from data/synth_catalog.py),
+        or an already loaded Catalog shared with other sessions.
+
+        taboo_window: How many recently played songs can't repeat (see TabooStore)
+        """
+        self.catalog = catalog if catalog is not None else Catalog.load(csv_path)
+        self.taboo = TabooStore(self.catalog.size, window=taboo_window)
+        # Per-ranking read positions for pop_ranked(); everything before one is taboo
+        self._cursors = {}
+
+    @classmethod
+    def from_dataframe(cls, df, **kwargs):
+        """
+        Build a SongFinder around an in-memory catalog (same schema as the CSV).
+        """
+        return cls(catalog=Catalog(df), **kwargs)
+
+    @property
+    def df(self):
+        return self.catalog.df
+
+    def current_catalog(self) -> Catalog:
+        """
+        The newest catalog snapshot. After a hot reload the session moves over to it:
+        row ids are stable, so the taboo list carries over (grown for new songs).
         """
-        try:
-            self.df = pd.read_csv(csv_path)
-            # Normalize columns to lowercase to match our logic
-            self.df.columns = [c.lower() for c in self.df.columns]
-        except FileNotFoundError:
-            print(f"Warning: Dataset '{csv_path}' not found.")
-            self.df = pd.DataFrame()
-        except Exception as e:
-            print(f"Error loading database: {e}")
-            self.df = pd.DataFrame()
-            
-        self.taboo_list = set()
+        catalog = self.catalog.latest()
+        if catalog is not self.catalog:
+            self.taboo.grow(catalog.size)
+            self._cursors.clear()
+            self.catalog = catalog
+        return catalog
 
+    @timed("SongFinder.get_next_song")
     def get_next_song(self, target_features, filters=None):
         """
         Find the best song matching the target audio features and optional lyrical filters.
@@ -27,70 +49,77 @@ class SongFinder:
             target_features: Dict of audio targets (e.g., {'valence': 0.5, 'energy': 0.8})
             filters: Optional Dict of constraints (e.g., {'max_complexity': 0.4})
         """
-        # 1. Filter out played songs (Taboo List)
-        candidates = self.df[~self.df['track_name'].isin(self.taboo_list)].copy()
+        # One snapshot for the whole query, even if a reload lands meanwhile
+        catalog = self.current_catalog()
+
+        # 1. Filter out played (and removed) songs (Taboo List)
+        available = ~self.taboo.mask & catalog.alive
         
-        # If we've played everything, reset the list
-        if candidates.empty:
+        # If we've played everything (window as big as the library), reset the list
+        if not available.any():
             print("Resetting Library (All songs played)")
-            self.taboo_list.clear()
-            candidates = self.df.copy()
+            self.taboo.clear()
+            available = catalog.alive.copy()
 
-        # 2. APPLY MIRRORBALL FILTERS (The New Logic)
-        if filters:
-            # A. Complexity Filter (For Focus Mode)
-            # "Don't play songs with complex lyrics that distract the user"
-            if 'max_complexity' in filters and 'lexical_diversity' in candidates.columns:
-                val = filters['max_complexity']
-                # Keep songs simpler than X OR where data is missing
-                candidates = candidates[
-                    (candidates['lexical_diversity'] <= val) | 
-                    (candidates['lexical_diversity'].isna())
-                ]
+        # 2-4. Euclidean Distance (Audio Features) + MIRRORBALL FILTERS as penalties
+        # One pass: a song that breaks a filter still ranks, just behind every song
+        # that passes, so over-strict filters relax gradually instead of all at once
+        # (penalties are cached per filter set in the Catalog)
+        score = np.where(available, catalog.score(target_features, filters), np.inf)
+        
+        # 5. Pick the Winner
+        row = int(np.argmin(score)) if len(score) else -1
+        if row < 0 or not np.isfinite(score[row]):
+            # Emergency fallback if something really weird happens
+            return None
+        return self._take(row, filters, catalog)
 
-            # B. Bridge Shift Filter (For Boredom Rescue)
-            # "Find a song with a massive drop/shift in the bridge"
-            if 'min_bridge_shift' in filters and 'bridge_shift' in candidates.columns:
-                val = filters['min_bridge_shift']
-                candidates = candidates[
-                    (candidates['bridge_shift'] >= val) |
-                    (candidates['bridge_shift'].isna())
-                ]
+    def pop_ranked(self, key, ranked, target_features, filters=None):
+        """
+        Same pick as get_next_song(), served from a precomputed ranking of
+        (target, filters), e.g. a ColdStartTable entry. A cursor per `key` skips
+        songs already played, so repeated pops are O(1) amortized.
+        """
+        alive = self.catalog.alive
+        taboo = self.taboo.mask
+        pos, epoch = self._cursors.get(key, (0, self.taboo.epoch))
+        if epoch != self.taboo.epoch:
+            # Songs were released from the taboo list: they may sit before the cursor
+            pos = 0
+        while pos < len(ranked) and (taboo[ranked[pos]] or not alive[ranked[pos]]):
+            pos += 1
 
-            # C. Cluster Exclusions (Mood Guardrails)
-            # "Don't play 'Glitter Gel Pen' songs when I am sad"
-            if 'exclude_cluster' in filters and 'archetype_name' in candidates.columns:
-                cluster = filters['exclude_cluster']
-                candidates = candidates[candidates['archetype_name'] != cluster]
+        if pos == len(ranked):
+            # Everything in this ranking was played: take the slow path
+            self._cursors.pop(key, None)
+            return self.get_next_song(target_features, filters=filters)
 
-        # 3. Fallback Mechanism
-        # If filters were too strict and killed all candidates, ignore filters
-        if candidates.empty:
-            print("Filters too strict! Relaxing them to find a song...")
-            candidates = self.df[~self.df['track_name'].isin(self.taboo_list)].copy()
+        epoch = self.taboo.epoch  # Taking a song may release one; then rescan next time
+        song = self._take(int(ranked[pos]), filters)
+        self._cursors[key] = (pos + 1, epoch)
+        return song
 
-        # 4. Calculate Euclidean Distance (Audio Features)
-        candidates['distance'] = 0.0
-        for feature, value in target_features.items():
-            if feature in candidates.columns:
-                # Calculate squared difference
-                candidates['distance'] += (candidates[feature] - value) ** 2
-        
-        # Final Score
-        candidates['distance'] = np.sqrt(candidates['distance'])
-        
-        # 5. Pick the Winner
-        try:
-            best_row = candidates.loc[candidates['distance'].idxmin()]
-        except ValueError:
-            # Emergency fallback if something really weird happens
+    def take_row(self, row, filters=None):
+        """Pick a specific row (e.g. a planned trajectory stop); None if it is taboo or removed."""
+        catalog = self.current_catalog()
+        if self.taboo.mask[row] or not catalog.alive[row]:
             return None
-        
-        # 6. Update Taboo List
-        self.taboo_list.add(best_row['track_name'])
+        return self._take(int(row), filters, catalog)
+
+    def _take(self, row, filters=None, catalog=None):
+        catalog = catalog or self.catalog
+        best_row = catalog.df.iloc[row]
+
+        relaxed = catalog.relaxed_filters(row, filters)
+        if relaxed:
+            print(f"Filters too strict! Relaxed {relaxed} to find a song...")
+
+        # 6. Update Taboo List (the same song on other albums counts as played too)
+        self.taboo.add(row, aliases=catalog.aliases(row))
         
         # 7. Return clean data object
         return {
+            "track_id": int(catalog.track_ids[row]),  # Row id in the catalog (stable across reloads)
             "name": str(best_row.get('track_name', 'Unknown Track')),
             "artist": "Taylor Swift",
             "album": str(best_row.get('album_name', 'Unknown Album')),
@@ -102,6 +131,8 @@ class SongFinder:
             "metadata": {
                 "cluster": best_row.get('archetype_name', 'Unknown'),
                 "complexity": float(best_row.get('lexical_diversity', 0)),
-                "bridge_shift": float(best_row.get('bridge_shift', 0))
+                "bridge_shift": float(best_row.get('bridge_shift', 0)),
+                # Filters this song breaks because no song satisfied all of them
+                "relaxed_filters": relaxed
             }
         }
\ No newline at end of file
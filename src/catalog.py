@@ -0,0 +1,367 @@
+# src/catalog.py
+import threading
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np #type: ignore
+
+# Cached rankings are meant for a handful of fixed targets (mood centroids),
+# not for every optimizer suggestion
+MAX_RANKINGS = 64
+
+# Cost of breaking a Mirrorball filter, added to the audio distance.
+# Numeric filters cost weight * (1 + how far past the threshold the song is).
+# Every weight is above the largest valence/energy distance (sqrt(2)), so a song
+# that passes all filters always beats one that doesn't; filters only give way,
+# cheapest violation first, when nothing passes. Cluster guardrails go last.
+FILTER_PENALTIES = {
+    'max_complexity': 2.0,
+    'min_bridge_shift': 2.0,
+    'themes': 2.0,
+    'exclude_cluster': 4.0,
+}
+
+# "More like this" ({'like_track': track_id}) is a preference, not a filter:
+# score += SIMILARITY_WEIGHT * (1 - theme similarity to that track)
+SIMILARITY_WEIGHT = 0.5
+
+# What makes two rows of different catalog files the same track
+KEY_COLUMNS = ('track_name', 'album_name')
+
+
+class CatalogChanges(NamedTuple):
+    """Row-level difference between two catalog snapshots (row positions in the new one)."""
+    updated: np.ndarray  # Rows whose data changed in place
+    removed: np.ndarray  # Rows now tombstoned
+    added: np.ndarray    # Rows appended at the end
+
+    @property
+    def changed(self) -> np.ndarray:
+        """Rows whose derived values must be recomputed."""
+        return np.concatenate([self.updated, self.added])
+
+    def __bool__(self):
+        return bool(len(self.updated) or len(self.removed) or len(self.added))
+
+    def summary(self) -> str:
+        return f"+{len(self.added)} ~{len(self.updated)} -{len(self.removed)}"
+
+
+class Catalog:
+    """
+    The 'Record Crate'.
+    The read-only song catalog plus everything derived from it, built once per
+    process and shared by every session (each session only keeps its own taboo list).
+
+    - Numeric columns are exposed as float64 numpy arrays (`column()`).
+    - Filter sets are turned into per-row penalty arrays once and memoized (`filter_penalty()`).
+    - Rankings of the whole catalog by distance to a fixed target are memoized (`ranking()`).
+
+    Rows are addressed by position (0..size-1); `df.index` holds the track ids.
+    Structures built on top of a catalog (e.g. the cold-start table) are kept in
+    `derived()` and check `version` to know when to rebuild.
+
+    A snapshot never changes once built. A hot reload (`apply()`) produces the next
+    snapshot copy-on-write and links it as `superseded_by`, so queries already
+    running finish on the old one and sessions move on via `latest()`. Row positions
+    are stable across snapshots: removed songs stay as tombstones (`alive` is False)
+    and new songs are appended, so taboo lists and track ids stay valid.
+    """
+    def __init__(self, df, alive: Optional[np.ndarray] = None, version: int = 0):
+        self.df = df.copy(deep=False)
+        self.df.columns = [c.lower() for c in self.df.columns]
+        self.size = len(self.df)
+        self.alive = np.ones(self.size, dtype=bool) if alive is None else alive
+        self.alive.setflags(write=False)
+        self.version = version
+        self.superseded_by: Optional["Catalog"] = None
+
+        self.track_names = (
+            self.df['track_name'].to_numpy(dtype=object) if 'track_name' in self.df.columns
+            else np.empty(self.size, dtype=object)
+        )
+        self.track_ids = self.df.index.to_numpy()
+
+        self._columns: Dict[str, np.ndarray] = {}
+        self._penalties: Dict[Tuple, np.ndarray] = {}
+        self._rankings: Dict[Tuple, np.ndarray] = {}
+        self._derived: Dict[str, Any] = {}
+        self._alias_index = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def read_frame(csv_path):
+        """
+        The catalog file (CSV or Parquet) as a DataFrame; raises if unreadable.
+        Songs that arrived without energy/valence get them predicted (src/ingest.py).
+        """
+        import pandas as pd #type: ignore  # Deferred: keeps `import src.optimizer` light
+        from .ingest import impute_missing
+
+        if str(csv_path).endswith('.parquet'):
+            return impute_missing(pd.read_parquet(csv_path))
+        return impute_missing(pd.read_csv(csv_path))
+
+    @classmethod
+    def load(cls, csv_path="data/neurodj_data.csv") -> "Catalog":
+        """
+        Read the enhanced dataset (Audio + Lyrics) from the CSV or a Parquet export
+        of it (e.g. from data/synth_catalog.py). An unreadable file gives an empty catalog.
+        """
+        import pandas as pd #type: ignore
+
+        try:
+            df = cls.read_frame(csv_path)
+        except FileNotFoundError:
+            print(f"Warning: Dataset '{csv_path}' not found.")
+            df = pd.DataFrame()
+        except Exception as e:
+            print(f"Error loading database: {e}")
+            df = pd.DataFrame()
+        return cls(df)
+
+    def latest(self) -> "Catalog":
+        """The newest snapshot (this one unless a reload has replaced it)."""
+        catalog = self
+        while catalog.superseded_by is not None:
+            catalog = catalog.superseded_by
+        return catalog
+
+    def derived(self, name: str, build: Callable[[], Any]) -> Any:
+        """A structure built once from this catalog and shared (e.g. ColdStartTable)."""
+        value = self._derived.get(name)
+        if value is None:
+            value = build()
+            with self._lock:
+                value = self._derived.setdefault(name, value)
+        return value
+
+    def column(self, name: str) -> Optional[np.ndarray]:
+        """A numeric column as a read-only float64 array (None if the catalog lacks it)."""
+        values = self._columns.get(name)
+        if values is None:
+            if name not in self.df.columns:
+                return None
+            values = self.df[name].to_numpy(dtype=np.float64, na_value=np.nan)
+            values.setflags(write=False)
+            self._columns[name] = values
+        return values
+
+    def aliases(self, row: int) -> np.ndarray:
+        """All rows with the same track name as `row` (the same song on another album), itself included."""
+        if self._alias_index is None:
+            names, codes = np.unique(self.track_names.astype(str), return_inverse=True)
+            self._alias_index = self._group_rows({str(n): i for i, n in enumerate(names)}, codes.ravel())
+        _, codes, order, starts = self._alias_index
+        group = codes[row]
+        return order[starts[group]:starts[group + 1]]
+
+    @staticmethod
+    def _group_rows(name_codes, codes):
+        # Rows of group g are order[starts[g]:starts[g + 1]]
+        order = np.argsort(codes, kind='stable')
+        starts = np.searchsorted(codes[order], np.arange(len(name_codes) + 1))
+        return name_codes, codes, order, starts
+
+    def row_of(self, track_id) -> int:
+        """Row position of a track id."""
+        return int(self.df.index.get_loc(track_id))
+
+    @staticmethod
+    def filter_key(filters: Optional[Dict[str, Any]]) -> Tuple:
+        """Hashable identity of a filter dict."""
+        return tuple(sorted(
+            (name, tuple(sorted(value)) if isinstance(value, (list, set, tuple)) else value)
+            for name, value in (filters or {}).items()
+        ))
+
+    def _violations(self, filters: Dict[str, Any], rows: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        How far each row (or each of `rows`) is past each filter (0 = passes).
+        Missing lyrical data never counts as a violation.
+        """
+        violations = {}
+        pick = slice(None) if rows is None else rows
+
+        # A. Complexity Filter (For Focus Mode)
+        complexity = self.column('lexical_diversity')
+        if 'max_complexity' in filters and complexity is not None:
+            violations['max_complexity'] = np.fmax(complexity[pick] - filters['max_complexity'], 0.0)
+
+        # B. Bridge Shift Filter (For Boredom Rescue)
+        shift = self.column('bridge_shift')
+        if 'min_bridge_shift' in filters and shift is not None:
+            violations['min_bridge_shift'] = np.fmax(filters['min_bridge_shift'] - shift[pick], 0.0)
+
+        # C. Cluster Exclusions (Mood Guardrails)
+        if 'exclude_cluster' in filters and 'archetype_name' in self.df.columns:
+            clusters = self.df['archetype_name'].to_numpy(dtype=object)[pick]
+            violations['exclude_cluster'] = (clusters == filters['exclude_cluster']).astype(np.float64)
+
+        # D. Theme Filter ("songs about hope or faded jeans")
+        if filters.get('themes'):
+            from .themes import ThemeIndex
+            shares = ThemeIndex.for_catalog(self).rows_with(filters['themes'])[pick]
+            violations['themes'] = (~shares).astype(np.float64)
+
+        return violations
+
+    def filter_penalty(self, filters: Optional[Dict[str, Any]]) -> np.ndarray:
+        """
+        Per-row cost of breaking the Mirrorball filters (0 where a song passes them all),
+        weighted by FILTER_PENALTIES. Memoized per filter set.
+        """
+        filters = {name: value for name, value in (filters or {}).items() if name in FILTER_PENALTIES}
+        key = self.filter_key(filters)
+        penalty = self._penalties.get(key)
+        if penalty is not None:
+            return penalty
+
+        penalty = self._penalty_of(filters)
+        penalty.setflags(write=False)
+        with self._lock:
+            return self._penalties.setdefault(key, penalty)
+
+    def _penalty_of(self, filters: Dict[str, Any], rows: Optional[np.ndarray] = None) -> np.ndarray:
+        penalty = np.zeros(self.size if rows is None else len(rows))
+        for name, excess in self._violations(filters, rows).items():
+            weight = FILTER_PENALTIES[name]
+            penalty += np.where(excess > 0, weight * (1.0 + excess), 0.0)
+        return penalty
+
+    def relaxed_filters(self, row: int, filters: Optional[Dict[str, Any]]) -> list:
+        """Names of the filters a row breaks."""
+        if not filters or self.filter_penalty(filters)[row] == 0:
+            return []
+        return [name for name, excess in self._violations(filters).items() if excess[row] > 0]
+
+    def distances(self, target_features: Dict[str, float]) -> np.ndarray:
+        """
+        Euclidean distance of every row to the target (audio features only).
+        Rows with missing features get +inf so they are never picked.
+        """
+        squared = np.zeros(self.size)
+        for feature, value in target_features.items():
+            values = self.column(feature)
+            if values is not None:
+                squared += (values - value) ** 2
+        distance = np.sqrt(squared)
+        distance[np.isnan(distance) | ~self.alive] = np.inf
+        return distance
+
+    def score(self, target_features: Dict[str, float], filters: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """Audio distance plus filter penalty (and theme similarity) for every row, in one vectorized pass."""
+        score = self.distances(target_features)
+        if filters:
+            score += self.filter_penalty(filters)
+            if filters.get('like_track') is not None:
+                from .themes import ThemeIndex
+                similarity = ThemeIndex.for_catalog(self).similarity(self.row_of(filters['like_track']))
+                score += SIMILARITY_WEIGHT * (1.0 - similarity)
+        return score
+
+    def ranking(self, target_features: Dict[str, float], filters: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """
+        All row positions by score (audio distance + filter penalty), best first; ties
+        keep catalog order. Songs passing `filters` come first, then the least bad
+        relaxations. Memoized: meant for fixed targets such as the mood centroids.
+        """
+        key = (self.filter_key(target_features), self.filter_key(filters))
+        ranked = self._rankings.get(key)
+        if ranked is not None:
+            return ranked
+
+        score = self.score(target_features, filters)
+        rows = np.flatnonzero(np.isfinite(score))
+        ranked = rows[np.argsort(score[rows], kind='stable')]
+        ranked.setflags(write=False)
+        with self._lock:
+            if len(self._rankings) >= MAX_RANKINGS:
+                self._rankings.pop(next(iter(self._rankings)))
+            return self._rankings.setdefault(key, ranked)
+
+    def apply(self, updates, removed: np.ndarray, additions) -> Tuple["Catalog", CatalogChanges]:
+        """
+        Build the next snapshot with row-level changes applied, patching every cached
+        index and derived structure instead of rebuilding it, and link it as this
+        snapshot's successor. This snapshot itself is left untouched.
+
+        Args:
+            updates: DataFrame of new values for existing rows, indexed by row position
+            removed: Row positions to tombstone
+            additions: DataFrame of new songs (appended)
+        """
+        import pandas as pd #type: ignore
+
+        df = self.df.copy(deep=False)
+        if len(updates):
+            # Replace whole columns so the old snapshot's arrays are never written to
+            for name in (c for c in updates.columns if c in df.columns):
+                values = df[name].copy()
+                values.iloc[updates.index] = updates[name].to_numpy()
+                df[name] = values
+        if len(additions):
+            additions = additions.reindex(columns=df.columns)
+            additions.index = pd.RangeIndex(self.size, self.size + len(additions))
+            df = pd.concat([df, additions]) if len(df) else additions
+
+        alive = np.concatenate([self.alive, np.ones(len(additions), dtype=bool)])
+        alive[removed] = False
+        changes = CatalogChanges(
+            updated=np.asarray(updates.index, dtype=np.int64),
+            removed=np.asarray(removed, dtype=np.int64),
+            added=np.arange(self.size, self.size + len(additions), dtype=np.int64),
+        )
+        catalog = Catalog(df, alive=alive, version=self.version + 1)
+
+        with self._lock:
+            columns = list(self._columns.items())
+            penalties = list(self._penalties.items())
+            rankings = list(self._rankings.items())
+            derived = list(self._derived.items())
+
+        changed = changes.changed
+        for name, values in columns:
+            patched = np.empty(catalog.size)
+            patched[:self.size] = values
+            patched[changed] = catalog.df[name].iloc[changed].to_numpy(dtype=np.float64, na_value=np.nan)
+            patched.setflags(write=False)
+            catalog._columns[name] = patched
+
+        if self._alias_index is not None:
+            name_codes, codes, _, _ = self._alias_index
+            name_codes = dict(name_codes)
+            codes = np.concatenate([codes, np.zeros(len(changes.added), dtype=codes.dtype)])
+            for row in changed:
+                codes[row] = name_codes.setdefault(str(catalog.track_names[row]), len(name_codes))
+            catalog._alias_index = self._group_rows(name_codes, codes)
+
+        # Derived structures that know how to patch themselves (theme index, kNN graph);
+        # the rest (e.g. the cold-start table) rebuild from the patched caches on first use
+        for name, value in derived:
+            if hasattr(value, 'patched'):
+                catalog._derived[name] = value.patched(catalog, changes)
+
+        for key, penalty in penalties:
+            patched = np.empty(catalog.size)
+            patched[:self.size] = penalty
+            patched[changed] = catalog._penalty_of(dict(key), changed)
+            patched.setflags(write=False)
+            catalog._penalties[key] = patched
+
+        # Rankings: drop touched rows, then merge the changed ones back in by score
+        touched = np.zeros(catalog.size, dtype=bool)
+        touched[changed] = True
+        touched[changes.removed] = True
+        for key, ranked in rankings:
+            target, filters = dict(key[0]), dict(key[1])
+            score = catalog.score(target, filters)
+            kept = ranked[~touched[ranked]]
+            fresh = changed[np.isfinite(score[changed])]
+            fresh = fresh[np.argsort(score[fresh], kind='stable')]
+            at = np.searchsorted(score[kept], score[fresh], side='right')
+            patched = np.insert(kept, at, fresh)
+            patched.setflags(write=False)
+            catalog._rankings[key] = patched
+
+        self.superseded_by = catalog
+        return catalog, changes
@@ -0,0 +1,103 @@
+# src/client.py
+import json
+import threading
+import uuid
+from http.client import HTTPConnection, RemoteDisconnected
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+
+class ServiceError(RuntimeError):
+    """The recommendation service answered with an error."""
+
+
+class RemoteNeuroManager:
+    """
+    The 'Walkie-Talkie'.
+    Drop-in for NeuroManager that forwards to the recommendation service
+    (src/service.py), so the UI only renders and the session lives server-side.
+    Covers the calls the app makes; `handler` stays local for reading playback state.
+    """
+    def __init__(self, base_url: str, handler=None, user: str = "default",
+                 session_id: Optional[str] = None, timeout: float = 30.0):
+        """
+        Args:
+            base_url: e.g. http://127.0.0.1:8765
+            handler: Local Spotify handler (playback state, pause/resume)
+            user: Preference log the server-side session learns into
+            session_id: Reattach to an existing session (default: a new id)
+        """
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.timeout = timeout
+        self.handler = handler
+        self.user = user
+        self.session_id = session_id or uuid.uuid4().hex
+        self.preferences = None  # Lives on the server
+
+        self._local = threading.local()  # http.client connections aren't thread-safe
+
+    def _request(self, method: str, action: Optional[str] = None, body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        path = f"/sessions/{self.session_id}" + (f"/{action}" if action else "")
+        # Every POST names the user: whichever request comes first creates the session
+        data = json.dumps(dict(body or {}, user=self.user) if method == "POST" else {}).encode()
+        while True:
+            connection = getattr(self._local, "connection", None)
+            reused = connection is not None
+            if not reused:
+                connection = self._local.connection = HTTPConnection(self.host, self.port, timeout=self.timeout)
+            sent = False
+            try:
+                connection.request(method, path, body=data, headers={"Content-Type": "application/json"})
+                sent = True
+                response = connection.getresponse()
+                payload = json.loads(response.read() or b"{}")
+                break
+            except Exception as e:
+                connection.close()
+                self._local.connection = None
+                # Retry (once, on a fresh connection) only when a kept-alive connection the
+                # server had already dropped failed the send or closed without a reply.
+                # Anything else - a timeout above all - may have been applied server-side,
+                # and a POST must not run twice.
+                never_arrived = isinstance(e, RemoteDisconnected) or (not sent and isinstance(e, ConnectionError))
+                if not (reused and never_arrived):
+                    raise
+        if response.status >= 400:
+            raise ServiceError(f"{method} {path}: {payload.get('error', response.status)}")
+        return payload
+
+    # --- NeuroManager API ---
+    def start_with_mood(self, mood: str) -> str:
+        return self._request("POST", "start", {"mood": mood})["song"]
+
+    def register_feedback(self, score: float, current_mood: str = None) -> Optional[str]:
+        return self._request("POST", "feedback", {"score": score, "mood": current_mood})["song"]
+
+    def request_next(self, mood: str = None):
+        return self._request("POST", "next", {"mood": mood, "debounce": True})["song"]
+
+    def next_song(self, mood: str = None, themes: List[str] = None, like_current: bool = False) -> str:
+        return self._request("POST", "next", {"mood": mood, "themes": themes, "like_current": like_current})["song"]
+
+    def pick_next(self, mood: str = None, themes: List[str] = None, like_current: bool = False) -> Optional[Dict[str, Any]]:
+        body = {"mood": mood, "themes": themes, "like_current": like_current, "play": False}
+        return self._request("POST", "next", body)["next_song"]
+
+    def glide_to_mood(self, mood: str, length: int = 5) -> Optional[Dict[str, Any]]:
+        return self._request("POST", "mood", {"mood": mood, "glide": True, "length": length})["next_song"]
+
+    @property
+    def current_song_data(self) -> Optional[Dict[str, Any]]:
+        return self.state()["current_song"]
+
+    @current_song_data.setter
+    def current_song_data(self, song: Dict[str, Any]):
+        # The app played a queued song itself: tell the session what's on
+        self._request("POST", "current", {"song": song})
+
+    def state(self) -> Dict[str, Any]:
+        return self._request("GET", "state")
+
+    def end(self) -> bool:
+        return self._request("DELETE")["ended"]
@@ -0,0 +1,124 @@
+# src/coldstart.py
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np #type: ignore
+
+from .catalog import Catalog
+
+# Hardcoded 'Centroids' for each mood (Audio Features).
+# The single definition used by NeuroManager and the app.
+MOOD_CENTROIDS = {
+    "sad":   {'valence': 0.2, 'energy': 0.2},
+    "happy": {'valence': 0.9, 'energy': 0.8},
+    "anger": {'valence': 0.1, 'energy': 0.9},
+    "focus": {'valence': 0.5, 'energy': 0.3},
+    "bored": {'valence': 0.5, 'energy': 0.7}
+}
+
+# Moods without a centroid (e.g. 'neutral') start from this one's
+DEFAULT_MOOD = 'focus'
+
+
+def mood_filters(mood: str) -> Dict[str, Any]:
+    """
+    Translates a Brain State (Mood) into Mirrorball Filters (no side effects).
+    This is the "Bridge" between the Brain and the Lyrics Database.
+    """
+    if not mood:
+        return {}
+        
+    mood = mood.lower()
+    filters = {}
+
+    # 1. FOCUS MODE -> Low Complexity
+    if mood == 'focus':
+        # "Don't distract me with complex poetry"
+        # Filters out high lexical diversity songs
+        filters['max_complexity'] = 0.45 
+
+    # 2. BOREDOM (Sad/Neutral) -> High Bridge Shift
+    elif mood == 'bored' or mood == 'neutral':
+        # "Wake me up with a drop"
+        # Prioritizes songs with explosive bridges (e.g. Cruel Summer)
+        filters['min_bridge_shift'] = 0.7
+
+    # 3. SADNESS -> Avoid "Glitter Gel Pen"
+    elif mood == 'sad':
+        # "No happy pop songs right now"
+        # Explicitly removes the upbeat/frivolous cluster
+        filters['exclude_cluster'] = 'Glitter Gel Pen'
+
+    # 4. ANGER -> (Optional) Could lock to Revenge Anthem
+    elif mood == 'anger':
+        pass
+
+    return filters
+
+
+
+def mood_target(mood: Optional[str]) -> Dict[str, float]:
+    """The audio target a mood starts from."""
+    return MOOD_CENTROIDS.get((mood or '').lower(), MOOD_CENTROIDS[DEFAULT_MOOD])
+
+
+def _config_fingerprint(moods) -> Tuple:
+    return tuple(
+        (mood, Catalog.filter_key(mood_target(mood)), Catalog.filter_key(mood_filters(mood)))
+        for mood in moods
+    )
+
+
+class ColdStartTable:
+    """
+    The 'Opening Acts'.
+    For every mood, the whole catalog ranked by distance to the mood's centroid
+    (after its filters), built once per catalog and shared by all sessions.
+    Sessions walk a ranking with a cursor (SongFinder.pop_ranked), so starting
+    or switching moods is O(1) instead of a full scan.
+
+    The table rebuilds itself when the catalog version or the mood configuration
+    (MOOD_CENTROIDS / mood_filters) changes; `version` then moves on, which
+    invalidates the sessions' cursors.
+    """
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        self.version = 0
+        self._lock = threading.Lock()
+        self._build()
+
+    @classmethod
+    def for_catalog(cls, catalog: Catalog) -> "ColdStartTable":
+        """The shared table of a catalog (built on first use)."""
+        return catalog.derived('cold_start', lambda: cls(catalog))
+
+    def _current_fingerprint(self, moods):
+        return (self.catalog.version, _config_fingerprint(sorted(moods)))
+
+    def _build(self, extra_moods=()):
+        moods = set(MOOD_CENTROIDS) | set(extra_moods)
+        self._rankings = {
+            mood: self.catalog.ranking(mood_target(mood), mood_filters(mood))
+            for mood in moods
+        }
+        self._fingerprint = self._current_fingerprint(moods)
+        self.version += 1
+
+    def entry(self, mood: Optional[str]) -> Tuple[int, np.ndarray, Dict[str, float], Dict[str, Any]]:
+        """
+        (table version, ranked row positions, target, filters) for a mood.
+        Moods outside MOOD_CENTROIDS get their own ranking on first use.
+        """
+        mood = (mood or DEFAULT_MOOD).lower()
+        if self._current_fingerprint(self._rankings) != self._fingerprint:
+            with self._lock:
+                if self._current_fingerprint(self._rankings) != self._fingerprint:
+                    self._build(extra_moods=self._rankings)
+
+        if mood not in self._rankings:
+            with self._lock:
+                rankings = dict(self._rankings)
+                rankings[mood] = self.catalog.ranking(mood_target(mood), mood_filters(mood))
+                self._rankings = rankings
+                self._fingerprint = self._current_fingerprint(rankings)
+        return self.version, self._rankings[mood], mood_target(mood), mood_filters(mood)
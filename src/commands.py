@@ -0,0 +1,73 @@
+# src/commands.py
+import threading
+from typing import Any, Callable, Optional
+
+
+class CommandPipeline:
+    """
+    The 'Bouncer'.
+    Coalesces bursts of playback intents (e.g. a user hammering SKIP).
+    Only the latest intent submitted within `window` seconds is executed;
+    everything it superseded is dropped before it reaches Spotify.
+    """
+    def __init__(self, execute: Callable[[Any], Any], window: float = 0.6):
+        """
+        Args:
+            execute: Called with the winning intent on a background thread
+            window: Seconds to wait for more intents after the first one
+        """
+        self._execute = execute
+        self.window = window
+
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()  # Never run two commands at once
+        self._timer: Optional[threading.Timer] = None
+        self._intent: Any = None
+        self._has_intent = False
+
+        # How many intents were swallowed by a later one
+        self.coalesced = 0
+
+    @property
+    def pending(self) -> bool:
+        with self._lock:
+            return self._has_intent
+
+    def submit(self, intent: Any = None):
+        """Record an intent. Replaces any intent still waiting in the window."""
+        with self._lock:
+            if self._has_intent:
+                self.coalesced += 1
+            self._intent = intent
+            self._has_intent = True
+            if self._timer is None:
+                self._timer = threading.Timer(self.window, self._fire)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _take(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            has_intent, intent = self._has_intent, self._intent
+            self._has_intent, self._intent = False, None
+            return has_intent, intent
+
+    def _fire(self):
+        with self._run_lock:
+            has_intent, intent = self._take()
+            if has_intent:
+                try:
+                    self._execute(intent)
+                except Exception as e:
+                    print(f"⚠️ Command failed: {e}")
+
+    def flush(self):
+        """Run the pending intent right now (on the caller's thread)."""
+        self._fire()
+
+    def cancel(self) -> bool:
+        """Drop the pending intent. Returns True if there was one."""
+        has_intent, _ = self._take()
+        return has_intent
@@ -0,0 +1,91 @@
+# src/history.py
+from collections import Counter, deque
+from typing import Any, Dict, Optional
+
+COLUMNS = ("Track", "Artist", "Reaction")
+
+
+class SessionHistory:
+    """
+    The 'Setlist'.
+    What the listener reacted to this session, newest first.
+
+    - Duplicate check by track id is a set lookup, not a scan.
+    - Entries live in a ring of `maxlen`: the oldest fall off, so a long session
+      renders and stores no more than a short one.
+    - Like-rate and skips per mood are counted as entries arrive (over the whole
+      session, including entries the ring has dropped).
+    - frame() keeps its DataFrame between reruns and only prepends the new rows.
+    """
+    def __init__(self, maxlen: int = 200):
+        self.maxlen = maxlen
+        self._entries = deque(maxlen=maxlen)  # (track_id, track, artist, reaction), oldest first
+        self._seen = set()
+        self.reactions = Counter()
+        self.skips_per_mood = Counter()
+        self.plays_per_mood = Counter()
+
+        self._frame = None
+        self._unrendered = []  # Entries added since the cached frame was built
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, track_id) -> bool:
+        return track_id in self._seen
+
+    def __iter__(self):
+        """Entries as dicts, newest first."""
+        for track_id, track, artist, reaction in reversed(self._entries):
+            yield {"Track": track, "Artist": artist, "Reaction": reaction, "track_id": track_id}
+
+    def add(self, track_id, track: str, artist: str, reaction: str, mood: Optional[str] = None,
+            skipped: bool = False) -> bool:
+        """Log a reaction. Returns False (and logs nothing) if the track is already in the history."""
+        if track_id in self._seen:
+            return False
+        if track_id is not None:
+            self._seen.add(track_id)
+        entry = (track_id, track, artist, reaction)
+        self._entries.append(entry)
+        self._unrendered.append(entry)
+
+        self.reactions["skipped" if skipped else "liked"] += 1
+        mood = (mood or "unknown").lower()
+        self.plays_per_mood[mood] += 1
+        if skipped:
+            self.skips_per_mood[mood] += 1
+        return True
+
+    @property
+    def like_rate(self) -> Optional[float]:
+        """Share of reactions that weren't skips (None before the first one)."""
+        total = sum(self.reactions.values())
+        return self.reactions["liked"] / total if total else None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "reactions": sum(self.reactions.values()),
+            "like_rate": self.like_rate,
+            "skips_per_mood": dict(self.skips_per_mood),
+            "plays_per_mood": dict(self.plays_per_mood),
+        }
+
+    def frame(self):
+        """The history as a DataFrame (newest first, without track ids), built incrementally."""
+        import pandas as pd #type: ignore
+
+        if self._frame is None or self._unrendered:
+            # More new rows than the ring holds: only the newest can be shown anyway
+            new = [entry[1:] for entry in reversed(self._unrendered[-self.maxlen:])]
+            self._unrendered.clear()
+            fresh = pd.DataFrame(new, columns=list(COLUMNS))
+            if self._frame is None or len(new) >= self.maxlen:
+                self._frame = fresh
+            else:
+                kept = self._frame.iloc[:self.maxlen - len(new)]
+                self._frame = pd.concat([fresh, kept], ignore_index=True)
+        return self._frame
+
+    def clear(self):
+        self.__init__(self.maxlen)
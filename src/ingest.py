@@ -0,0 +1,246 @@
+# src/ingest.py
+"""
+Catalog ingestion: fills in missing audio features from the lyrical analysis.
+
+New releases often arrive with lyrics analysed but no energy/valence yet. A
+distance-weighted kNN (or ridge) model over the lyrical columns, fitted on the
+measured songs of a reference catalog, predicts them; predicted values are flagged
+(`energy_is_predicted`, `valence_is_predicted`, `data_type = PREDICTED`) exactly like
+the rows imputed before. Files are processed in chunks, so memory stays flat.
+
+    python -m src.ingest new_releases.csv --out data/neurodj_data.csv --append
+    python -m src.ingest synth_1m.parquet --out synth_1m_filled.csv --method ridge
+"""
+import argparse
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+import numpy as np #type: ignore
+
+AUDIO = ['energy', 'valence']
+LYRICAL = ['reading_grade', 'syllable_density', 'lexical_diversity', 'bridge_shift', 'umap_x', 'umap_y']
+FLAGS = {'energy': 'energy_is_predicted', 'valence': 'valence_is_predicted'}
+
+
+def _lowercase(df):
+    df = df.copy(deep=False)
+    df.columns = [c.lower() for c in df.columns]
+    return df
+
+
+def _flag(df, name) -> np.ndarray:
+    """A True/False column as a bool array (missing -> False; CSVs give strings or objects)."""
+    if name not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    return df[name].isin([True, 'True', 'true', 'TRUE']).to_numpy(copy=True)
+
+
+def _matrix(df, columns) -> np.ndarray:
+    return df.reindex(columns=columns).to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+class FeatureImputer:
+    """
+    The 'Session Musician'.
+    Predicts energy and valence from a song's lyrical profile (LYRICAL columns).
+
+    - 'knn': mean of the k nearest measured songs (inverse-distance weighted) in
+      the standardised lyrical space. One KD-tree query per chunk.
+    - 'ridge': one linear model per feature (closed form), for very large batches.
+    Lyrical values a song lacks are taken as the reference mean; songs with no
+    lyrical data at all can't be placed and keep their gaps.
+    """
+    def __init__(self, method: str = 'knn', k: int = 5, alpha: float = 1.0):
+        """
+        Args:
+            method: 'knn' or 'ridge'
+            k: Neighbours per prediction ('knn')
+            alpha: L2 penalty on the standardised weights ('ridge')
+        """
+        if method not in ('knn', 'ridge'):
+            raise ValueError(f"Unknown method '{method}' (use 'knn' or 'ridge')")
+        self.method = method
+        self.k = k
+        self.alpha = alpha
+        self.size = 0
+
+    def fit(self, df) -> "FeatureImputer":
+        """Learn from the measured rows of a catalog (audio present and not itself predicted)."""
+        df = _lowercase(df)
+        audio = _matrix(df, AUDIO)
+        lyrics = _matrix(df, LYRICAL)
+        measured = (
+            ~np.isnan(audio).any(axis=1) & ~np.isnan(lyrics).all(axis=1)
+            & ~_flag(df, FLAGS['energy']) & ~_flag(df, FLAGS['valence'])
+        )
+        if not measured.any():
+            raise ValueError("No measured songs to learn audio features from")
+
+        lyrics, targets = lyrics[measured], audio[measured]
+        self.mean = np.nanmean(lyrics, axis=0)
+        self.mean[np.isnan(self.mean)] = 0.0
+        self.std = np.nanstd(lyrics, axis=0)
+        self.std[~(self.std > 0)] = 1.0
+        features = self._standardise(lyrics)
+        self.size = len(features)
+
+        if self.method == 'knn':
+            from scipy.spatial import cKDTree #type: ignore
+            self._tree = cKDTree(features)
+            self._targets = targets
+        else:
+            design = np.hstack([features, np.ones((len(features), 1))])
+            penalty = self.alpha * np.eye(design.shape[1])
+            penalty[-1, -1] = 0.0  # Don't shrink the intercept
+            self._weights = np.linalg.solve(design.T @ design + penalty, design.T @ targets)
+        return self
+
+    def _standardise(self, lyrics):
+        return (np.where(np.isnan(lyrics), self.mean, lyrics) - self.mean) / self.std
+
+    def predict(self, df) -> np.ndarray:
+        """(n, 2) predicted [energy, valence] for every row (NaN where there's no lyrical data)."""
+        lyrics = _matrix(_lowercase(df), LYRICAL)
+        features = self._standardise(lyrics)
+
+        if self.method == 'knn':
+            k = min(self.k, self.size)
+            distance, neighbour = self._tree.query(features, k=k, workers=-1)
+            distance, neighbour = distance.reshape(len(features), k), neighbour.reshape(len(features), k)
+            weight = 1.0 / (distance + 1e-6)
+            predicted = np.einsum('nk,nkf->nf', weight, self._targets[neighbour]) / weight.sum(axis=1)[:, None]
+        else:
+            predicted = features @ self._weights[:-1] + self._weights[-1]
+
+        predicted = np.clip(predicted, 0.0, 1.0)
+        predicted[np.isnan(lyrics).all(axis=1)] = np.nan
+        return predicted
+
+    def transform(self, df):
+        """
+        A copy of `df` with missing energy/valence filled in and flagged. Rows that
+        already have both features (or have nothing to predict from) are left as they are.
+        """
+        df = _lowercase(df)
+        audio = _matrix(df, AUDIO)
+        missing = np.isnan(audio)
+        rows = np.flatnonzero(missing.any(axis=1))
+        if not len(rows):
+            return df
+
+        predicted = self.predict(df.iloc[rows])
+        filled = missing[rows] & ~np.isnan(predicted)
+        if not filled.any():
+            return df
+
+        df = df.copy()
+        for j, name in enumerate(AUDIO):
+            hit = rows[filled[:, j]]
+            if len(hit):
+                values = audio[:, j].copy()
+                values[hit] = np.round(predicted[filled[:, j], j], 6)
+                df[name] = values
+                flags = _flag(df, FLAGS[name])
+                flags[hit] = True
+                df[FLAGS[name]] = flags
+        kind = df['data_type'].to_numpy(dtype=object, copy=True) if 'data_type' in df.columns else np.full(len(df), None, dtype=object)
+        kind[rows[filled.any(axis=1)]] = 'PREDICTED'
+        df['data_type'] = kind
+        return df
+
+
+def impute_missing(df, method: str = 'knn'):
+    """
+    `df` with gaps in energy/valence filled from its own measured songs.
+    Returns `df` unchanged if nothing is missing or there is nothing to learn from.
+    """
+    df = _lowercase(df)
+    if not len(df) or not np.isnan(_matrix(df, AUDIO)).any():
+        return df
+    try:
+        imputer = FeatureImputer(method=method).fit(df)
+    except ValueError:
+        return df
+    return imputer.transform(df)
+
+
+def iter_frames(path, chunk_size: int = 100_000) -> Iterator:
+    """Read a CSV or Parquet file as DataFrames of at most `chunk_size` rows."""
+    import pandas as pd #type: ignore
+
+    if str(path).endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq #type: ignore
+        except ImportError:
+            raise ImportError("Parquet input needs pyarrow: pip install pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def ingest(in_path, out_path, reference: Optional[str] = "data/neurodj_data.csv",
+           chunk_size: int = 100_000, method: str = 'knn', append: bool = False) -> Dict[str, int]:
+    """
+    Stream `in_path` through a FeatureImputer into `out_path` (CSV).
+
+    Args:
+        reference: Catalog whose measured songs train the model (None: the first chunk of `in_path`)
+        append: Add the rows to an existing catalog CSV (in its column order), e.g. the
+            live catalog: the running app picks them up through its hot reload
+    """
+    import pandas as pd #type: ignore
+
+    chunks = iter_frames(in_path, chunk_size)
+    if reference is not None:
+        imputer = FeatureImputer(method=method).fit(pd.read_csv(reference))
+    else:
+        first = next(chunks)
+        imputer = FeatureImputer(method=method).fit(first)
+        chunks = _prepend(first, chunks)
+
+    out_path = Path(out_path)
+    columns = None
+    if append and out_path.exists():
+        columns = list(pd.read_csv(out_path, nrows=0).columns)
+    stats = {'rows': 0, 'energy': 0, 'valence': 0}
+
+    with open(out_path, 'a' if append else 'w', newline='') as f:
+        header = columns is None
+        for chunk in chunks:
+            filled = imputer.transform(chunk)
+            before = _lowercase(chunk)
+            stats['rows'] += len(filled)
+            for name in AUDIO:
+                stats[name] += int(
+                    (np.isnan(_matrix(before, [name])[:, 0]) & ~np.isnan(_matrix(filled, [name])[:, 0])).sum()
+                )
+            if columns is not None:
+                filled = filled.reindex(columns=[c.lower() for c in columns])
+                filled.columns = columns
+            filled.to_csv(f, header=header, index=False)
+            header = False
+    return stats
+
+
+def _prepend(first, rest):
+    yield first
+    yield from rest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill in missing energy/valence from lyrical features")
+    parser.add_argument("input", help="New tracks (.csv or .parquet)")
+    parser.add_argument("--out", required=True, help="Output CSV")
+    parser.add_argument("--append", action="store_true", help="Append to --out (e.g. the live catalog)")
+    parser.add_argument("--reference", default="data/neurodj_data.csv", help="Catalog to learn from")
+    parser.add_argument("--method", choices=["knn", "ridge"], default="knn")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = ingest(args.input, args.out, reference=args.reference, chunk_size=args.chunk_size,
+                   method=args.method, append=args.append)
+    print(f"Ingested {stats['rows']:,} rows into {args.out} in {time.perf_counter() - start:.1f}s "
+          f"(predicted energy for {stats['energy']:,}, valence for {stats['valence']:,})")
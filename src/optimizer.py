@@ -1,20 +1,52 @@
 # src/optimizer.py
-from bayes_opt import BayesianOptimization #type: ignore
-from bayes_opt.acquisition import UpperConfidenceBound #type: ignore
-from typing import Optional, Dict, Any #type: ignore
+import math
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Optional, Dict, Any, List #type: ignore
 from .backend import SongFinder
+from .coldstart import ColdStartTable, mood_filters, mood_target
+from .commands import CommandPipeline
+from .preferences import PreferenceLog
 from .spotify import SpotifyHandler
+from .telemetry import default_log, filter_bits
+from .trajectory import TrajectoryPlanner
+from utils.profiling import stage
 
 class NeuroManager:
-    def __init__(self, spotify_id: str = None, spotify_secret: str = None, csv_path: str = "data/neurodj_data.csv"):
+    def __init__(self, spotify_id: str = None, spotify_secret: str = None, csv_path: str = "data/neurodj_data.csv",
+                 skip_window: float = 0.6, backend: SongFinder = None, handler: SpotifyHandler = None,
+                 preference_log: PreferenceLog = None, warm_start_points: int = 200,
+                 kappa: float = 2.5, events=None):
+        """
+        Args:
+            skip_window: Seconds to coalesce skip/next requests before one playback
+                command goes out. 0 runs every skip synchronously.
+            backend: Pre-built SongFinder (otherwise loaded from csv_path)
+            handler: Pre-built Spotify handler, e.g. OfflineSpotifyHandler for
+                benchmarks (otherwise a SpotifyHandler is created)
+            preference_log: Persistent per-user feedback log. Feedback is appended to it
+                and the optimizer is warm-started from it.
+            warm_start_points: Max past events used to warm-start the optimizer
+            kappa: UCB exploration weight (higher explores more)
+            events: Telemetry EventLog (default: src.telemetry.default_log(), a no-op
+                unless NEURODJ_TELEMETRY_DIR is set)
+        """
         # Initialize the subsystems
         # If ID/Secret are None, they will be loaded from .env by SpotifyHandler
-        self.backend = SongFinder(csv_path)
-        self.handler = SpotifyHandler(spotify_id, spotify_secret)
+        self.backend = backend if backend is not None else SongFinder(csv_path)
+        self.handler = handler if handler is not None else SpotifyHandler(spotify_id, spotify_secret)
         
         # Initialize the Brain (Optimizer)
+        # bayes_opt (and scikit-learn behind it) is imported here, not at module load,
+        # so importing this module stays cheap for workers that never build a manager
+        from bayes_opt import BayesianOptimization #type: ignore
+        from bayes_opt.acquisition import UpperConfidenceBound #type: ignore
+
         # We use UCB (Upper Confidence Bound) to balance exploration vs exploitation
-        acquisition = UpperConfidenceBound(kappa=2.5)
+        self.kappa = kappa
+        acquisition = UpperConfidenceBound(kappa=kappa)
         
         self.bo = BayesianOptimization(
             f=None,
@@ -29,67 +61,160 @@ class NeuroManager:
         )
         
         self.current_song_data: Optional[Dict[str, Any]] = None 
+        self.mood: Optional[str] = None
+        # Rows still to play on a mood glide (see glide_to_mood); the optimizer takes over after
+        self.trajectory = deque()
+
+        # Feedback waiting to be folded into the model (keyed by song so a
+        # repeated reaction to the same track replaces the earlier one)
+        self._pending_feedback: Dict[str, Dict[str, Any]] = {}
+        # Guards the optimizer, backend and current song across the UI and command threads
+        self._lock = threading.RLock()
+
+        # Skip storms: every skip is recorded, only the last playback intent is sent
+        self.skip_window = skip_window
+        self.commands = CommandPipeline(self._play_next, window=skip_window)
+
+        # Session telemetry (suggestions, picks, feedback, mood changes)
+        self.events = events if events is not None else default_log()
+        self.session_key = uuid.uuid4().int >> 65  # Fits the log's uint64 column
+
+        # Remember the user across sessions
+        self.preferences = preference_log
+        if self.preferences is not None:
+            self._warm_start(warm_start_points)
+
+    def _warm_start(self, max_points: int):
+        """Seed the optimizer with a recency-weighted sample of past sessions' feedback."""
+        self.preferences.maybe_compact()
+        history = self.preferences.warm_start(max_points=max_points)
+        with stage("bo.register"):
+            for params, reward in history:
+                self.bo.register(params=params, target=reward)
+        if history:
+            print(f"Warm-started optimizer with {len(history)} past reactions")
 
     def _get_mood_filters(self, mood: str) -> Dict[str, Any]:
         """
         Translates a Brain State (Mood) into Mirrorball Filters.
         This is the "Bridge" between the Brain and the Lyrics Database.
         """
-        if not mood:
-            return {}
-            
-        mood = mood.lower()
-        filters = {}
-
-        # 1. FOCUS MODE -> Low Complexity
-        if mood == 'focus':
-            # "Don't distract me with complex poetry"
-            # Filters out high lexical diversity songs
-            filters['max_complexity'] = 0.45 
-
-        # 2. BOREDOM (Sad/Neutral) -> High Bridge Shift
-        elif mood == 'bored' or mood == 'neutral':
-            # "Wake me up with a drop"
-            # Prioritizes songs with explosive bridges (e.g. Cruel Summer)
-            filters['min_bridge_shift'] = 0.7
-
-        # 3. SADNESS -> Avoid "Glitter Gel Pen"
-        elif mood == 'sad':
-            # "No happy pop songs right now"
-            # Explicitly removes the upbeat/frivolous cluster
-            filters['exclude_cluster'] = 'Glitter Gel Pen'
-
-        # 4. ANGER -> (Optional) Could lock to Revenge Anthem
-        elif mood == 'anger':
-            pass
-
+        filters = mood_filters(mood)
         if filters:
             print(f"Applying Filters for {mood.upper()}: {filters}")
-            
         return filters
 
-    def next_song(self, mood: str = None) -> str:
+    def _flush_feedback(self):
+        """
+        Fold all pending feedback into the optimizer as one batch.
+        The GP is refit once on the next suggest(), not once per reaction.
+        """
+        with self._lock:
+            if not self._pending_feedback:
+                return
+            batch = list(self._pending_feedback.values())
+            self._pending_feedback.clear()
+
+            with stage("bo.register"):
+                for item in batch:
+                    try:
+                        self.bo.register(params=item['params'], target=item['score'])
+                    except (KeyError, ValueError) as e:
+                        # BayesianOpt throws error if point is duplicate; ignore it
+                        pass
+            print(f"Updated Model | {len(batch)} reward(s): {[item['score'] for item in batch]}")
+
+    def _log_pick(self, event: str, song: Optional[Dict[str, Any]], target: Optional[Dict[str, float]],
+                  filters: Dict[str, Any], started: float):
+        """Telemetry for a chosen song: how far it landed from the target and which filters gave way."""
+        if not self.events.enabled:
+            return
+        features = song['features'] if song else None
+        distance = (math.hypot(features['valence'] - target['valence'], features['energy'] - target['energy'])
+                    if song and target else float('nan'))
+        self.events.log(
+            event, self.session_key, mood=self.mood, track=song['track_id'] if song else -1,
+            target=target, features=features, distance=distance, filters=filter_bits(filters),
+            relaxed=filter_bits(song['metadata']['relaxed_filters']) if song else 0,
+            latency_ms=(time.perf_counter() - started) * 1000,
+        )
+
+    def suggest(self) -> Dict[str, float]:
+        """Ask the optimizer for the next audio target (after applying pending feedback)."""
+        with self._lock:
+            started = time.perf_counter()
+            self._flush_feedback()
+            with stage("bo.suggest"):
+                target = self.bo.suggest()
+            self.events.log('suggest', self.session_key, mood=self.mood, target=target, kappa=self.kappa,
+                            latency_ms=(time.perf_counter() - started) * 1000)
+            return target
+
+    def next_song(self, mood: str = None, themes: List[str] = None, like_current: bool = False) -> str:
         """
         Main Loop:
         1. Get filters based on current mood
         2. Ask AI for audio targets (Valence/Energy)
         3. Find song matching BOTH audio targets AND lyric filters
+
+        Args:
+            themes: Prefer songs sharing at least one of these thematic_dna themes
+            like_current: Prefer songs whose themes resemble the current song's
+
+        Runs synchronously and supersedes any skip still waiting in the pipeline.
         """
-        # 1. Determine Filters from Brain State
-        filters = self._get_mood_filters(mood)
+        self.commands.cancel()
+        return self._play_next(mood, themes=themes, like_current=like_current)
 
-        # 2. Ask AI for features
-        target = self.bo.suggest()
-        
-        # 3. Get song from Backend (NOW WITH FILTERS)
-        song_data = self.backend.get_next_song(target, filters=filters)
-        
-        if not song_data:
-            return "Error: No song found"
+    def request_next(self, mood: str = None):
+        """
+        Debounced next_song(): rapid calls within `skip_window` collapse into one.
+        """
+        if self.skip_window <= 0:
+            return self._play_next(mood)
+        self.commands.submit(mood)
+        return None
+
+    def pick_next(self, mood: str = None, themes: List[str] = None, like_current: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Choose (and taboo) the next song without playing it: the next stop of a
+        mood glide if one is underway, otherwise the optimizer's suggestion.
+        """
+        with self._lock:
+            started = time.perf_counter()
+            self.mood = mood or self.mood
+            # 1. Determine Filters from Brain State
+            filters = self._get_mood_filters(mood)
+            if themes:
+                filters['themes'] = tuple(themes)
+            if like_current and self.current_song_data:
+                filters['like_track'] = self.current_song_data['track_id']
+
+            # Mid-glide: the planned path picks the song
+            while self.trajectory:
+                song_data = self.backend.take_row(self.trajectory.popleft(), filters)
+                if song_data:
+                    self._log_pick('glide_pick', song_data, mood_target(self.mood) if self.mood else None, filters, started)
+                    return song_data
+
+            # 2. Ask AI for features
+            target = self.suggest()
             
-        self.current_song_data = song_data
+            # 3. Get song from Backend (NOW WITH FILTERS)
+            song_data = self.backend.get_next_song(target, filters=filters)
+            self._log_pick('pick', song_data, target, filters, started)
+            return song_data
+
+    def _play_next(self, mood: str = None, themes: List[str] = None, like_current: bool = False) -> str:
+        with self._lock:
+            song_data = self.pick_next(mood, themes=themes, like_current=like_current)
+            
+            if not song_data:
+                return "Error: No song found"
+                
+            self.current_song_data = song_data
         
-        # 4. Play it
+        # 4. Play it (outside the lock - network I/O)
         success = self.handler.play_specific_song(song_data['name'], song_data['artist'])
         
         if success:
@@ -97,6 +222,38 @@ class NeuroManager:
         else:
             return "Error Playing Song"
 
+    def record_feedback(self, score: float, mood: str = None) -> bool:
+        """
+        Record a reaction to the current song without triggering playback.
+        Recording is cheap; the model update is batched into the next suggest().
+        Returns False if there is no current song to attribute it to.
+        """
+        with self._lock:
+            if not self.current_song_data:
+                return False
+
+            # Extract only the features that the optimizer expects (valence, energy)
+            features = self.current_song_data['features']
+            self.events.log('feedback', self.session_key, mood=mood or self.mood,
+                            track=self.current_song_data.get('track_id'), features=features, reward=score)
+            self._pending_feedback[self.current_song_data['name']] = {
+                'params': {
+                    'valence': features.get('valence', 0.5),
+                    'energy': features.get('energy', 0.5)
+                },
+                'score': score
+            }
+
+            if self.preferences is not None:
+                try:
+                    self.preferences.append(
+                        mood, self.current_song_data.get('track_id'),
+                        features.get('valence', 0.5), features.get('energy', 0.5), score
+                    )
+                except OSError as e:
+                    print(f"⚠️ Could not save preference: {e}")
+            return True
+
     def register_feedback(self, score: float, current_mood: str = None) -> Optional[str]:
         """
         User Feedback Loop.
@@ -105,26 +262,19 @@ class NeuroManager:
         Args:
             score: 0.0 (Skip) to 1.0 (Like)
             current_mood: The active brain state (so we don't lose the filters on retry)
+
+        Returns:
+            The next song's name if a skip was played synchronously (skip_window=0),
+            otherwise None (the replacement song is queued in the command pipeline).
         """
-        if self.current_song_data:
-            # Extract only the features that the optimizer expects (valence, energy)
-            features = self.current_song_data['features']
-            params = {
-                'valence': features.get('valence', 0.5),
-                'energy': features.get('energy', 0.5)
-            }
-            
-            try:
-                self.bo.register(params=params, target=score)
-                print(f"Updated Model | Reward: {score}")
-            except (KeyError, ValueError) as e:
-                # BayesianOpt throws error if point is duplicate; ignore it
-                pass
-
-            if score == 0.0:
-                print("Skipping...")
-                # Pass the mood so the retry uses the correct filters!
-                return self.next_song(mood=current_mood)
+        if not self.record_feedback(score, mood=current_mood):
+            return None
+
+        if score == 0.0:
+            print("Skipping...")
+            # Pass the mood so the retry uses the correct filters!
+            # Rapid skips coalesce: only the last one within the window plays a song
+            return self.request_next(mood=current_mood)
                 
         return None
 
@@ -134,30 +284,67 @@ class NeuroManager:
         the initial Brain State. Now applies Filters too.
         """
         print(f"Seeding Engine with Initial Mood: {mood.upper()}")
+        self._set_mood('mood_change', mood)
+        # A fresh mood wins over any skip still waiting to fire (and over a glide)
+        self.commands.cancel()
+        self.trajectory.clear()
         
-        # Hardcoded 'Centroids' for each mood (Audio Features)
-        mood_map = {
-            "sad":   {'valence': 0.2, 'energy': 0.2},
-            "happy": {'valence': 0.9, 'energy': 0.8},
-            "anger": {'valence': 0.1, 'energy': 0.9},
-            "focus": {'valence': 0.5, 'energy': 0.3},
-            "bored": {'valence': 0.5, 'energy': 0.7}
-        }
-        
-        # Default to 'focus' if mood is unknown
-        target_features = mood_map.get(mood.lower(), mood_map['focus'])
-        
-        # Get Lyric Filters
-        filters = self._get_mood_filters(mood)
-        
-        # Get song from Backend directly
-        song_data = self.backend.get_next_song(target_features, filters=filters)
-        
-        if not song_data:
-            return "Error: No song found"
+        with self._lock:
+            song_data = self.cold_start_song(mood)
             
-        self.current_song_data = song_data
+            if not song_data:
+                return "Error: No song found"
+                
+            self.current_song_data = song_data
         
         # Play it
         success = self.handler.play_specific_song(song_data['name'], song_data['artist'])
-        return song_data['name'] if success else "Error"
\ No newline at end of file
+        return song_data['name'] if success else "Error"
+
+    def cold_start_song(self, mood: str) -> Optional[Dict[str, Any]]:
+        """
+        The next song for a mood from the precomputed cold-start table
+        (centroid target + the mood's filters), without playing it.
+        Unknown moods start from the 'focus' centroid.
+        """
+        with self._lock:
+            started = time.perf_counter()
+            # Shared per catalog snapshot, so it follows hot reloads
+            table = ColdStartTable.for_catalog(self.backend.current_catalog())
+            version, ranked, target_features, filters = table.entry(mood)
+            if filters:
+                print(f"Applying Filters for {mood.upper()}: {filters}")
+            song_data = self.backend.pop_ranked((mood.lower(), version), ranked, target_features, filters=filters)
+            self._log_pick('cold_start', song_data, target_features, filters, started)
+            return song_data
+
+    def _set_mood(self, event: str, mood: str):
+        self.mood = mood
+        self.events.log(event, self.session_key, mood=mood,
+                        track=self.current_song_data['track_id'] if self.current_song_data else -1,
+                        target=mood_target(mood))
+
+    def glide_to_mood(self, mood: str, length: int = 5) -> Optional[Dict[str, Any]]:
+        """
+        Plan a smooth `length`-track path from the current song into the new mood's
+        region (kNN graph, respecting the taboo list and the mood's filters) and
+        return its first song, without playing it. The rest of the path is played by
+        the following next-song calls. Without a current song this is a cold start.
+        """
+        self._set_mood('glide_start', mood)
+        with self._lock:
+            self.trajectory.clear()
+            if not self.current_song_data:
+                return self.cold_start_song(mood)
+
+            catalog = self.backend.current_catalog()
+            planner = TrajectoryPlanner.for_catalog(catalog)
+            filters = self._get_mood_filters(mood)
+            rows = planner.plan(
+                catalog.row_of(self.current_song_data['track_id']), mood_target(mood), filters,
+                taboo=self.backend.taboo.mask, length=length,
+            )
+            self.trajectory.extend(rows)
+            print(f"Gliding to {mood.upper()} over {len(rows)} songs")
+            return self.pick_next(mood)
+
@@ -0,0 +1,135 @@
+# src/playback.py
+import threading
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+PLACEHOLDER_COVER = 'https://via.placeholder.com/300'
+
+
+class PlaybackSnapshot(NamedTuple):
+    """
+    Immutable, pre-parsed view of a single `current_playback()` response.
+    Parsed once per fetch so every caller in a rerun shares the same record.
+    """
+    track_id: str
+    title: str
+    artist: str
+    album: str
+    cover: str
+    progress_ms: int
+    duration_ms: int
+    is_playing: bool
+    fetched_at: float  # time.monotonic() when the response arrived
+
+    @classmethod
+    def from_response(cls, current: Optional[Dict[str, Any]], fetched_at: float) -> Optional["PlaybackSnapshot"]:
+        """Returns None if nothing is playing or the item has no track id."""
+        if not current or not current.get('item'):
+            return None
+
+        track = current['item']
+        track_id = track.get('id')  # Unique identifier for the track
+        if not track_id:
+            return None
+
+        # Safely extract track information with fallbacks
+        artists = track.get('artists', [])
+        album = track.get('album', {})
+        images = album.get('images', [])
+
+        return cls(
+            track_id=track_id,
+            title=track.get('name', 'Unknown Track'),
+            artist=artists[0]['name'] if artists else 'Unknown Artist',
+            album=album.get('name', 'Unknown Album'),
+            cover=images[0]['url'] if images else PLACEHOLDER_COVER,
+            progress_ms=current.get('progress_ms', 0) or 0,
+            duration_ms=track.get('duration_ms', 0) or 0,
+            is_playing=current.get('is_playing', False),
+            fetched_at=fetched_at,
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The dict shape the Streamlit UI has always consumed."""
+        return {
+            "title": self.title,
+            "artist": self.artist,
+            "album": self.album,
+            "cover": self.cover,
+            "progress_ms": self.progress_ms,
+            "duration_ms": self.duration_ms,
+            "is_playing": self.is_playing,
+            "track_id": self.track_id
+        }
+
+
+class PlaybackStateCache:
+    """
+    The 'Switchboard'.
+    Short-TTL, single-flight cache in front of `current_playback()`.
+
+    - Callers inside the TTL get the last snapshot without touching the network.
+    - Concurrent callers on a stale cache wait for ONE in-flight request
+      instead of each firing their own.
+    - Our own play/pause/skip commands call `invalidate()` so the next read
+      reflects the change immediately.
+    """
+    def __init__(self, fetch: Callable[[], Optional[Dict[str, Any]]], ttl: float = 1.5):
+        self._fetch = fetch
+        self.ttl = ttl
+
+        self._cond = threading.Condition()
+        self._snapshot: Optional[PlaybackSnapshot] = None
+        self._expires_at = 0.0
+        self._in_flight = False
+        self._generation = 0  # Bumped by invalidate() to drop in-flight results
+
+        # Counters so the saving is visible (fetches vs. served from cache)
+        self.fetches = 0
+        self.hits = 0
+
+    def get(self) -> Optional[PlaybackSnapshot]:
+        """
+        Returns the current snapshot (None if nothing is playing).
+        Exceptions from the underlying fetch propagate to the caller that ran it.
+        """
+        with self._cond:
+            while True:
+                if time.monotonic() < self._expires_at:
+                    self.hits += 1
+                    return self._snapshot
+                if not self._in_flight:
+                    break
+                # Someone else is already asking Spotify - wait for their answer
+                self._cond.wait()
+
+            self._in_flight = True
+            generation = self._generation
+            self.fetches += 1
+
+        try:
+            response = self._fetch()
+            fetched_at = time.monotonic()
+            snapshot = PlaybackSnapshot.from_response(response, fetched_at)
+        except BaseException:
+            with self._cond:
+                self._in_flight = False
+                self._cond.notify_all()
+            raise
+
+        with self._cond:
+            self._in_flight = False
+            # Only publish if no command invalidated the state while we were fetching
+            if generation == self._generation:
+                self._snapshot = snapshot
+                self._expires_at = fetched_at + self.ttl
+            self._cond.notify_all()
+
+        return snapshot
+
+    def invalidate(self):
+        """Forget the cached snapshot (call after play/pause/skip commands)."""
+        with self._cond:
+            self._generation += 1
+            self._snapshot = None
+            self._expires_at = 0.0
@@ -0,0 +1,158 @@
+# src/preferences.py
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np #type: ignore
+
+MAGIC = b"NDJPREF1"
+
+# Moods are stored as one byte; unknown/None maps to 0
+MOODS = (None, 'sad', 'happy', 'anger', 'focus', 'neutral', 'bored')
+_MOOD_CODES = {m: i for i, m in enumerate(MOODS)}
+
+# One feedback event = 25 bytes on disk
+RECORD = np.dtype([
+    ('ts', '<f8'),       # Unix time
+    ('mood', 'u1'),      # Index into MOODS
+    ('track', '<i4'),    # Catalog track id (-1 if unknown)
+    ('valence', '<f4'),
+    ('energy', '<f4'),
+    ('reward', '<f4'),   # 0.0 skip .. 1.0 like
+])
+
+DAY = 86400.0
+
+
+class PreferenceLog:
+    """
+    The 'Diary'.
+    Append-only, fixed-width binary log of a user's feedback, one file per user.
+
+    - Appends are a single 25-byte write, so a crash can at worst leave a torn
+      last record (ignored on load).
+    - Loading is one read + np.frombuffer(): a year of listening is well under a MB.
+    - Old events are compacted away (retention window + record cap) by an
+      atomic rewrite once the file grows past a threshold.
+    """
+    def __init__(self, path, retention_days: float = 365, max_records: int = 50_000):
+        """
+        Args:
+            path: Log file (created on first append)
+            retention_days: Events older than this are dropped at compaction
+            max_records: Keep at most this many most-recent events after compaction;
+                the file is compacted once it holds twice this many
+        """
+        self.path = Path(path)
+        self.retention_days = retention_days
+        self.max_records = max_records
+
+    @classmethod
+    def for_user(cls, user_id: str = "default", directory: Optional[str] = None, **kwargs) -> "PreferenceLog":
+        """Per-user log under NEURODJ_PREFS_DIR (default: .neurodj/preferences)."""
+        directory = Path(directory or os.getenv("NEURODJ_PREFS_DIR", ".neurodj/preferences"))
+        safe_id = "".join(c if c.isalnum() or c in "-_." else "_" for c in user_id)
+        return cls(directory / f"{safe_id}.prefs", **kwargs)
+
+    def append(self, mood: Optional[str], track_id: Optional[int], valence: float, energy: float,
+               reward: float, ts: Optional[float] = None):
+        """Record one feedback event."""
+        record = np.zeros(1, dtype=RECORD)
+        record['ts'] = time.time() if ts is None else ts
+        record['mood'] = _MOOD_CODES.get(mood.lower() if mood else None, 0)
+        record['track'] = -1 if track_id is None else track_id
+        record['valence'] = valence
+        record['energy'] = energy
+        record['reward'] = reward
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'ab') as f:
+            if f.tell() == 0:
+                f.write(MAGIC)
+            f.write(record.tobytes())
+
+    def load(self) -> np.ndarray:
+        """All events as a structured array (oldest first). Empty if there is no log yet."""
+        try:
+            with open(self.path, 'rb') as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    print(f"⚠️ Ignoring preference log with unknown format: {self.path}")
+                    return np.zeros(0, dtype=RECORD)
+                data = f.read()
+        except FileNotFoundError:
+            return np.zeros(0, dtype=RECORD)
+
+        # Drop a torn trailing record from an interrupted append
+        usable = len(data) - len(data) % RECORD.itemsize
+        return np.frombuffer(data[:usable], dtype=RECORD)
+
+    def compact(self, now: Optional[float] = None) -> int:
+        """
+        Rewrite the log with only events inside the retention window (and at most
+        `max_records` of them). Atomic: readers see the old or the new file. Returns events kept.
+        """
+        now = time.time() if now is None else now
+        events = self.load()
+        keep = events[events['ts'] >= now - self.retention_days * DAY][-self.max_records:]
+
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(keep.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        return len(keep)
+
+    def maybe_compact(self) -> bool:
+        """Compact if the file holds more than twice `max_records` events."""
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return False
+        if (size - len(MAGIC)) // RECORD.itemsize <= 2 * self.max_records:
+            return False
+        self.compact()
+        return True
+
+    def warm_start(self, max_points: int = 200, half_life_days: float = 30, mood: Optional[str] = None,
+                   seed: int = 0, now: Optional[float] = None) -> List[Tuple[Dict[str, float], float]]:
+        """
+        Pick a bounded, recency-weighted subset of past feedback to seed the optimizer.
+
+        Each event is weighted 0.5 ** (age / half_life) (events under the same mood count
+        double) and `max_points` are drawn without replacement in proportion to that weight,
+        so recent taste dominates but older evidence still appears. Repeated songs are
+        merged into one point with their mean reward.
+
+        Returns:
+            [(params, reward)] ready for BayesianOptimization.register(params=..., target=...)
+        """
+        events = self.load()
+        if len(events) == 0 or max_points <= 0:
+            return []
+
+        now = time.time() if now is None else now
+        age_days = np.maximum(now - events['ts'], 0) / DAY
+        weights = 0.5 ** (age_days / half_life_days)
+        if mood:
+            weights = weights * np.where(events['mood'] == _MOOD_CODES.get(mood.lower(), 0), 2.0, 1.0)
+
+        if len(events) > max_points:
+            # Weighted sampling without replacement (Gumbel top-k), O(n)
+            rng = np.random.default_rng(seed)
+            keys = np.log(weights + 1e-300) + rng.gumbel(size=len(events))
+            chosen = np.sort(np.argpartition(-keys, max_points - 1)[:max_points])
+            events = events[chosen]
+
+        # Replays of the same song are one point to the GP: average their rewards
+        points = np.stack([events['valence'], events['energy']], axis=1)
+        unique_points, inverse = np.unique(points, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        rewards = np.bincount(inverse, weights=events['reward']) / np.bincount(inverse)
+
+        return [
+            ({'valence': float(v), 'energy': float(e)}, float(r))
+            for (v, e), r in zip(unique_points, rewards)
+        ]
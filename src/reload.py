@@ -0,0 +1,146 @@
+# src/reload.py
+import os
+import threading
+from typing import Optional, Tuple
+
+import numpy as np #type: ignore
+
+from .catalog import KEY_COLUMNS, Catalog
+
+
+def diff_catalog(catalog: Catalog, new_df) -> Tuple:
+    """
+    Row-level difference between a catalog snapshot and a freshly read file.
+    Tracks are matched on KEY_COLUMNS (the last copy wins if the file repeats a key).
+
+    Returns:
+        (updates, removed, additions): new values of changed rows indexed by row
+        position, row positions that left the file, and the songs that are new.
+    """
+    import pandas as pd #type: ignore
+
+    new_df = new_df.copy(deep=False)
+    new_df.columns = [c.lower() for c in new_df.columns]
+    keys = [k for k in KEY_COLUMNS if k in new_df.columns and k in catalog.df.columns]
+    if not keys:
+        raise ValueError(f"Catalog file has none of the key columns {KEY_COLUMNS}")
+    new_df = new_df.drop_duplicates(subset=keys, keep='last').reset_index(drop=True)
+
+    alive = np.flatnonzero(catalog.alive)
+    old = catalog.df[keys].iloc[alive].assign(_row=alive)
+    new = new_df[keys].assign(_new=np.arange(len(new_df)))
+    matched = old.merge(new, on=keys, how='outer')
+
+    removed = matched.loc[matched['_new'].isna(), '_row'].to_numpy(dtype=np.int64)
+    additions = new_df.iloc[matched.loc[matched['_row'].isna(), '_new'].to_numpy(dtype=np.int64)]
+
+    both = matched.dropna(subset=['_row', '_new'])
+    rows = both['_row'].to_numpy(dtype=np.int64)
+    positions = both['_new'].to_numpy(dtype=np.int64)
+
+    # Same track in both: an update if any shared column differs (NaN == NaN)
+    columns = [c for c in new_df.columns if c in catalog.df.columns]
+    differs = np.zeros(len(rows), dtype=bool)
+    for name in columns:
+        before = catalog.df[name].iloc[rows].reset_index(drop=True)
+        after = new_df[name].iloc[positions].reset_index(drop=True)
+        differs |= ~((before == after) | (before.isna() & after.isna())).to_numpy(dtype=bool)
+
+    updates = new_df[columns].iloc[positions[differs]]
+    updates.index = pd.Index(rows[differs])
+    return updates, removed, additions
+
+
+class CatalogWatcher:
+    """
+    The 'Crate Digger'.
+    Watches the catalog file and folds edits into the shared Catalog as row-level
+    changes (see Catalog.apply): a new snapshot is built next to the old one and
+    swapped in, so queries in flight never block and sessions keep their taboo lists.
+    """
+    def __init__(self, catalog: Catalog, path: str, debounce: float = 1.0):
+        """
+        Args:
+            catalog: The snapshot currently being served
+            path: The file it was loaded from (CSV or Parquet)
+            debounce: Seconds of quiet after the last write before reloading
+        """
+        self.catalog = catalog
+        self.path = os.path.abspath(path)
+        self.debounce = debounce
+
+        self._lock = threading.Lock()  # One reload at a time
+        self._timer: Optional[threading.Timer] = None
+        self._observer = None
+
+    def start(self) -> "CatalogWatcher":
+        """Begin watching (needs the `watchdog` package)."""
+        from watchdog.observers import Observer #type: ignore
+        from watchdog.events import FileSystemEventHandler #type: ignore
+
+        watcher = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                # Editors and exporters often write a temp file and rename it over
+                paths = {getattr(event, 'src_path', None), getattr(event, 'dest_path', None)}
+                if watcher.path in {os.path.abspath(p) for p in paths if p}:
+                    watcher._schedule()
+
+        self._observer = Observer()
+        self._observer.daemon = True
+        self._observer.schedule(_Handler(), os.path.dirname(self.path), recursive=False)
+        self._observer.start()
+        return self
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    def _schedule(self):
+        # Restart the countdown on every write: reload once the file settles
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.debounce, self.reload)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def reload(self) -> Optional[Catalog]:
+        """
+        Re-read the file and apply what changed. Returns the new snapshot,
+        or None if nothing changed or the file could not be used.
+        """
+        from .coldstart import ColdStartTable
+
+        with self._lock:
+            try:
+                new_df = Catalog.read_frame(self.path)
+            except Exception as e:
+                print(f"⚠️ Catalog reload skipped: {e}")
+                return None
+            if new_df.empty:
+                print("⚠️ Catalog reload skipped: the file is empty")
+                return None
+
+            current = self.catalog.latest()
+            new_columns = {c.lower() for c in new_df.columns}
+            if new_columns != set(current.df.columns):
+                print("⚠️ Catalog columns changed; only the shared columns are reloaded")
+
+            try:
+                updates, removed, additions = diff_catalog(current, new_df)
+            except Exception as e:
+                print(f"⚠️ Catalog reload skipped: {e}")
+                return None
+            if not (len(updates) or len(removed) or len(additions)):
+                return None
+
+            catalog, changes = current.apply(updates, removed, additions)
+            ColdStartTable.for_catalog(catalog)  # Warm before sessions move over
+            self.catalog = catalog
+            print(f"🔄 Catalog reloaded: {changes.summary()} (v{catalog.version})")
+            return catalog
@@ -0,0 +1,338 @@
+# src/service.py
+"""
+NeuroDJ recommendation service: a pool of NeuroManager sessions behind a local
+HTTP/JSON API, so recommendation work no longer runs in Streamlit's rerun thread.
+
+One process serves many listeners: requests run concurrently (one thread each),
+serialized per session by that session's lock. Sessions idle for longer than
+`--idle-timeout` are evicted; what they learned lives on in the user's preference
+log, so the next request warm-starts a fresh session from it. Session ids are
+opaque, so several processes can run side by side behind any sticky router.
+
+    python -m src.service --port 8765                 # real Spotify playback
+    python -m src.service --port 8765 --offline       # no Spotify (load tests)
+
+Endpoints (JSON in, JSON out). The first POST for a session id creates the session,
+for the preference log of its "user" field (default: "default"):
+    POST   /sessions/<id>/start     {"mood"}                           cold start + play
+    POST   /sessions/<id>/feedback  {"score", "mood"?}                 reaction (0 skips)
+    POST   /sessions/<id>/next      {"mood"?, "themes"?, "like_current"?, "play"?}
+    POST   /sessions/<id>/mood      {"mood", "glide"?, "length"?}      mood change
+    POST   /sessions/<id>/current   {"song"}                           song the client played itself
+    GET    /sessions/<id>/state
+    DELETE /sessions/<id>
+    GET    /health
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+# Allow `python src/service.py` as well as `python -m src.service`
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.backend import SongFinder
+from src.catalog import Catalog
+from src.optimizer import NeuroManager
+from src.preferences import PreferenceLog
+
+
+class _Session:
+    __slots__ = ("manager", "user", "lock", "last_used", "mood")
+
+    def __init__(self, manager: NeuroManager, user: str):
+        self.manager = manager
+        self.user = user
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.mood: Optional[str] = None
+
+
+class SessionPool:
+    """
+    The 'Green Room'.
+    Builds a NeuroManager per session on first use (sharing one catalog and one
+    Spotify handler) and evicts the ones nobody has touched for `idle_timeout` seconds.
+    """
+    def __init__(self, catalog: Catalog, handler_factory: Callable[[], Any],
+                 idle_timeout: float = 900.0, skip_window: float = 0.6):
+        """
+        Args:
+            catalog: Shared catalog (sessions follow its hot reloads)
+            handler_factory: Returns the Spotify handler for a new session
+            idle_timeout: Seconds without a request before a session is evicted
+            skip_window: Passed to NeuroManager (skip coalescing)
+        """
+        self.catalog = catalog
+        self.handler_factory = handler_factory
+        self.idle_timeout = idle_timeout
+        self.skip_window = skip_window
+
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, _Session] = {}
+        self._creating: Dict[str, threading.Lock] = {}
+        self.evicted = 0
+
+        self._stopped = threading.Event()
+        self._reaper = threading.Thread(target=self._reap_loop, daemon=True)
+        self._reaper.start()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def get(self, session_id: str, user: Optional[str] = None, create: bool = True) -> Optional[_Session]:
+        """The session (built on first use; None if it doesn't exist and `create` is False)."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None or not create:
+                return session
+            # Build outside the pool lock (the optimizer warm start takes a while),
+            # but only once per id even if requests race
+            creating = self._creating.setdefault(session_id, threading.Lock())
+
+        with creating:
+            with self._lock:
+                session = self._sessions.get(session_id)
+            if session is None:
+                user = user or "default"
+                manager = NeuroManager(
+                    backend=SongFinder(catalog=self.catalog.latest()),
+                    handler=self.handler_factory(),
+                    preference_log=PreferenceLog.for_user(user),
+                    skip_window=self.skip_window,
+                )
+                session = _Session(manager, user)
+                with self._lock:
+                    self._sessions[session_id] = session
+                    self._creating.pop(session_id, None)
+        return session
+
+    def end(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self._retire(session)
+        return True
+
+    def _retire(self, session: _Session):
+        with session.lock:
+            session.manager.commands.cancel()  # Nobody is listening for that skip any more
+            if session.manager.preferences is not None:
+                session.manager.preferences.maybe_compact()
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Drop sessions idle for longer than `idle_timeout`. Returns how many went."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = [sid for sid, s in self._sessions.items()
+                    if now - s.last_used > self.idle_timeout and not s.lock.locked()]
+            sessions = [self._sessions.pop(sid) for sid in idle]
+        for session in sessions:
+            self._retire(session)
+        self.evicted += len(sessions)
+        return len(sessions)
+
+    def _reap_loop(self):
+        while not self._stopped.wait(min(60.0, max(1.0, self.idle_timeout / 4))):
+            evicted = self.evict_idle()
+            if evicted:
+                print(f"💤 Evicted {evicted} idle session(s); {len(self)} active")
+
+    def close(self):
+        self._stopped.set()
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            self._retire(session)
+
+
+def _state(session: _Session) -> Dict[str, Any]:
+    manager = session.manager
+    return {
+        "exists": True,
+        "user": session.user,
+        "mood": session.mood,
+        "current_song": manager.current_song_data,
+        "gliding": len(manager.trajectory),
+        "pending_feedback": len(manager._pending_feedback),
+        "skip_pending": manager.commands.pending,
+        "catalog_version": manager.backend.catalog.version,
+    }
+
+
+def _json_default(value):
+    # numpy scalars and arrays from the catalog
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class _ServiceError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _handle(pool: SessionPool, method: str, parts, body: Dict[str, Any]) -> Dict[str, Any]:
+    """Route one request; returns the JSON response (raises _ServiceError)."""
+    if method == "GET" and parts == ["health"]:
+        return {"status": "ok", "sessions": len(pool), "evicted": pool.evicted}
+    if len(parts) < 2 or parts[0] != "sessions":
+        raise _ServiceError(404, "Unknown endpoint")
+
+    session_id, action = parts[1], (parts[2] if len(parts) > 2 else None)
+    if method == "DELETE" and action is None:
+        return {"ended": pool.end(session_id)}
+
+    # Session ids are minted by clients: the first POST for an id builds its session
+    session = pool.get(session_id, user=body.get("user"), create=(method == "POST"))
+    if session is None:
+        if method == "GET" and action == "state":
+            return {"exists": False, "current_song": None}
+        raise _ServiceError(404, f"No session '{session_id}'")
+
+    with session.lock:
+        session.last_used = time.monotonic()
+        manager = session.manager
+
+        if method == "GET" and action == "state":
+            return _state(session)
+        if method != "POST":
+            raise _ServiceError(405, "Method not allowed")
+
+        if action == "start":
+            session.mood = _required(body, "mood")
+            return {"song": manager.start_with_mood(session.mood), "current_song": manager.current_song_data}
+
+        if action == "feedback":
+            mood = body.get("mood", session.mood)
+            score = float(_required(body, "score"))
+            recorded = manager.current_song_data is not None
+            next_song = manager.register_feedback(score, current_mood=mood)
+            return {"recorded": recorded, "song": next_song, "current_song": manager.current_song_data}
+
+        if action == "next":
+            mood = body.get("mood", session.mood)
+            themes, like_current = body.get("themes"), bool(body.get("like_current", False))
+            if body.get("play", True):
+                if body.get("debounce"):
+                    return {"song": manager.request_next(mood=mood), "queued": True}
+                song = manager.next_song(mood=mood, themes=themes, like_current=like_current)
+                return {"song": song, "current_song": manager.current_song_data}
+            # Preview: choose (and taboo) without playing, e.g. to queue it
+            return {"next_song": manager.pick_next(mood, themes=themes, like_current=like_current)}
+
+        if action == "mood":
+            session.mood = _required(body, "mood")
+            if body.get("glide", True):
+                return {"next_song": manager.glide_to_mood(session.mood, length=int(body.get("length", 5)))}
+            return {"song": manager.start_with_mood(session.mood), "current_song": manager.current_song_data}
+
+        if action == "current":
+            manager.current_song_data = _required(body, "song")
+            return {"current_song": manager.current_song_data}
+
+    raise _ServiceError(404, "Unknown endpoint")
+
+
+def _required(body: Dict[str, Any], key: str):
+    if body.get(key) is None:
+        raise _ServiceError(400, f"Missing '{key}'")
+    return body[key]
+
+
+def make_server(pool: SessionPool, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """An HTTP server (one thread per request) routing to `pool`. Call serve_forever() on it."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive: clients reuse one connection
+
+        def _respond(self, status: int, payload: Dict[str, Any]):
+            data = json.dumps(payload, default=_json_default).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _dispatch(self, method: str):
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+                parts = [p for p in self.path.split("?")[0].split("/") if p]
+                self._respond(200, _handle(pool, method, parts, body))
+            except _ServiceError as e:
+                self._respond(e.status, {"error": str(e)})
+            except (ValueError, TypeError) as e:
+                self._respond(400, {"error": str(e)})
+            except Exception as e:
+                print(f"⚠️ Request failed: {method} {self.path}: {e}")
+                self._respond(500, {"error": str(e)})
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def do_DELETE(self):
+            self._dispatch("DELETE")
+
+        def log_message(self, format, *args):
+            pass  # One line per request would drown the pipeline's own output
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve NeuroDJ sessions over HTTP/JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--catalog", default="data/neurodj_data.csv")
+    parser.add_argument("--idle-timeout", type=float, default=900.0, help="Seconds before an idle session is evicted")
+    parser.add_argument("--offline", action="store_true", help="No Spotify: playback commands are no-ops")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv #type: ignore
+    load_dotenv()
+
+    from src.coldstart import ColdStartTable
+    from src.reload import CatalogWatcher
+
+    catalog = Catalog.load(args.catalog)
+    ColdStartTable.for_catalog(catalog)
+    watcher = CatalogWatcher(catalog, args.catalog)
+    try:
+        watcher.start()
+    except Exception as e:
+        print(f"⚠️ Catalog hot reload disabled: {e}")
+
+    if args.offline:
+        from src.spotify import OfflineSpotifyHandler
+        handler_factory = OfflineSpotifyHandler
+    else:
+        from src.spotify import SpotifyHandler
+        shared = SpotifyHandler()  # One account, one token keeper and connection pool
+        handler_factory = lambda: shared
+
+    pool = SessionPool(catalog, handler_factory, idle_timeout=args.idle_timeout)
+    server = make_server(pool, args.host, args.port)
+    print(f"🎧 NeuroDJ service on http://{args.host}:{args.port} ({'offline' if args.offline else 'Spotify'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.close()
+        watcher.stop()
@@ -0,0 +1,199 @@
+# src/simulator.py
+"""
+Headless session simulator: no Streamlit, no Spotify.
+
+Each simulated session runs the real pipeline end to end:
+    EEG -> features -> mood -> NeuroManager.pick_next -> simulated reaction -> feedback
+with `utils.recommender.get_user_reaction` standing in for the listener and the
+catalog standing in for the playlist. Sessions are spread over a process pool.
+
+    python -m src.simulator --sessions 2000 --steps 30 --workers 8 --out sim.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np #type: ignore
+
+# Allow `python src/simulator.py` as well as `python -m src.simulator`
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.backend import SongFinder
+from src.catalog import Catalog
+from src.coldstart import ColdStartTable
+from src.optimizer import NeuroManager
+from src.spotify import OfflineSpotifyHandler
+from data.brain import get_multichannel_eeg
+from utils.bci_pipe import extract_features
+from utils.classifier import classify_mood
+from utils.recommender import get_user_reaction
+
+SIM_MOODS = ['sad', 'happy', 'anger', 'focus', 'neutral']
+STAGES = ['eeg', 'features', 'classify', 'cold_start', 'pick_next', 'reaction', 'feedback']
+
+# Per-worker catalog, loaded once by the pool initializer
+_catalog = None
+
+
+def _init_worker(csv_path, quiet=True):
+    global _catalog
+    if quiet:
+        # The pipeline narrates every step; thousands of sessions would drown the console
+        sys.stdout = open(os.devnull, 'w')
+    _catalog = Catalog.load(csv_path)
+    ColdStartTable.for_catalog(_catalog)
+
+
+class _StageClock:
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+
+    def time(self, stage, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.totals[stage] += time.perf_counter() - start
+        self.counts[stage] += 1
+        return result
+
+
+def _scan_brain(clock, mood, eeg_seconds):
+    raw_eeg, fs = clock.time('eeg', get_multichannel_eeg, mood=mood, duration_sec=eeg_seconds)
+    features = clock.time('features', extract_features, raw_eeg, fs)
+    return clock.time('classify', classify_mood, features)
+
+
+def run_session(seed, steps=30, eeg_seconds=5, mood_change_prob=0.05, clock=None):
+    """
+    Simulate one listening session. Returns a 0/1 array of likes, one per song played.
+    """
+    clock = clock or _StageClock()
+    rng = np.random.default_rng(seed)
+    np.random.seed(seed % (2**32))  # The EEG simulator uses numpy's global RNG
+
+    dj = NeuroManager(
+        backend=SongFinder(catalog=_catalog),
+        handler=OfflineSpotifyHandler(),
+        skip_window=0,
+    )
+
+    true_mood = SIM_MOODS[rng.integers(len(SIM_MOODS))]
+    detected = _scan_brain(clock, true_mood, eeg_seconds)
+    clock.time('cold_start', dj.start_with_mood, detected)
+
+    likes = np.zeros(steps, dtype=np.int8)
+    for step in range(steps):
+        song = dj.current_song_data
+        if song is None:
+            break
+        liked = clock.time('reaction', get_user_reaction, song, true_mood, rng)
+        likes[step] = liked
+        clock.time('feedback', dj.record_feedback, float(liked), mood=detected)
+
+        # The listener's brain state drifts now and then -> rescan and re-seed like the app does
+        if rng.random() < mood_change_prob:
+            true_mood = SIM_MOODS[rng.integers(len(SIM_MOODS))]
+            new_detected = _scan_brain(clock, true_mood, eeg_seconds)
+            if new_detected != detected:
+                detected = new_detected
+                clock.time('cold_start', dj.start_with_mood, detected)
+                continue
+
+        # The app's next song: glide stop or optimizer suggestion (applies the batched
+        # feedback), mood filters, taboo list and telemetry, all through pick_next
+        dj.current_song_data = clock.time('pick_next', dj.pick_next, detected)
+
+    return likes
+
+
+def _run_batch(seeds, steps, eeg_seconds, mood_change_prob):
+    clock = _StageClock()
+    likes = np.stack([run_session(s, steps, eeg_seconds, mood_change_prob, clock) for s in seeds])
+    return likes, dict(clock.totals), dict(clock.counts)
+
+
+def simulate(sessions=1000, steps=30, workers=None, csv_path="data/neurodj_data.csv", seed=0,
+             eeg_seconds=5, mood_change_prob=0.05, batch_size=8):
+    """
+    Run `sessions` simulated sessions over a process pool and return a report dict:
+    throughput, like-rate curve (per song position) and mean time per stage.
+    """
+    workers = workers or os.cpu_count() or 1
+    seeds = [int(s) for s in np.random.SeedSequence(seed).generate_state(sessions, dtype=np.uint64) % (2**63)]
+    batches = [seeds[i:i + batch_size] for i in range(0, sessions, batch_size)]
+
+    start = time.perf_counter()
+    all_likes = []
+    totals = defaultdict(float)
+    counts = defaultdict(int)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(csv_path,)) as pool:
+        futures = [pool.submit(_run_batch, b, steps, eeg_seconds, mood_change_prob) for b in batches]
+        for future in futures:
+            likes, batch_totals, batch_counts = future.result()
+            all_likes.append(likes)
+            for stage, total in batch_totals.items():
+                totals[stage] += total
+                counts[stage] += batch_counts[stage]
+    elapsed = time.perf_counter() - start
+
+    likes = np.concatenate(all_likes)
+    curve = likes.mean(axis=0)
+    return {
+        "sessions": sessions,
+        "steps": steps,
+        "workers": workers,
+        "elapsed_s": elapsed,
+        "sessions_per_s": sessions / elapsed,
+        "like_rate": float(likes.mean()),
+        "like_rate_curve": [round(float(x), 4) for x in curve],
+        "stage_ms": {
+            stage: {
+                "calls": counts[stage],
+                "mean_ms": totals[stage] / counts[stage] * 1e3,
+                "total_s": totals[stage],
+            }
+            for stage in STAGES if counts[stage]
+        },
+    }
+
+
+def print_report(report):
+    print(f"Simulated {report['sessions']:,} sessions x {report['steps']} songs "
+          f"on {report['workers']} workers in {report['elapsed_s']:.1f}s "
+          f"({report['sessions_per_s']:.1f} sessions/s)")
+    print(f"Overall like-rate: {report['like_rate']:.3f}")
+
+    curve = report['like_rate_curve']
+    marks = sorted({0, len(curve) // 4, len(curve) // 2, 3 * len(curve) // 4, len(curve) - 1})
+    print("Like-rate by song #: " + "  ".join(f"{i + 1}: {curve[i]:.3f}" for i in marks))
+
+    print("Per-stage time (summed over workers):")
+    for stage, s in report['stage_ms'].items():
+        print(f"   {stage:<12} calls={s['calls']:<8} mean={s['mean_ms']:8.3f} ms  total={s['total_s']:8.1f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless NeuroDJ session simulator")
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--steps", type=int, default=30, help="Songs per session")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: all cores)")
+    parser.add_argument("--catalog", default="data/neurodj_data.csv")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--eeg-seconds", type=int, default=5)
+    parser.add_argument("--mood-change-prob", type=float, default=0.05)
+    parser.add_argument("--out", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    report = simulate(sessions=args.sessions, steps=args.steps, workers=args.workers,
+                      csv_path=args.catalog, seed=args.seed, eeg_seconds=args.eeg_seconds,
+                      mood_change_prob=args.mood_change_prob)
+    print_report(report)
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
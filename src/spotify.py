@@ -1,14 +1,10 @@
 # src/spotify.py
 import os
-import spotipy #type: ignore
-from spotipy.oauth2 import SpotifyOAuth #type: ignore
-from dotenv import load_dotenv #type: ignore
-
-# Load environment variables
-load_dotenv()
+from .playback import PlaybackStateCache
+from utils.profiling import stage, timed
 
 class SpotifyHandler:
-    def __init__(self, client_id=None, client_secret=None):
+    def __init__(self, client_id=None, client_secret=None, playback_ttl=1.5):
         """
         Initialize Spotify handler with OAuth authentication.
         Loads credentials from .env file if not provided.
@@ -16,7 +12,18 @@ class SpotifyHandler:
         Args:
             client_id: Spotify API client ID (optional, loads from .env if not provided)
             client_secret: Spotify API client secret (optional, loads from .env if not provided)
+            playback_ttl: Seconds a playback snapshot is shared between callers
         """
+        # spotipy/dotenv are only needed once a real handler is built
+        # (benchmarks and simulations use OfflineSpotifyHandler and never pay for them)
+        import spotipy #type: ignore
+        from spotipy.oauth2 import SpotifyOAuth #type: ignore
+        from dotenv import load_dotenv #type: ignore
+        from .auth import AtomicCacheFileHandler, TokenKeeper
+
+        # Load environment variables
+        load_dotenv()
+
         # Load from .env if not provided
         if not client_id:
             client_id = os.getenv('SPOTIFY_CLIENT_ID')
@@ -37,19 +44,28 @@ class SpotifyHandler:
         # We need 'user-modify-playback-state' to control the player
         try:
             # Create auth manager with cache file for token persistence
+            # (written atomically so several workers can share it)
             cache_path = ".spotify_token_cache"
             self.auth_manager = SpotifyOAuth(
                 client_id=client_id,
                 client_secret=client_secret,
                 redirect_uri="http://127.0.0.1:6767",
                 scope="user-modify-playback-state user-read-playback-state",
-                cache_path=cache_path,
+                cache_handler=AtomicCacheFileHandler(cache_path),
                 show_dialog=False  # Don't show browser dialog on every request
             )
             self.sp = spotipy.Spotify(auth_manager=self.auth_manager)
         except Exception as e:
             raise ValueError(f"Failed to initialize Spotify authentication: {e}. Check your client_id and client_secret.")
 
+        # Refresh the token in the background before it expires
+        self.token_keeper = TokenKeeper(self.auth_manager)
+        self.token_keeper.start()
+
+        # Shared, short-lived view of what Spotify is playing right now
+        self.playback = PlaybackStateCache(self._fetch_playback, ttl=playback_ttl)
+
+    @timed("spotify.play_specific_song")
     def play_specific_song(self, song_name, artist_name):
         """
         Input: "Style", "Taylor Swift"
@@ -57,7 +73,8 @@ class SpotifyHandler:
         """
         # 1. Search for the specific track
         query = f"track:{song_name} artist:{artist_name}"
-        results = self.sp.search(q=query, type='track', limit=1)
+        with stage("spotify.search"):
+            results = self.sp.search(q=query, type='track', limit=1)
         
         tracks = results['tracks']['items']
         if not tracks:
@@ -70,7 +87,8 @@ class SpotifyHandler:
         
         # 3. Get available devices and select one
         try:
-            devices = self.sp.devices()
+            with stage("spotify.devices"):
+                devices = self.sp.devices()
             available_devices = devices.get('devices', [])
             
             # Find active device first
@@ -93,10 +111,12 @@ class SpotifyHandler:
         
         # 4. Send Play Command
         try:
-            if device_id:
-                self.sp.start_playback(device_id=device_id, uris=[track_uri])
-            else:
-                self.sp.start_playback(uris=[track_uri])
+            with stage("spotify.start_playback"):
+                if device_id:
+                    self.sp.start_playback(device_id=device_id, uris=[track_uri])
+                else:
+                    self.sp.start_playback(uris=[track_uri])
+            self.invalidate_playback()
             print(f"▶️ Now Playing: {song_name}")
             return True
         except Exception as e:
@@ -110,24 +130,91 @@ class SpotifyHandler:
                 print(f"⚠️ Playback Error: {e}")
             return False
     
+    @timed("spotify.pause_playback")
     def pause_playback(self):
-        """Pause the current playback"""
+        """Pause the current playback. Returns True on success."""
         try:
             self.sp.pause_playback()
+            self.invalidate_playback()
+            return True
         except Exception as e:
             print(f"⚠️ Error pausing playback: {e}")
+            return False
     
+    @timed("spotify.resume_playback")
     def start_playback(self):
-        """Start or resume playback"""
+        """Start or resume playback. Returns True on success."""
         try:
             self.sp.start_playback()
+            self.invalidate_playback()
+            return True
         except Exception as e:
             print(f"⚠️ Error starting playback: {e}")
+            return False
     
+    @timed("spotify.current_playback")
     def current_playback_state(self):
         """Get current playback state"""
         try:
             return self.sp.current_playback()
         except Exception as e:
             print(f"⚠️ Error fetching playback state: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def playback_snapshot(self):
+        """
+        Get the current playback state as a PlaybackSnapshot (None if nothing is playing).
+        Served from the shared cache when fresh; raises if Spotify can't be reached.
+        """
+        return self.playback.get()
+
+    def invalidate_playback(self):
+        """Drop the cached playback state after we changed it ourselves"""
+        self.playback.invalidate()
+
+    @timed("spotify.fetch_playback")
+    def _fetch_playback(self):
+        """
+        Raw `current_playback()` call used by the snapshot cache.
+        On 401 (token revoked/expired early) forces one shared refresh and retries.
+        """
+        try:
+            return self.sp.current_playback()
+        except Exception as e:
+            error_msg = str(e)
+            if "401" not in error_msg and "Unauthorized" not in error_msg:
+                raise
+            print("⚠️ Spotify token expired. Attempting to refresh...")
+            token_info = self.token_keeper.refresh(force=True)
+            if not token_info:
+                raise
+            print("✅ Token refreshed successfully")
+            return self.sp.current_playback()
+
+
+class OfflineSpotifyHandler:
+    """
+    Stand-in for SpotifyHandler with no network and no credentials.
+    Used by benchmarks and headless simulations; every command "succeeds".
+    """
+    def __init__(self):
+        self.played = []  # (song_name, artist_name) in play order
+
+    def play_specific_song(self, song_name, artist_name):
+        self.played.append((song_name, artist_name))
+        return True
+
+    def pause_playback(self):
+        return True
+
+    def start_playback(self):
+        return True
+
+    def current_playback_state(self):
+        return None
+
+    def playback_snapshot(self):
+        return None
+
+    def invalidate_playback(self):
+        pass
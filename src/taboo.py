@@ -0,0 +1,88 @@
+# src/taboo.py
+from typing import Iterable, Optional
+
+import numpy as np #type: ignore
+
+# Default recency window, as a share of the catalog: once this many songs have
+# been played, the oldest one becomes playable again
+DEFAULT_WINDOW_FRACTION = 0.8
+
+
+class TabooStore:
+    """
+    The 'Recently Played' list.
+    Songs a session must not repeat, keyed by catalog row id.
+
+    - A boolean mask over the catalog answers "is this row taboo?" in O(1) and is
+      used as-is by the vectorized query path (`mask`).
+    - A ring buffer remembers the order songs were played in. With a recency
+      window of N, playing song N+1 releases the oldest one, so songs come back
+      gradually instead of the whole library resetting at once.
+    - `epoch` moves on whenever anything is released, so readers that cached
+      "everything before here is taboo" (SongFinder.pop_ranked) know to rescan.
+    """
+    def __init__(self, size: int, window: Optional[int] = None):
+        """
+        Args:
+            size: Number of rows in the catalog
+            window: Songs kept taboo at once (default: DEFAULT_WINDOW_FRACTION of the catalog)
+        """
+        if window is None:
+            window = int(size * DEFAULT_WINDOW_FRACTION)
+        self.window = max(1, window)
+        self.mask = np.zeros(size, dtype=bool)
+        self.epoch = 0
+
+        # Played rows, oldest first from `_head`; each entry also owns its aliases
+        self._ring = np.full(self.window, -1, dtype=np.int64)
+        self._aliases = [None] * self.window
+        self._head = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, row):
+        return bool(self.mask[row])
+
+    def add(self, row: int, aliases: Optional[Iterable[int]] = None):
+        """
+        Mark a played row taboo (plus `aliases`: other rows for the same song).
+        Releases the oldest played song if the window is full.
+        """
+        if self._count == self.window:
+            self._release_oldest()
+
+        slot = (self._head + self._count) % self.window
+        self._ring[slot] = row
+        self._aliases[slot] = aliases
+        self._count += 1
+
+        self.mask[row] = True
+        if aliases is not None:
+            self.mask[aliases] = True
+
+    def _release_oldest(self):
+        row = self._ring[self._head]
+        aliases = self._aliases[self._head]
+        self._aliases[self._head] = None
+        self._head = (self._head + 1) % self.window
+        self._count -= 1
+
+        self.mask[row] = False
+        if aliases is not None:
+            self.mask[aliases] = False
+        self.epoch += 1
+
+    def grow(self, size: int):
+        """Extend the mask after the catalog gained rows (new songs start playable)."""
+        if size > len(self.mask):
+            self.mask = np.concatenate([self.mask, np.zeros(size - len(self.mask), dtype=bool)])
+
+    def clear(self):
+        """Forget everything (the whole library is playable again)."""
+        self.mask[:] = False
+        self._aliases = [None] * self.window
+        self._head = 0
+        self._count = 0
+        self.epoch += 1
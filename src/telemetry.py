@@ -0,0 +1,242 @@
+# src/telemetry.py
+import atexit
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np #type: ignore
+
+from .preferences import MOODS
+
+# What happened; stored as one byte
+EVENTS = (None, 'suggest', 'pick', 'cold_start', 'glide_pick', 'feedback', 'mood_change', 'glide_start')
+_EVENT_CODES = {e: i for i, e in enumerate(EVENTS)}
+_MOOD_CODES = {m: i for i, m in enumerate(MOODS)}
+
+# Filters applied / relaxed, as a bitmask
+FILTER_BITS = {'max_complexity': 1, 'min_bridge_shift': 2, 'themes': 4, 'exclude_cluster': 8, 'like_track': 16}
+
+# One event = 50 bytes; columns not meaningful for an event type are NaN / -1 / 0
+EVENT = np.dtype([
+    ('ts', '<f8'),              # Unix time
+    ('session', '<u8'),         # Random per-session key
+    ('event', 'u1'),            # Index into EVENTS
+    ('mood', 'u1'),             # Index into MOODS
+    ('track', '<i4'),           # Catalog track id (-1 if none)
+    ('target_valence', '<f4'),  # What the optimizer / mood centroid asked for
+    ('target_energy', '<f4'),
+    ('valence', '<f4'),         # What the chosen track has
+    ('energy', '<f4'),
+    ('distance', '<f4'),        # |target - track| in (valence, energy)
+    ('reward', '<f4'),          # Feedback: 0.0 skip .. 1.0 like
+    ('filters', 'u1'),          # FILTER_BITS applied
+    ('relaxed', 'u1'),          # FILTER_BITS the chosen track breaks
+    ('kappa', '<f4'),           # UCB exploration weight behind a suggestion
+    ('latency_ms', '<f4'),      # Time the step took
+])
+
+_NAN = float('nan')
+
+
+def filter_bits(names: Optional[Iterable[str]]) -> int:
+    """Bitmask of filter names (unknown names are ignored)."""
+    return sum(FILTER_BITS.get(name, 0) for name in set(names or ()))
+
+
+class NullEventLog:
+    """Telemetry switched off: logging is a no-op."""
+    enabled = False
+
+    def log(self, event, session, **fields):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class EventLog:
+    """
+    The 'Black Box'.
+    Buffered, typed session telemetry written to columnar files for offline analysis
+    (tuning filter thresholds, UCB kappa...).
+
+    - `log()` only appends a tuple to a list (under a lock held for just the append):
+      no I/O, no numpy on the live path.
+    - A background thread wakes every `flush_interval` seconds (or once `batch_rows`
+      events are waiting), packs the batch into EVENT columns and writes it as a new
+      file: Parquet when pyarrow is installed, .npz otherwise.
+    - Files rotate by construction (one per flush); the oldest beyond `max_files`
+      are deleted. `load_events()` reads a directory back.
+    """
+    enabled = True
+
+    def __init__(self, directory, flush_interval: float = 30.0, batch_rows: int = 100_000,
+                 max_files: int = 10_000, fmt: Optional[str] = None):
+        """
+        Args:
+            directory: Where event files go (created if missing)
+            flush_interval: Longest an event waits in memory (seconds)
+            batch_rows: Flush early once this many events are buffered
+            max_files: Files kept; older ones are deleted
+            fmt: 'parquet' or 'npz' (default: parquet if pyarrow is installed)
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.batch_rows = batch_rows
+        self.max_files = max_files
+        if fmt is None:
+            try:
+                import pyarrow  #type: ignore # noqa: F401
+                fmt = 'parquet'
+            except ImportError:
+                fmt = 'npz'
+        self.fmt = fmt
+
+        self._buffer: list = []
+        self._flush_lock = threading.Lock()  # One writer at a time
+        self._append_lock = threading.Lock()  # Appends vs. the flush thread's buffer swap
+        self._seq = 0
+        self.written = 0
+        self.dropped = 0
+
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def log(self, event: str, session: int, mood: Optional[str] = None, track: int = -1,
+            target: Optional[Dict[str, float]] = None, features: Optional[Dict[str, float]] = None,
+            distance: float = _NAN, reward: float = _NAN, filters: int = 0, relaxed: int = 0,
+            kappa: float = _NAN, latency_ms: float = _NAN):
+        """Record one event (cheap: the packing happens on the flush thread)."""
+        target = target or {}
+        features = features or {}
+        row = (
+            time.time(), session, _EVENT_CODES.get(event, 0),
+            _MOOD_CODES.get(mood.lower() if mood else None, 0), -1 if track is None else track,
+            target.get('valence', _NAN), target.get('energy', _NAN),
+            features.get('valence', _NAN), features.get('energy', _NAN),
+            distance, reward, filters, relaxed, kappa, latency_ms,
+        )
+        # Held only for the append, so a swap can't land between reading the
+        # buffer and appending to it (the event would go to the list being written)
+        with self._append_lock:
+            self._buffer.append(row)
+            waiting = len(self._buffer)
+        if waiting >= self.batch_rows:
+            self._wake.set()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> Optional[Path]:
+        """Write everything buffered so far to a new file. Returns its path (None if empty)."""
+        with self._flush_lock:
+            # Swap, don't copy: loggers keep appending to the fresh list meanwhile
+            with self._append_lock:
+                rows, self._buffer = self._buffer, []
+            if not rows:
+                return None
+            try:
+                path = self._write(np.array(rows, dtype=EVENT))
+            except Exception as e:
+                self.dropped += len(rows)
+                print(f"⚠️ Telemetry flush failed ({len(rows)} events dropped): {e}")
+                return None
+            self.written += len(rows)
+            self._prune()
+            return path
+
+    def _write(self, events: np.ndarray) -> Path:
+        self._seq += 1
+        stem = f"events-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._seq:06d}"
+        final = self.directory / f"{stem}.{self.fmt}"
+        temporary = self.directory / f".{stem}.tmp"
+        # Write aside and rename, so readers never see a half-written file
+        if self.fmt == 'parquet':
+            import pyarrow as pa #type: ignore
+            import pyarrow.parquet as pq #type: ignore
+            table = pa.table({name: events[name] for name in EVENT.names})
+            pq.write_table(table, temporary, compression='zstd')
+        else:
+            with open(temporary, 'wb') as f:
+                np.savez_compressed(f, **{name: events[name] for name in EVENT.names})
+        os.replace(temporary, final)
+        return final
+
+    def _prune(self):
+        files = sorted(self.directory.glob('events-*'))
+        for old in files[:max(0, len(files) - self.max_files)]:
+            old.unlink(missing_ok=True)
+
+    def close(self):
+        """Flush what's left and stop the background thread."""
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+
+def load_events(directory, since: Optional[float] = None) -> np.ndarray:
+    """Every event in a telemetry directory as one EVENT array, oldest file first."""
+    parts = []
+    for path in sorted(Path(directory).glob('events-*')):
+        if path.suffix == '.parquet':
+            import pyarrow.parquet as pq #type: ignore
+            table = pq.read_table(path)
+            columns = {name: table.column(name).to_numpy() for name in EVENT.names}
+        else:
+            with np.load(path) as data:
+                columns = {name: data[name] for name in EVENT.names}
+        part = np.empty(len(columns['ts']), dtype=EVENT)
+        for name, values in columns.items():
+            part[name] = values
+        parts.append(part)
+    events = np.concatenate(parts) if parts else np.empty(0, dtype=EVENT)
+    return events[events['ts'] >= since] if since is not None else events
+
+
+def to_frame(events: np.ndarray):
+    """Events as a DataFrame with event/mood names and filter names decoded."""
+    import pandas as pd #type: ignore
+
+    df = pd.DataFrame({name: events[name] for name in EVENT.names})
+    df['event'] = pd.Categorical.from_codes(df['event'], categories=[str(e) for e in EVENTS])
+    df['mood'] = pd.Categorical.from_codes(df['mood'], categories=[str(m) for m in MOODS])
+    for column in ('filters', 'relaxed'):
+        df[column] = [
+            tuple(name for name, bit in FILTER_BITS.items() if mask & bit) for mask in df[column]
+        ]
+    df['ts'] = pd.to_datetime(df['ts'], unit='s')
+    return df
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_log():
+    """
+    The process-wide event log: an EventLog under NEURODJ_TELEMETRY_DIR if that is
+    set, otherwise a no-op (telemetry off costs nothing).
+    """
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                directory = os.getenv("NEURODJ_TELEMETRY_DIR")
+                if directory:
+                    _default = EventLog(directory)
+                    atexit.register(_default.close)  # Don't lose the last unflushed events
+                else:
+                    _default = NullEventLog()
+    return _default
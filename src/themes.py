@@ -0,0 +1,141 @@
+# src/themes.py
+from typing import Iterable, List
+
+import numpy as np #type: ignore
+
+
+def _tokenize(thematic_dna):
+    """(row, token) pairs from comma-separated theme strings."""
+    import pandas as pd #type: ignore
+
+    tokens = (
+        pd.Series(thematic_dna, dtype=object).astype('string')
+        .str.lower().str.split(',').explode().str.strip()
+    )
+    tokens = tokens[tokens.notna() & (tokens != '')]
+    return tokens.index.to_numpy(dtype=np.int64), tokens.to_numpy(dtype=object)
+
+
+def _weigh(rows, cols, shape, idf):
+    """Row-normalised tf-idf matrix (CSR) from (row, theme) occurrences."""
+    from scipy import sparse #type: ignore
+
+    # Term counts (a token repeated in one song counts twice), then tf-idf
+    counts = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=shape)
+    counts.sum_duplicates()
+    weights = counts.multiply(idf[None, :]).tocsr()
+
+    norms = np.sqrt(np.asarray(weights.multiply(weights).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.csr_matrix(sparse.diags((1.0 / norms).astype(np.float32)) @ weights)
+
+
+class ThemeIndex:
+    """
+    The 'Liner Notes'.
+    Indexes the catalog's `thematic_dna` ("hope, blue, chest, faded, jeans") once, so
+    theme queries never touch the strings again:
+
+    - `matrix`: sparse rows x themes tf-idf weights (CSR, rows L2-normalised), so
+      "more like this song" is one sparse matrix-vector product over the catalog.
+    - `postings`: the inverted index (CSC of the same matrix): the rows that carry
+      a theme are a slice, so "songs sharing themes X" costs O(matching rows).
+    """
+    def __init__(self, thematic_dna):
+        """
+        Args:
+            thematic_dna: One comma-separated token string per catalog row (NaN/None = no themes)
+        """
+        import pandas as pd #type: ignore  # Deferred: only theme queries pay for pandas/scipy
+
+        n_rows = len(thematic_dna)
+        rows, tokens = _tokenize(thematic_dna)
+        cols, vocabulary = pd.factorize(tokens)
+
+        self.theme_names = np.asarray(vocabulary, dtype=object)
+        self.vocabulary = {str(token): i for i, token in enumerate(vocabulary)}
+        n_themes = len(vocabulary)
+
+        # Songs per theme (each song counted once)
+        pairs = np.unique(rows * max(n_themes, 1) + cols)
+        doc_freq = np.bincount(pairs % max(n_themes, 1), minlength=n_themes)
+        self.idf = (np.log((1 + n_rows) / (1 + doc_freq)) + 1.0).astype(np.float32)
+
+        self.matrix = _weigh(rows, cols, (n_rows, n_themes), self.idf)
+        self.postings = self.matrix.tocsc()
+        self.size = n_rows
+
+    def patched(self, catalog, changes) -> "ThemeIndex":
+        """
+        This index after a catalog reload: only changed rows are re-tokenized and
+        re-weighted; removed rows are emptied. The idf weights are kept (themes first
+        seen in the reload get the rarest weight) - they drift little per reload.
+        """
+        from scipy import sparse #type: ignore
+
+        changed = changes.changed
+        if 'thematic_dna' in catalog.df.columns:
+            dna = catalog.df['thematic_dna'].to_numpy(dtype=object)[changed]
+        else:
+            dna = np.full(len(changed), None, dtype=object)
+        local_rows, tokens = _tokenize(dna)
+
+        index = ThemeIndex.__new__(ThemeIndex)
+        index.vocabulary = dict(self.vocabulary)
+        cols = np.fromiter(
+            (index.vocabulary.setdefault(str(t), len(index.vocabulary)) for t in tokens),
+            dtype=np.int64, count=len(tokens),
+        )
+        n_themes = len(index.vocabulary)
+        new_names = list(index.vocabulary)[len(self.vocabulary):]
+        index.theme_names = np.concatenate([self.theme_names, np.asarray(new_names, dtype=object)])
+        index.idf = np.concatenate([
+            self.idf, np.full(len(new_names), np.log((1 + catalog.size) / 2) + 1.0, dtype=np.float32)
+        ])
+
+        # Old rows (grown to the new shape) minus the rows being replaced, plus the new rows
+        indptr = np.concatenate([
+            self.matrix.indptr, np.full(catalog.size - self.size, self.matrix.indptr[-1])
+        ])
+        base = sparse.csr_matrix(
+            (self.matrix.data, self.matrix.indices, indptr), shape=(catalog.size, n_themes)
+        )
+        keep = np.ones(catalog.size, dtype=np.float32)
+        keep[changes.updated] = 0.0
+        keep[changes.removed] = 0.0
+        base = sparse.csr_matrix(sparse.diags(keep) @ base)
+        base.eliminate_zeros()
+
+        delta = _weigh(changed[local_rows], cols, (catalog.size, n_themes), index.idf)
+        index.matrix = sparse.csr_matrix(base + delta)
+        index.postings = index.matrix.tocsc()
+        index.size = catalog.size
+        return index
+
+    @classmethod
+    def for_catalog(cls, catalog) -> "ThemeIndex":
+        """The shared index of a catalog (built on first use)."""
+        def build():
+            if 'thematic_dna' in catalog.df.columns:
+                return cls(catalog.df['thematic_dna'].to_numpy(dtype=object))
+            return cls(np.full(catalog.size, None, dtype=object))
+        return catalog.derived('themes', build)
+
+    def rows_with(self, themes: Iterable[str]) -> np.ndarray:
+        """Boolean mask of rows carrying at least one of `themes`."""
+        mask = np.zeros(self.size, dtype=bool)
+        indptr, indices = self.postings.indptr, self.postings.indices
+        for theme in themes:
+            col = self.vocabulary.get(theme.strip().lower())
+            if col is not None:
+                mask[indices[indptr[col]:indptr[col + 1]]] = True
+        return mask
+
+    def similarity(self, row: int) -> np.ndarray:
+        """Cosine similarity (0..1) of every row's themes to `row`'s."""
+        return np.asarray(self.matrix @ self.matrix[row].T.toarray()).ravel()
+
+    def themes_of(self, row: int) -> List[str]:
+        """The themes of one row."""
+        start, end = self.matrix.indptr[row], self.matrix.indptr[row + 1]
+        return [str(t) for t in self.theme_names[self.matrix.indices[start:end]]]
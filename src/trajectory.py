@@ -0,0 +1,298 @@
+# src/trajectory.py
+"""
+Smooth mood transitions over a precomputed k-nearest-neighbour graph.
+
+Songs are points in a standardised (umap_x, umap_y, valence, energy) space. Each
+song is linked to its k nearest neighbours (CSR, built offline with a KD-tree). A
+mood change then glides: an A* search walks the graph from the current song to the
+new mood's region through songs that are neither taboo nor filtered out, and the
+path is thinned to N evenly spaced tracks.
+
+    python -m src.trajectory --catalog data/neurodj_data.csv --out data/neurodj_knn.npz
+"""
+import argparse
+import hashlib
+import heapq
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np #type: ignore
+
+# Allow `python src/trajectory.py` as well as `python -m src.trajectory`
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.catalog import Catalog
+
+GRAPH_COLUMNS = ('umap_x', 'umap_y', 'valence', 'energy')
+GRAPH_FORMAT = 1
+
+
+def _raw_columns(catalog: Catalog) -> List[np.ndarray]:
+    return [
+        values if values is not None else np.zeros(catalog.size)
+        for values in (catalog.column(name) for name in GRAPH_COLUMNS)
+    ]
+
+
+def feature_scale(catalog: Catalog) -> np.ndarray:
+    """Per GRAPH_COLUMN (fill value for missing data, mean, std), shape (3, n_columns)."""
+    scale = np.zeros((3, len(GRAPH_COLUMNS)))
+    scale[2] = 1.0
+    for i, values in enumerate(_raw_columns(catalog)):
+        if np.isfinite(values).any():
+            fill = np.nanmedian(values)
+            filled = np.where(np.isnan(values), fill, values)
+            scale[:, i] = fill, filled.mean(), filled.std() or 1.0
+    return scale
+
+
+def graph_features(catalog: Catalog, scale: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    The space the graph lives in: GRAPH_COLUMNS scaled to unit variance (float32).
+    Songs missing a coordinate sit at that column's median. Pass the `scale` a graph
+    was built with to place new songs in the same space.
+    """
+    if scale is None:
+        scale = feature_scale(catalog)
+    features = np.empty((catalog.size, len(GRAPH_COLUMNS)), dtype=np.float32)
+    for i, values in enumerate(_raw_columns(catalog)):
+        fill, mean, std = scale[:, i]
+        features[:, i] = (np.where(np.isnan(values), fill, values) - mean) / std
+    return features
+
+
+def _fingerprint(features: np.ndarray) -> str:
+    return hashlib.blake2b(np.ascontiguousarray(features).tobytes(), digest_size=16).hexdigest()
+
+
+def _knn_edges(features: np.ndarray, rows: np.ndarray, candidates: np.ndarray, k: int):
+    """(source, target, length) of the k nearest `candidates` of each of `rows`."""
+    from scipy.spatial import cKDTree #type: ignore
+
+    k = min(k, len(candidates) - 1)
+    if k <= 0 or len(rows) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    distances, neighbours = cKDTree(features[candidates]).query(features[rows], k=k + 1)
+    targets = candidates[neighbours]
+    sources = np.repeat(rows, k + 1).reshape(len(rows), k + 1)
+    # Drop self-links (usually, but not always, the first hit)
+    not_self = targets != sources
+    return sources[not_self], targets[not_self], distances[not_self].astype(np.float32)
+
+
+def _symmetric_graph(sources, targets, lengths, n_rows):
+    from scipy import sparse #type: ignore
+
+    # "A is among B's neighbours" or the reverse: the walk can go both ways
+    graph = sparse.csr_matrix((lengths, (sources, targets)), shape=(n_rows, n_rows))
+    graph.sum_duplicates()
+    return graph.maximum(graph.T).tocsr()
+
+
+def build_knn_graph(features: np.ndarray, k: int = 10):
+    """Symmetric kNN graph (CSR, float32 Euclidean edge lengths)."""
+    rows = np.arange(len(features))
+    return _symmetric_graph(*_knn_edges(features, rows, rows, k), len(features))
+
+
+def save_graph(path, graph, features: np.ndarray, k: int):
+    """Compact on-disk form: CSR arrays (int32 indices, float32 weights) + a fingerprint of the features."""
+    np.savez_compressed(
+        path,
+        format=GRAPH_FORMAT, k=k, fingerprint=_fingerprint(features),
+        indptr=graph.indptr.astype(np.int64), indices=graph.indices.astype(np.int32),
+        data=graph.data.astype(np.float32),
+    )
+
+
+def load_graph(path, features: np.ndarray):
+    """(graph, k) as stored, or None if it is missing or was built from a different catalog."""
+    from scipy import sparse #type: ignore
+
+    try:
+        with np.load(path) as stored:
+            if int(stored['format']) != GRAPH_FORMAT or str(stored['fingerprint']) != _fingerprint(features):
+                print(f"⚠️ kNN graph {path} is out of date; rebuilding")
+                return None
+            n_rows = len(features)
+            graph = sparse.csr_matrix((stored['data'], stored['indices'], stored['indptr']), shape=(n_rows, n_rows))
+            return graph, int(stored['k'])
+    except FileNotFoundError:
+        return None
+
+
+class TrajectoryPlanner:
+    """
+    The 'Crossfader'.
+    Plans N-track paths between moods over a catalog's kNN graph.
+    """
+    def __init__(self, catalog: Catalog, graph=None, k: int = 10, goal_size: int = 20,
+                 greed: float = 2.0, max_expansions: int = 20_000, scale: Optional[np.ndarray] = None):
+        """
+        Args:
+            graph: Prebuilt CSR graph (e.g. from load_graph); built in memory if None
+            goal_size: How many of the best songs for the new mood make up its 'region'
+            greed: Weighted-A* factor. 1 finds the exact shortest path; larger values
+                accept a path up to `greed` times longer while exploring far fewer songs
+            max_expansions: Search budget; past it the planner jumps straight to the region
+            scale: Feature scaling the graph was built with (default: from this catalog)
+        """
+        self.catalog = catalog
+        self.k = k
+        self.scale = scale if scale is not None else feature_scale(catalog)
+        self.features = graph_features(catalog, self.scale)
+        self.graph = graph if graph is not None else build_knn_graph(self.features, k=k)
+        self.goal_size = goal_size
+        self.greed = greed
+        self.max_expansions = max_expansions
+
+    @classmethod
+    def for_catalog(cls, catalog: Catalog, path: Optional[str] = None) -> "TrajectoryPlanner":
+        """
+        The shared planner of a catalog (built on first use). Uses the graph stored
+        at `path` (default: NEURODJ_KNN_GRAPH) when it matches the catalog.
+        """
+        def build():
+            graph_path = path or os.getenv("NEURODJ_KNN_GRAPH")
+            stored = load_graph(graph_path, graph_features(catalog)) if graph_path else None
+            if stored is None:
+                return cls(catalog)
+            graph, k = stored
+            return cls(catalog, graph=graph, k=k)
+        return catalog.derived('trajectory', build)
+
+    def patched(self, catalog: Catalog, changes) -> "TrajectoryPlanner":
+        """
+        This planner after a catalog reload. Edges of changed and removed songs are
+        dropped and changed/new songs are linked to their k nearest living songs
+        (in the original feature scaling); the rest of the graph is reused as is.
+        """
+        features = graph_features(catalog, self.scale)
+        graph = self.graph.tocoo()
+        touched = np.zeros(catalog.size, dtype=bool)
+        touched[changes.changed] = True
+        touched[changes.removed] = True
+        keep = ~touched[graph.row] & ~touched[graph.col]
+
+        living = np.flatnonzero(catalog.alive)
+        sources, targets, lengths = _knn_edges(features, changes.changed[catalog.alive[changes.changed]], living, self.k)
+        graph = _symmetric_graph(
+            np.concatenate([graph.row[keep], sources]), np.concatenate([graph.col[keep], targets]),
+            np.concatenate([graph.data[keep], lengths]), catalog.size,
+        )
+
+        planner = TrajectoryPlanner.__new__(TrajectoryPlanner)
+        planner.__dict__.update(self.__dict__)
+        planner.catalog, planner.features, planner.graph = catalog, features, graph
+        return planner
+
+    def _goal_rows(self, target_features: Dict[str, float], filters: Optional[Dict[str, Any]],
+                   allowed: np.ndarray) -> np.ndarray:
+        score = np.where(allowed, self.catalog.score(target_features, filters), np.inf)
+        n_goals = min(self.goal_size, int(np.isfinite(score).sum()))
+        if n_goals == 0:
+            return np.zeros(0, dtype=np.int64)
+        goals = np.argpartition(score, n_goals - 1)[:n_goals]
+        return goals[np.argsort(score[goals], kind='stable')]
+
+    def _search(self, start: int, goal: int, allowed: np.ndarray) -> Optional[List[int]]:
+        """A* from `start` to `goal`, only through allowed songs."""
+        features = self.features
+        indptr, indices, weights = self.graph.indptr, self.graph.indices, self.graph.data
+
+        # Edges are straight-line lengths in the same space, so the straight-line
+        # distance to the goal is a lower bound on the rest of the path
+        centre = features[goal]
+        greed = self.greed
+
+        best = {start: 0.0}
+        parent = {start: -1}
+        heap = [(0.0, 0.0, start)]
+        expansions = 0
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node == goal:
+                path = []
+                while node != -1:
+                    path.append(node)
+                    node = parent[node]
+                return path[::-1]
+            if cost > best[node]:
+                continue
+            expansions += 1
+            if expansions > self.max_expansions:
+                return None
+
+            lo, hi = indptr[node], indptr[node + 1]
+            neighbours = indices[lo:hi]
+            keep = allowed[neighbours]
+            neighbours = neighbours[keep]
+            if len(neighbours) == 0:
+                continue
+            step = weights[lo:hi][keep]
+            remaining = np.sqrt(((features[neighbours] - centre) ** 2).sum(axis=1))
+            for nb, w, h in zip(neighbours.tolist(), step.tolist(), remaining.tolist()):
+                new_cost = cost + w
+                if new_cost < best.get(nb, np.inf):
+                    best[nb] = new_cost
+                    parent[nb] = node
+                    heapq.heappush(heap, (new_cost + greed * h, new_cost, nb))
+        return None
+
+    def _thin(self, path: List[int], length: int) -> List[int]:
+        """`length` tracks spaced evenly (by distance) along the path, ending at its goal."""
+        path = np.asarray(path)
+        steps = np.sqrt(((np.diff(self.features[path], axis=0)) ** 2).sum(axis=1))
+        travelled = np.concatenate([[0.0], np.cumsum(steps)])
+        marks = travelled[-1] * np.arange(1, length + 1) / length
+        picks = np.searchsorted(travelled, marks - 1e-9)
+        picks = np.unique(np.clip(picks, 1, len(path) - 1))
+        return path[picks].tolist()
+
+    def plan(self, start_row: int, target_features: Dict[str, float], filters: Optional[Dict[str, Any]] = None,
+             taboo: Optional[np.ndarray] = None, length: int = 5) -> List[int]:
+        """
+        Up to `length` row positions leading from `start_row` into the region of
+        `target_features` (the songs scoring best under `filters`). Taboo songs and
+        songs breaking `filters` are never on the path. If the graph can't connect the
+        two, the path is just the region's best songs.
+        """
+        allowed = (self.catalog.filter_penalty(filters) == 0) & self.catalog.alive
+        if taboo is not None:
+            allowed = allowed & ~taboo
+        goals = self._goal_rows(target_features, filters, allowed)
+        if len(goals) == 0:
+            return []
+
+        # Head for the region's song closest to where we are now
+        goal = int(goals[np.argmin(((self.features[goals] - self.features[start_row]) ** 2).sum(axis=1))])
+
+        allowed = allowed.copy()
+        allowed[start_row] = True
+        path = self._search(start_row, goal, allowed)
+        if path is None or len(path) < 2:
+            return goals[:length].tolist()
+
+        tracks = self._thin(path, length)
+        # Short hop: stay in the region for the rest of the glide
+        extra = [int(g) for g in goals if g not in tracks][:length - len(tracks)]
+        return tracks + extra
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the kNN graph used for mood trajectories")
+    parser.add_argument("--catalog", default="data/neurodj_data.csv")
+    parser.add_argument("--out", default="data/neurodj_knn.npz")
+    parser.add_argument("-k", type=int, default=10, help="Neighbours per song")
+    args = parser.parse_args()
+
+    catalog = Catalog.load(args.catalog)
+    features = graph_features(catalog)
+    graph = build_knn_graph(features, k=args.k)
+    save_graph(args.out, graph, features, args.k)
+    print(f"Saved {graph.nnz:,} edges over {catalog.size:,} songs to {args.out} "
+          f"({Path(args.out).stat().st_size / 1e6:.1f} MB)")
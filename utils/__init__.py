@@ -1,16 +1,12 @@
-from .bwsim import (
-    generate_pink_noise,
-    add_wave
-)
-
-from .bci_pipe import (
-    bandpass_filter,
-    extract_features
-)
-
-from .classifier import (
-    classify_mood
-)
+# Public names are resolved lazily (PEP 562) so `import utils` stays cheap:
+# scipy is only loaded when a signal-processing function is first used.
+_EXPORTS = {
+    "generate_pink_noise": ".bwsim",
+    "add_wave": ".bwsim",
+    "bandpass_filter": ".bci_pipe",
+    "extract_features": ".bci_pipe",
+    "classify_mood": ".classifier",
+}
 
 __all__ = [
     "generate_pink_noise",
@@ -18,4 +14,17 @@ __all__ = [
     "bandpass_filter",
     "extract_features",
     "classify_mood"
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        from importlib import import_module
+        value = getattr(import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value  # Cache: later lookups skip __getattr__
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,31 +1,191 @@
+import functools
 import numpy as np #type: ignore
-from scipy.signal import butter, filtfilt, welch #type: ignore
+from .profiling import timed
 
+# scipy.signal is imported inside the functions: it drags in scipy.stats and
+# takes ~1s to import, which workers that never touch EEG shouldn't pay.
+
+# Band-power tolerance of the decimated path against the full-rate one (relative, per
+# band and channel), checked on simulated windows at 256-1024 Hz decimated to ~128 Hz
+DECIMATION_TOLERANCE = 0.02
+
+@functools.lru_cache(maxsize=32)
+def _band_coefficients(fs, lowcut, highcut, output='ba'):
+    from scipy.signal import butter #type: ignore
+
+    nyquist = 0.5 * fs # nyquist frequency
+    low = lowcut / nyquist
+    high = highcut / nyquist
+    return butter(4, [low, high], btype='band', output=output)
+
+@timed("bandpass_filter")
 def bandpass_filter(data, fs, lowcut=1.0, highcut=50.0):
     """
     The 'Brillo Pad'.
     Removes signals below 1Hz (slow drift) and above 50Hz (electrical hum/muscle noise).
     """
-    nyquist = 0.5 * fs # nyquist frequency
-    low = lowcut / nyquist
-    high = highcut / nyquist
-    b, a = butter(4, [low, high], btype='band')
+    from scipy.signal import filtfilt, sosfiltfilt #type: ignore
+
+    if data.dtype == np.float32:
+        # float32 path: an 8th-order (b, a) polynomial blows up in single precision,
+        # second-order sections don't (and float32 sections keep the output float32)
+        sos = _band_coefficients(fs, lowcut, highcut, output='sos').astype(np.float32)
+        return sosfiltfilt(sos, data, axis=-1)
+
+    # Filter design only depends on (fs, band) - computed once, reused every window
+    b, a = _band_coefficients(fs, lowcut, highcut)
     
     # filtfilt applies the filter forward and backward to avoid phase shift
     return filtfilt(b, a, data, axis=-1)
 
-def extract_features(eeg_matrix, fs):
+def decimation_factor(fs, target_fs, highcut=50.0):
+    """
+    Largest integer factor q with fs / q >= `target_fs` that divides `fs`, so the
+    decimated rate is still a whole number of Hz (and Welch keeps its 0.5 Hz grid:
+    1000 Hz -> 200 Hz rather than 142.9 Hz for a 128 Hz target).
+    The target must stay above twice the bandpass `highcut`.
+    """
+    if target_fs <= 2 * highcut:
+        raise ValueError(f"target_fs must be above {2 * highcut:g} Hz (the bandpass keeps up to {highcut:g} Hz)")
+    return max(q for q in range(1, max(1, int(fs // target_fs)) + 1) if fs % q == 0)
+
+@functools.lru_cache(maxsize=32)
+def _decimation_taps(q, dtype):
+    from scipy.signal import firwin #type: ignore
+
+    # The low-pass resample_poly designs for a factor q: 20q+1 Kaiser-windowed sinc taps
+    return firwin(20 * q + 1, 1.0 / q, window=('kaiser', 5.0)).astype(dtype)
+
+@timed("decimate")
+def decimate(data, fs, target_fs, highcut=50.0):
+    """
+    The 'Trash Compactor'.
+    Anti-alias and downsample (channels x n) by an integer factor with a polyphase FIR
+    (only the kept samples are ever computed). Returns (data, new fs); float32 stays float32.
+    The ends are padded with the edge samples: zero padding would turn the window's DC
+    offset into a step, whose ringing the artifact stage then flags.
+    """
+    from scipy.signal import resample_poly #type: ignore
+
+    q = decimation_factor(fs, target_fs, highcut)
+    if q == 1:
+        return data, fs
+    dtype = np.float32 if data.dtype == np.float32 else np.float64
+    return resample_poly(data, 1, q, axis=-1, window=_decimation_taps(q, dtype), padtype='edge'), fs / q
+
+class StreamingDecimator:
+    """
+    The 'Conveyor Belt'.
+    decimate() for a live stream: push (channels x n) blocks of any size, get the
+    decimated samples that are ready. Concatenated, the output equals decimate() on the
+    whole stream; each sample comes out 10q input samples (the filter's half length)
+    after it went in. Like decimate(), the start and (on flush()) the end of the stream
+    are padded with the edge samples.
+    """
+    def __init__(self, fs, target_fs, channels, dtype=np.float32, highcut=50.0):
+        self.q = decimation_factor(fs, target_fs, highcut)
+        self.fs = fs / self.q
+        self.channels = channels
+        self.dtype = np.dtype(dtype)
+        self._taps = _decimation_taps(self.q, self.dtype.type)[::-1].copy()
+        self._half = (len(self._taps) - 1) // 2
+        self._buffer = None  # Input not yet fully used (with the padding before the signal)
+
+    def push(self, block):
+        """Feed (channels x n) samples; returns the (channels x m) decimated samples now complete."""
+        from numpy.lib.stride_tricks import sliding_window_view #type: ignore
+
+        block = np.asarray(block, dtype=self.dtype)
+        if self._buffer is None:
+            if block.shape[-1] == 0:
+                return np.zeros((self.channels, 0), dtype=self.dtype)
+            self._buffer = np.repeat(block[:, :1], self._half, axis=-1)
+        self._buffer = np.concatenate([self._buffer, block], axis=-1)
+        if self._buffer.shape[-1] < len(self._taps):
+            return self._buffer[:, :0]
+        # One output per q inputs: a dot product of each ready stretch with the taps
+        stretches = sliding_window_view(self._buffer, len(self._taps), axis=-1)[:, ::self.q]
+        out = stretches @ self._taps
+        self._buffer = self._buffer[:, out.shape[-1] * self.q:]
+        return out
+
+    def flush(self):
+        """The last samples (the stream has ended)."""
+        n_in = 0 if self._buffer is None else self._buffer.shape[-1] - self._half  # Real samples still waiting
+        if n_in <= 0:
+            return np.zeros((self.channels, 0), dtype=self.dtype)
+        out = self.push(np.repeat(self._buffer[:, -1:], self._half, axis=-1))
+        self._buffer = None
+        return out[:, :-(-n_in // self.q)]
+
+@timed("artifact_mask")
+def artifact_mask(raw_data, clean_data, fs, nperseg, step, blink_uv=75.0, gradient_ratio=8.0):
+    """
+    The 'Bouncer'.
+    Flags the Welch segments (nperseg long, every `step` samples) that hold an artifact,
+    per channel:
+    - Blink: the smoothed raw signal swings more than `blink_uv` microvolts from the
+      segment mean (slow and huge, frontal channels). Raw, because the bandpass
+      cuts a blink's slow swing roughly in half.
+    - EMG burst / electrode pop: a sample-to-sample jump bigger than `gradient_ratio`
+      times the channel's typical (median segment) gradient RMS. Relative on purpose:
+      muscle tension that lasts the whole window is the signal (anger), not an artifact.
+    Returns a bool (channels, segments) array: True = keep.
+    """
+    from numpy.lib.stride_tricks import sliding_window_view #type: ignore
+
+    # Moving average over ~60 ms: keeps a blink (~100 ms wide), averages EMG away
+    width = max(1, int(fs // 16))
+    cumulative = np.cumsum(raw_data, axis=-1, dtype=float)
+    smooth = (cumulative[..., width:] - cumulative[..., :-width]) / width
+    smooth_segments = sliding_window_view(smooth, nperseg - width, axis=-1)[..., ::step, :]
+    swing = np.abs(smooth_segments - smooth_segments.mean(axis=-1, keepdims=True)).max(axis=-1)
+
+    gradient = np.diff(clean_data, axis=-1)
+    gradient_segments = sliding_window_view(gradient, nperseg - 1, axis=-1)[..., ::step, :]
+    rms = np.sqrt((gradient_segments ** 2).mean(axis=-1))
+    baseline = np.median(rms, axis=-1, keepdims=True)
+    jump = np.abs(gradient_segments).max(axis=-1)
+
+    return (swing <= blink_uv) & (jump <= gradient_ratio * baseline)
+
+@timed("extract_features")
+def extract_features(eeg_matrix, fs, reject_artifacts=True, target_fs=None):
     """
     The 'Translator'.
     Converts raw voltage -> Band Power (Alpha, Beta, Theta).
-    Returns a dictionary of powers per channel.
+    Returns a dictionary of powers per channel, plus 'rejected': the fraction of
+    each channel's Welch segments dropped as artifacts (blinks, EMG bursts).
+
+    target_fs: Decimate to about this rate first (e.g. 128 for a 512-1000 Hz headset):
+        the bands end at 30 Hz, so everything after runs on fewer samples. Band powers
+        stay within DECIMATION_TOLERANCE of the full-rate result. float32 input stays
+        float32 through decimation, filtering and PSD.
     """
+    from scipy.signal import spectrogram #type: ignore
+
+    # 0. Drop the samples the bands don't need
+    if target_fs is not None:
+        eeg_matrix, fs = decimate(eeg_matrix, fs, target_fs)
+
     # 1. Apply Filter first!
     clean_data = bandpass_filter(eeg_matrix, fs)
     
     # 2. Get Power Spectral Density (PSD) using Welch's method
-    # This turns Time Domain -> Frequency Domain
-    freqs, psd = welch(clean_data, fs, nperseg=fs*2, axis=-1)
+    # This turns Time Domain -> Frequency Domain. The segments are kept apart
+    # (same Hann windows and 50% overlap as welch()) so artifacts can be left out of the average
+    nperseg = min(int(round(fs * 2)), clean_data.shape[-1])
+    step = nperseg - nperseg // 2
+    freqs, _, segment_psd = spectrogram(clean_data, fs, window='hann', nperseg=nperseg,
+                                        noverlap=nperseg // 2, axis=-1)
+    # segment_psd is (channels, frequencies, segments)
+    keep = np.ones(segment_psd.shape[::2], dtype=bool)
+    if reject_artifacts:
+        keep = artifact_mask(eeg_matrix, clean_data, fs, nperseg, step)
+        # A channel with nothing clean left falls back to every segment
+        keep[~keep.any(axis=-1)] = True
+    # Count in the PSD's dtype: an integer count would promote float32 to float64
+    psd = (segment_psd * keep[:, None, :]).sum(axis=-1) / keep.sum(axis=-1, dtype=segment_psd.dtype)[:, None]
     
     # 3. Average the power in specific bands
     # Define bands: Theta (4-8Hz), Alpha (8-13Hz), Beta (13-30Hz)
@@ -41,4 +201,5 @@ def extract_features(eeg_matrix, fs):
         band_power = np.mean(psd[:, idx], axis=1)
         features[band_name] = band_power 
 
+    features['rejected'] = 1.0 - keep.mean(axis=-1)
     return features
\ No newline at end of file
@@ -1,6 +1,4 @@
 import numpy as np #type: ignore
-import matplotlib.pyplot as plt #type: ignore
-from scipy.signal import butter, filtfilt #type: ignore
 
 def generate_pink_noise(num_points):
     """
@@ -0,0 +1,221 @@
+"""
+Classifier calibration: fit classify_mood's thresholds to labelled EEG.
+
+1. Build a labelled batch: simulated windows from data/brain.py (seeded) or the
+   windows of utils.recording files, labelled by the mood they end in.
+2. Extract features in bulk: windows are stacked into one matrix and go through
+   extract_features a few hundred at a time, then reduced to (focus, relax) scores.
+3. Score every threshold set of a grid at once: classifier.decide broadcasts a
+   (sets x 1) grid against (windows,) scores, and one bincount turns the
+   predictions into a (sets x 4 x 4) stack of confusion matrices.
+4. Write the best set (balanced accuracy) as JSON; classify_mood loads it from
+   data/classifier_thresholds.json (or NEURODJ_CLASSIFIER_CONFIG).
+
+    python -m utils.calibration --windows 10000 --steps 4                # simulated
+    python -m utils.calibration --recordings data/session.eegrec --out my_thresholds.json
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+if __name__ == "__main__":
+    # Run as a script: add project root to Python path (never touched on import)
+    project_root = Path(__file__).parent.parent
+    sys.path.insert(0, str(project_root))
+
+import numpy as np #type: ignore
+
+from utils.classifier import CONFIG_PATH, DEFAULT_THRESHOLDS, MOOD_LABELS, decide, mood_scores
+
+# Search range per threshold (inclusive) when there are no scores to place the grid on
+DEFAULT_RANGES = {
+    "anger_focus": (0.5, 3.0),
+    "anger_relax": (0.5, 2.0),
+    "sad_relax": (1.0, 4.0),
+    "happy_relax": (0.25, 2.0),
+    "happy_focus": (0.25, 2.0),
+}
+
+
+def simulated_windows(n_windows: int, moods: Sequence[str] = MOOD_LABELS, seconds: int = 4,
+                      seed: int = 0) -> Iterable[Tuple[np.ndarray, int, str]]:
+    """`n_windows` (eeg, fs, mood) windows from data/brain.py, moods in turn. Same seed, same batch."""
+    from data.brain import get_multichannel_eeg
+
+    np.random.seed(seed)  # The simulator uses numpy's global RNG
+    for i in range(n_windows):
+        mood = moods[i % len(moods)]
+        eeg, fs = get_multichannel_eeg(mood=mood, duration_sec=seconds)
+        yield eeg, fs, mood
+
+
+def recorded_windows(paths: Sequence, window_sec: float = 4.0,
+                     hop_sec: float = 1.0) -> Iterable[Tuple[np.ndarray, int, str]]:
+    """Labelled windows of recordings (windows whose mood classify_mood can't answer are skipped)."""
+    from utils.recording import Recording
+
+    for path in paths:
+        recording = Recording(path)
+        for end, window in recording.windows(window_sec, hop_sec):
+            mood = recording.mood_at(end - 1)
+            if mood in MOOD_LABELS:
+                yield window, recording.fs, mood
+
+
+def extract_scores(windows: Iterable[Tuple[np.ndarray, int, str]], batch: int = 256) -> Dict[str, np.ndarray]:
+    """
+    (focus, relax) scores and label indices for a stream of labelled windows, with one
+    extract_features call per `batch` same-shaped windows.
+    """
+    from utils.bci_pipe import extract_features
+
+    focus, relax, truth = [], [], []
+    pending, pending_labels, key = [], [], None
+
+    def flush():
+        channels = pending[0].shape[0]
+        features = extract_features(np.concatenate(pending), key[0])
+        batched = {band: power.reshape(len(pending), channels) for band, power in features.items()}
+        f, r = mood_scores(batched)
+        focus.append(f)
+        relax.append(r)
+        truth.append(np.array([MOOD_LABELS.index(mood) for mood in pending_labels], dtype=np.int8))
+        pending.clear()
+        pending_labels.clear()
+
+    for eeg, fs, mood in windows:
+        if pending and (fs, eeg.shape) != key:
+            flush()
+        key = (fs, eeg.shape)
+        pending.append(np.asarray(eeg, dtype=float))
+        pending_labels.append(mood)
+        if len(pending) >= batch:
+            flush()
+    if pending:
+        flush()
+
+    if not truth:
+        raise ValueError("No labelled windows to calibrate on")
+    return {"focus": np.concatenate(focus), "relax": np.concatenate(relax), "truth": np.concatenate(truth)}
+
+
+def threshold_grid(steps: int = 4, scores: Optional[Dict[str, np.ndarray]] = None,
+                   ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+                   include_default: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Every combination of `steps` values per threshold: steps ** 5 sets (4 -> 1024),
+    as one array per threshold. With `scores`, the values are quantiles of the score
+    each threshold applies to (relax spans two orders of magnitude, so an even
+    spacing would waste most of the grid); otherwise they're evenly spaced over
+    `ranges`. The hand-tuned defaults are added as the first set so they are always scored.
+    """
+    ranges = {**DEFAULT_RANGES, **(ranges or {})}
+    if scores is not None:
+        quantiles = np.linspace(0.01, 0.99, steps)
+        axes = [np.quantile(scores["focus" if key.endswith("_focus") else "relax"], quantiles)
+                for key in DEFAULT_THRESHOLDS]
+    else:
+        axes = [np.linspace(*ranges[key], steps) for key in DEFAULT_THRESHOLDS]
+    sets = np.array(list(itertools.product(*axes)))
+    if include_default:
+        sets = np.vstack([list(DEFAULT_THRESHOLDS.values()), sets])
+    return {key: sets[:, i] for i, key in enumerate(DEFAULT_THRESHOLDS)}
+
+
+def confusion_matrices(scores: Dict[str, np.ndarray], grid: Dict[str, np.ndarray],
+                       chunk: int = 256) -> np.ndarray:
+    """
+    (sets, true mood, predicted mood) counts for every threshold set of the grid.
+    Sets are scored `chunk` at a time to bound the (sets x windows) intermediates.
+    """
+    n_sets, n_labels = len(next(iter(grid.values()))), len(MOOD_LABELS)
+    truth = scores["truth"].astype(np.int64) * n_labels
+    confusion = np.empty((n_sets, n_labels, n_labels), dtype=np.int64)
+    for start in range(0, n_sets, chunk):
+        thresholds = {key: values[start:start + chunk, None] for key, values in grid.items()}
+        predicted = decide(scores["focus"], scores["relax"], thresholds)
+        # One flat bincount: cell = set * 16 + truth * 4 + predicted
+        rows = len(predicted)
+        cells = (np.arange(rows)[:, None] * n_labels * n_labels + truth + predicted).ravel()
+        confusion[start:start + rows] = np.bincount(cells, minlength=rows * n_labels * n_labels).reshape(
+            rows, n_labels, n_labels)
+    return confusion
+
+
+def balanced_accuracy(confusion: np.ndarray) -> np.ndarray:
+    """Mean per-mood recall of each confusion matrix (moods absent from the batch don't count)."""
+    support = confusion.sum(axis=-1)
+    recall = np.diagonal(confusion, axis1=-2, axis2=-1) / np.maximum(support, 1)
+    present = support > 0
+    return (recall * present).sum(axis=-1) / np.maximum(present.sum(axis=-1), 1)
+
+
+def calibrate(scores: Dict[str, np.ndarray], grid: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, Any]:
+    """Score the grid (default: threshold_grid() over these scores) and return the best set with its report."""
+    grid = grid if grid is not None else threshold_grid(scores=scores)
+    confusion = confusion_matrices(scores, grid)
+    score = balanced_accuracy(confusion)
+    best = int(np.argmax(score))
+    default = next((i for i in range(len(score))
+                    if all(grid[key][i] == value for key, value in DEFAULT_THRESHOLDS.items())), None)
+    return {
+        "thresholds": {key: float(values[best]) for key, values in grid.items()},
+        "balanced_accuracy": float(score[best]),
+        "default_balanced_accuracy": float(score[default]) if default is not None else None,
+        "accuracy": float(np.trace(confusion[best]) / confusion[best].sum()),
+        "labels": list(MOOD_LABELS),
+        "confusion": confusion[best].tolist(),  # Rows: true mood, columns: predicted
+        "windows": int(len(scores["truth"])),
+        "sets": int(len(score)),
+    }
+
+
+def write_config(report: Dict[str, Any], path=CONFIG_PATH, **meta) -> Path:
+    """Save a calibrate() report where classify_mood will pick it up."""
+    path = Path(path)
+    with open(path, "w") as f:
+        json.dump(dict(report, meta=meta), f, indent=2)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit classify_mood's thresholds to labelled EEG")
+    parser.add_argument("--windows", type=int, default=10_000, help="Simulated windows (ignored with --recordings)")
+    parser.add_argument("--seconds", type=int, default=4, help="Seconds per simulated window")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--recordings", nargs="*", help="Calibrate on these utils.recording files instead")
+    parser.add_argument("--steps", type=int, default=4, help="Values per threshold (grid = steps^5 sets)")
+    parser.add_argument("--out", default=str(CONFIG_PATH))
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.recordings:
+        windows, source = recorded_windows(args.recordings), {"recordings": args.recordings}
+    else:
+        windows = simulated_windows(args.windows, seconds=args.seconds, seed=args.seed)
+        source = {"simulated": args.windows, "seconds": args.seconds, "seed": args.seed}
+    with contextlib.redirect_stdout(io.StringIO()):
+        scores = extract_scores(windows)
+    extracted = time.perf_counter()
+
+    grid = threshold_grid(args.steps, scores=scores)
+    report = calibrate(scores, grid)
+    done = time.perf_counter()
+
+    path = write_config(report, args.out, **source)
+    print(f"Features for {report['windows']:,} windows in {extracted - start:.1f}s; "
+          f"{report['sets']:,} threshold sets scored in {done - extracted:.2f}s")
+    if report["default_balanced_accuracy"] is not None:
+        print(f"Balanced accuracy: {report['default_balanced_accuracy']:.3f} (defaults) -> "
+              f"{report['balanced_accuracy']:.3f}")
+    print(f"Best thresholds: {report['thresholds']}")
+    print(f"Confusion (rows true, columns predicted {list(MOOD_LABELS)}):")
+    for label, row in zip(MOOD_LABELS, report["confusion"]):
+        print(f"  {label:<8} {row}")
+    print(f"💾 Saved to {path}")
@@ -1,53 +1,98 @@
+import functools
+import json
+import os
 import sys
 from pathlib import Path
 
-# Add project root to Python path
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+if __name__ == "__main__":
+    # Run as a script: add project root to Python path (never touched on import)
+    project_root = Path(__file__).parent.parent
+    sys.path.insert(0, str(project_root))
 
 import numpy as np #type: ignore
-from utils.bci_pipe import extract_features
+from utils.profiling import timed
+
+# What classify_mood can answer, in decision order
+MOOD_LABELS = ("anger", "sad", "happy", "neutral")
+
+# Hand-tuned defaults; utils/calibration.py fits a replacement set from labelled EEG
+DEFAULT_THRESHOLDS = {
+    "anger_focus": 1.5,   # anger: focus above this...
+    "anger_relax": 1.0,   # ...and relax below this
+    "sad_relax": 2.0,     # sad: relax above this
+    "happy_relax": 1.0,   # happy: relax above this...
+    "happy_focus": 0.8,   # ...and focus above this
+}
+# Calibrated thresholds, if present (NEURODJ_CLASSIFIER_CONFIG points elsewhere)
+CONFIG_PATH = Path(__file__).parent.parent / "data" / "classifier_thresholds.json"
+
 
-def classify_mood(features):
+@functools.lru_cache(maxsize=8)
+def load_thresholds(path=None):
     """
-    The 'Decision Maker'.
-    Uses the spatial features to guess the mood.
+    Thresholds from a calibration config, falling back to DEFAULT_THRESHOLDS
+    (per key) when there is no config or it can't be read.
     """
-    # Extract powers (averaging front vs back channels)
-    # Front: 0, 1 | Back: 2, 3
-    front_beta = np.mean(features['beta'][:2])
-    back_alpha = np.mean(features['alpha'][2:])
-    front_noise = np.mean(features['beta'][:2]) # High beta often correlates with noise/tension
-    
-    # Calculate Ratios
+    path = Path(path or os.getenv("NEURODJ_CLASSIFIER_CONFIG") or CONFIG_PATH)
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    if not path.exists():
+        return thresholds
+    try:
+        with open(path) as f:
+            loaded = json.load(f).get("thresholds", {})
+        thresholds.update({key: float(loaded[key]) for key in DEFAULT_THRESHOLDS if key in loaded})
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"⚠️ Ignoring classifier config {path}: {e}")
+    return thresholds
+
+
+def mood_scores(features):
+    """
+    (focus, relax) scores. Works on one window's features (channels,) or a batch
+    (..., channels): averaged over front (0, 1) and back (2, 3) channels.
+    """
+    front_beta = np.mean(features['beta'][..., :2], axis=-1)
+    back_alpha = np.mean(features['alpha'][..., 2:], axis=-1)
+
     # Focus Ratio: Beta / Theta
-    focus_score = front_beta / (np.mean(features['theta'][:2]) + 1e-6)
-    
+    focus_score = front_beta / (np.mean(features['theta'][..., :2], axis=-1) + 1e-6)
+
     # Relaxation Ratio: Alpha / Beta
-    relax_score = back_alpha / (np.mean(features['beta'][2:]) + 1e-6)
-    
+    relax_score = back_alpha / (np.mean(features['beta'][..., 2:], axis=-1) + 1e-6)
+    return focus_score, relax_score
+
+
+def decide(focus_score, relax_score, thresholds):
+    """
+    The decision rules, as index into MOOD_LABELS. Broadcasts: thresholds may be
+    arrays too (calibration scores a whole grid of them in one go).
+    """
+    # 1. Anger: High Frontal Beta/Noise + Low Alpha
+    #    (or high stress/focus - hard to distinguish without more sensors)
+    anger = (focus_score > thresholds["anger_focus"]) & (relax_score < thresholds["anger_relax"])
+    # 2. Sadness: Dominant Back Alpha + Low Beta
+    sad = relax_score > thresholds["sad_relax"]
+    # 3. Happiness: High Alpha AND High Beta - "Active Calm"
+    happy = (relax_score > thresholds["happy_relax"]) & (focus_score > thresholds["happy_focus"])
+    return np.where(anger, 0, np.where(sad, 1, np.where(happy, 2, 3)))
+
+
+@timed("classify_mood")
+def classify_mood(features, thresholds=None):
+    """
+    The 'Decision Maker'.
+    Uses the spatial features to guess the mood.
+    Thresholds default to the calibrated config (see load_thresholds).
+    """
+    focus_score, relax_score = mood_scores(features)
     print(f"DEBUG: Focus Score: {focus_score:.2f} | Relax Score: {relax_score:.2f}")
 
-    # --- CLASSIFICATION LOGIC ---
-    
-    # 1. Check for Anger (High Frontal Beta/Noise + Low Alpha)
-    if focus_score > 1.5 and relax_score < 1.0:
-        return "anger" # Or high stress/focus (hard to distinguish without more sensors)
-        
-    # 2. Check for Sadness (Dominant Back Alpha + Low Beta)
-    elif relax_score > 2.0:
-        return "sad"
-        
-    # 3. Check for Happiness (High Alpha AND High Beta - "Active Calm")
-    elif relax_score > 1.0 and focus_score > 0.8:
-        return "happy"
-        
-    else:
-        return "neutral"
+    return MOOD_LABELS[int(decide(focus_score, relax_score, thresholds or load_thresholds()))]
 
 # --- TEST THE PIPELINE ---
 if __name__ == "__main__":
     from data.brain import get_multichannel_eeg
+    from utils.bci_pipe import extract_features
     # Generate fresh "Sad" data
     print("--- Simulating SAD Brain ---")
     raw_eeg, fs = get_multichannel_eeg(mood="sad")
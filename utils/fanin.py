@@ -0,0 +1,392 @@
+"""
+Multi-headset fan-in: many EEG streams, one pool of feature workers.
+
+Each headset's sample blocks are written into a shared-memory ring buffer
+(`HeadsetRing`). Every `hop_sec` a window job - only (ring name, end sample) - is
+queued for a pool of worker processes, which map the same memory: samples are never
+pickled or copied between processes. A worker stacks the windows of a batch (same
+fs and length) into one matrix, runs extract_features once for all of them and
+classify_mood per headset, and publishes the mood for each session.
+
+    python -m utils.fanin --headsets 64 --workers 4 --seconds 30
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+if __name__ == "__main__":
+    # Run as a script: add project root to Python path (never touched on import)
+    project_root = Path(__file__).parent.parent
+    sys.path.insert(0, str(project_root))
+
+import numpy as np #type: ignore
+
+_HEADER = 8  # Bytes before the samples: the int64 write counter
+_MAX_ATTACHED = 256  # Rings a worker keeps mapped
+
+
+class HeadsetRing:
+    """
+    The 'Tape Loop'.
+    The last `capacity` samples of one headset, (channels x capacity) float64, in
+    shared memory. Every sample is written twice (at i and i + capacity), so any
+    window of up to `capacity` samples is one contiguous slice: readers get a view,
+    never a stitched copy. `written` (also shared) counts all samples ever written.
+
+    One writer per ring; readers check `intact()` after reading, since a slow
+    reader's window can be overwritten under it.
+    """
+    def __init__(self, channels: int, capacity: int, name: Optional[str] = None):
+        """
+        Args:
+            channels: Electrodes per sample
+            capacity: Samples kept (longest window that can be read)
+            name: Attach to an existing ring instead of creating one
+        """
+        self.channels = channels
+        self.capacity = capacity
+        size = _HEADER + channels * 2 * capacity * 8
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self._written = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf)
+        self.data = np.ndarray((channels, 2 * capacity), dtype=np.float64, buffer=self.shm.buf, offset=_HEADER)
+        if name is None:
+            self._written[0] = 0
+
+    @property
+    def written(self) -> int:
+        return int(self._written[0])
+
+    def write(self, block: np.ndarray):
+        """Append a (channels, n) block of samples."""
+        n = block.shape[1]
+        start = self.written
+        if n > self.capacity:
+            # Only the newest `capacity` samples survive anyway
+            start, block = start + n - self.capacity, block[:, -self.capacity:]
+        pos = (start + np.arange(block.shape[1])) % self.capacity
+        self.data[:, pos] = block
+        self.data[:, pos + self.capacity] = block
+        self._written[0] = start + block.shape[1]  # Publish only once the samples are in
+
+    def window(self, end: int, length: int) -> Optional[np.ndarray]:
+        """View of samples [end - length, end), or None if they are no longer (or not yet) in the ring."""
+        if end > self.written or not self.intact(end, length) or length > self.capacity:
+            return None
+        start = (end - length) % self.capacity
+        return self.data[:, start:start + length]
+
+    def intact(self, end: int, length: int) -> bool:
+        """True if nothing in [end - length, end) has been overwritten."""
+        return self.written <= end - length + self.capacity
+
+    def close(self):
+        # Views into the buffer must go before the mapping can be closed
+        self._written = self.data = None
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+def _init_worker(quiet):
+    if quiet:
+        # classify_mood narrates every call; hundreds of headsets would drown the console
+        sys.stdout = open(os.devnull, 'w')
+
+
+def _worker(tasks, results, quiet, target_fs=None):
+    """Worker process loop: batches of window jobs in, (jobs done, [(session, end, mood, features, queued)]) out."""
+    from utils.bci_pipe import extract_features
+    from utils.classifier import classify_mood
+
+    import scipy.signal #type: ignore  # noqa: F401 - pay the import before the first batch, not during it
+
+    _init_worker(quiet)
+    rings: "OrderedDict[str, HeadsetRing]" = OrderedDict()
+    results.put((0, []))  # Ready
+
+    def attach(job):
+        ring = rings.get(job['ring'])
+        if ring is None:
+            ring = HeadsetRing(job['channels'], job['capacity'], name=job['ring'])
+            rings[job['ring']] = ring
+            if len(rings) > _MAX_ATTACHED:
+                rings.popitem(last=False)[1].close()
+        else:
+            rings.move_to_end(job['ring'])
+        return ring
+
+    while True:
+        batch = tasks.get()
+        if batch is None:
+            break
+
+        # One extract_features call per (fs, window length) group of the batch
+        groups: Dict[tuple, list] = {}
+        for job in batch:
+            try:
+                ring = attach(job)
+            except FileNotFoundError:
+                continue  # The headset left before its window was processed
+            window = ring.window(job['end'], job['length'])
+            if window is not None:
+                groups.setdefault((job['fs'], job['length']), []).append((job, ring, window))
+
+        out = []
+        for (fs, length), members in groups.items():
+            stacked = np.concatenate([window for _, _, window in members])
+            features = extract_features(stacked, fs, target_fs=target_fs)
+            offset = 0
+            for job, ring, _ in members:
+                rows = slice(offset, offset + ring.channels)
+                offset += ring.channels
+                if not ring.intact(job['end'], length):
+                    continue  # Overwritten while we read it: drop rather than report garbage
+                own = {band: power[rows] for band, power in features.items()}
+                out.append((job['session'], job['end'], classify_mood(own), own, job['queued']))
+        results.put((len(batch), out))  # Count dropped jobs too, so drain() can finish
+
+    for ring in rings.values():
+        ring.close()
+
+
+class FanIn:
+    """
+    The 'Mixing Desk'.
+    Hosts the ring buffers of many headsets and a pool of worker processes that turn
+    their windows into moods.
+
+    - `push(session, block)` writes samples; every `hop_sec` of new data queues a
+      window job. Jobs go out in batches of `batch_size` (or after `max_delay`).
+    - Results land in `latest(session)` and, if given, the `on_result` callback
+      (called on the collector thread).
+    """
+    def __init__(self, workers: Optional[int] = None, window_sec: float = 4.0, hop_sec: float = 1.0,
+                 ring_sec: float = 16.0, batch_size: int = 16, max_delay: float = 0.05,
+                 on_result: Optional[Callable[[Any, Dict[str, Any]], None]] = None, quiet: bool = True,
+                 target_fs: Optional[float] = None):
+        """
+        Args:
+            workers: Worker processes (default: one per core)
+            window_sec: Seconds of EEG per mood estimate (at least 2, Welch uses 2 s segments)
+            hop_sec: Seconds of new data between estimates
+            ring_sec: Seconds each ring keeps; windows a worker reaches later than
+                ring_sec - window_sec are dropped
+            batch_size: Window jobs per worker task
+            max_delay: Longest a job waits for its batch to fill
+            on_result: Called with (session, result) for every mood published
+            quiet: Silence the workers' console output
+            target_fs: Decimate windows to about this rate before feature extraction
+                (see utils.bci_pipe.decimate; e.g. 128 for 512-1000 Hz headsets)
+        """
+        import multiprocessing
+
+        self.window_sec = window_sec
+        self.hop_sec = hop_sec
+        self.ring_sec = max(ring_sec, window_sec)
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.on_result = on_result
+
+        # spawn, not fork: the host (e.g. Streamlit) has threads of its own
+        context = multiprocessing.get_context('spawn')
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self._workers = [
+            context.Process(target=_worker, args=(self._tasks, self._results, quiet, target_fs), daemon=True)
+            for _ in range(workers or os.cpu_count() or 1)
+        ]
+        for process in self._workers:
+            process.start()
+
+        self._lock = threading.Lock()
+        self._headsets: Dict[Any, Dict[str, Any]] = {}
+        self._latest: Dict[Any, Dict[str, Any]] = {}
+        self._pending: list = []
+        self._in_flight = 0
+        self.published = 0
+        self.dropped = 0  # Windows overwritten before a worker got to them
+        self._ready = 0
+        self._closed = threading.Event()
+
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    def add_headset(self, session, fs: int = 256, channels: int = 4) -> HeadsetRing:
+        """Open a ring for a new headset stream."""
+        ring = HeadsetRing(channels, int(self.ring_sec * fs))
+        with self._lock:
+            self._headsets[session] = {
+                'ring': ring, 'fs': fs,
+                'length': int(self.window_sec * fs), 'hop': max(1, int(self.hop_sec * fs)),
+                'next_end': int(self.window_sec * fs),
+            }
+        return ring
+
+    def remove_headset(self, session):
+        with self._lock:
+            headset = self._headsets.pop(session, None)
+            self._latest.pop(session, None)
+        if headset is not None:
+            headset['ring'].close()
+            headset['ring'].unlink()
+
+    def push(self, session, block: np.ndarray):
+        """Write a (channels, n) block from one headset; queues a window job per hop completed."""
+        headset = self._headsets[session]
+        ring = headset['ring']
+        ring.write(block)
+
+        written = ring.written
+        jobs = []
+        while headset['next_end'] <= written:
+            jobs.append({
+                'session': session, 'ring': ring.name, 'channels': ring.channels,
+                'capacity': ring.capacity, 'fs': headset['fs'], 'length': headset['length'],
+                'end': headset['next_end'], 'queued': time.perf_counter(),
+            })
+            headset['next_end'] += headset['hop']
+        if jobs:
+            with self._lock:
+                self._pending.extend(jobs)
+                if len(self._pending) >= self.batch_size:
+                    self._submit_locked()
+
+    def latest(self, session) -> Optional[Dict[str, Any]]:
+        """Newest result for a session: {'mood', 'features', 'end' (sample), 'latency' (s)}."""
+        with self._lock:
+            return self._latest.get(session)
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return self._in_flight + len(self._pending)
+
+    def _submit_locked(self):
+        for start in range(0, len(self._pending), self.batch_size):
+            self._tasks.put(self._pending[start:start + self.batch_size])
+            self._in_flight += len(self._pending[start:start + self.batch_size])
+        self._pending = []
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.max_delay):
+            with self._lock:
+                if self._pending:
+                    self._submit_locked()
+
+    def _collect(self):
+        while True:
+            item = self._results.get()
+            if item is None:
+                break
+            done, out = item
+            if not done:
+                with self._lock:
+                    self._ready += 1
+                continue
+            now = time.perf_counter()
+            for session, end, mood, features, queued in out:
+                result = {'mood': mood, 'features': features, 'end': end, 'latency': now - queued}
+                with self._lock:
+                    if session not in self._headsets:
+                        continue
+                    previous = self._latest.get(session)
+                    if previous is None or previous['end'] < end:
+                        self._latest[session] = result
+                    self.published += 1
+                if self.on_result is not None:
+                    self.on_result(session, result)
+            with self._lock:
+                self._in_flight -= done
+                self.dropped += done - len(out)
+
+    def wait_ready(self, timeout: float = 60.0) -> bool:
+        """Block until every worker has started and loaded its imports."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if self._ready == len(self._workers):
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def drain(self, timeout: float = 30.0) -> bool:
+        """Wait until every queued window has been processed (or dropped). True if it got there."""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            if self._pending:
+                self._submit_locked()
+        while time.monotonic() < deadline:
+            if self.in_flight == 0:
+                return True
+            time.sleep(0.005)
+        return False
+
+    def close(self):
+        """Stop the workers and free every ring."""
+        self._closed.set()
+        for _ in self._workers:
+            self._tasks.put(None)
+        for process in self._workers:
+            process.join(timeout=5)
+        self._results.put(None)
+        self._collector.join(timeout=5)
+        for session in list(self._headsets):
+            self.remove_headset(session)
+
+
+def _throughput(headsets, workers, seconds, block_sec=0.25, batch_size=16):
+    """Push `seconds` of EEG per headset as fast as possible; (windows/s, p95 latency in s, windows dropped)."""
+    from data.brain import get_multichannel_eeg
+
+    moods = ['sad', 'happy', 'anger', 'neutral']
+    recordings = []
+    for i in range(headsets):
+        np.random.seed(i)
+        eeg, fs = get_multichannel_eeg(mood=moods[i % len(moods)], duration_sec=seconds)
+        recordings.append(eeg)
+
+    latencies = []
+    # Rings hold the whole recording: this measures compute, not how far pushing can outrun it
+    fanin = FanIn(workers=workers, batch_size=batch_size, ring_sec=seconds + 1,
+                  on_result=lambda s, r: latencies.append(r['latency']))
+    try:
+        fanin.wait_ready()
+        for i in range(headsets):
+            fanin.add_headset(i, fs=fs)
+        block = int(block_sec * fs)
+        start = time.perf_counter()
+        for offset in range(0, seconds * fs, block):
+            for i, eeg in enumerate(recordings):
+                fanin.push(i, eeg[:, offset:offset + block])
+        fanin.drain(timeout=600)
+        elapsed = time.perf_counter() - start
+    finally:
+        fanin.close()
+    return fanin.published / elapsed, float(np.percentile(latencies, 95)) if latencies else 0.0, fanin.dropped
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fan-in throughput: many simulated headsets, one worker pool")
+    parser.add_argument("--headsets", type=int, default=64)
+    parser.add_argument("--workers", type=int, nargs="+", default=[os.cpu_count() or 1],
+                        help="Pool sizes to try (e.g. 1 2 4 8 to see the scaling)")
+    parser.add_argument("--seconds", type=int, default=30, help="EEG per headset")
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args()
+
+    for n in args.workers:
+        rate, p95, dropped = _throughput(args.headsets, n, args.seconds, batch_size=args.batch_size)
+        print(f"{n:>3} worker(s): {rate:8.1f} windows/s  (p95 latency {p95 * 1e3:.0f} ms, {dropped} dropped)")
@@ -0,0 +1,148 @@
+import functools
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+# Profiling is decided once, at import time, so disabled builds pay nothing:
+# @timed returns the original function and stage() hands back a shared no-op.
+#   NEURODJ_PROFILE=1           -> record timings
+#   NEURODJ_PROFILE_LOG=<secs>  -> print a summary at most this often (default 60, 0 = never)
+_enabled = os.getenv("NEURODJ_PROFILE", "").strip().lower() in ("1", "true", "yes", "on")
+_log_interval = float(os.getenv("NEURODJ_PROFILE_LOG", "60") or 0)
+_next_log_at = time.monotonic() + _log_interval
+
+_NULL_STAGE = nullcontext()
+_N_BUCKETS = 64  # Power-of-two nanosecond buckets: 1ns .. ~290 years
+
+
+class Histogram:
+    """
+    Fixed-size log2 latency histogram.
+    Recording is an integer bit_length() and a list increment - no allocation, no sorting.
+    """
+    __slots__ = ("buckets", "count", "total_ns", "min_ns", "max_ns")
+
+    def __init__(self):
+        self.buckets = [0] * _N_BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+
+    def add(self, ns):
+        self.buckets[min(ns.bit_length(), _N_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if self.min_ns is None or ns < self.min_ns:
+            self.min_ns = ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def quantile(self, q):
+        """Approximate quantile in ns (geometric middle of the bucket it falls in)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                low, high = (1 << (i - 1)) if i else 0, (1 << i) - 1
+                estimate = (max(low, 1) * high) ** 0.5
+                # Never report outside the observed range
+                return min(max(estimate, self.min_ns), self.max_ns)
+        return float(self.max_ns)
+
+    def summary(self):
+        """Milliseconds, ready for a table."""
+        ms = 1e-6
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ns / self.count * ms if self.count else 0.0,
+            "p50_ms": self.quantile(0.50) * ms,
+            "p95_ms": self.quantile(0.95) * ms,
+            "p99_ms": self.quantile(0.99) * ms,
+            "max_ms": self.max_ns * ms,
+            "total_ms": self.total_ns * ms,
+        }
+
+
+_histograms = {}
+
+
+def enabled():
+    """True if this process records timings."""
+    return _enabled
+
+
+def record(name, ns):
+    """Add one duration (in nanoseconds) to the histogram for `name`."""
+    global _next_log_at
+    hist = _histograms.get(name)
+    if hist is None:
+        hist = _histograms.setdefault(name, Histogram())
+    hist.add(ns)
+
+    if _log_interval > 0 and time.monotonic() >= _next_log_at:
+        _next_log_at = time.monotonic() + _log_interval
+        log_summary()
+
+
+def timed(name):
+    """
+    Decorator: time every call of the function under `name`.
+    When profiling is disabled the function is returned untouched.
+    """
+    def decorator(fn):
+        if not _enabled:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter_ns() - start)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def _stage(name):
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter_ns() - start)
+
+
+def stage(name):
+    """
+    Context manager for timing a block (e.g. a third-party call):
+        with stage("bo.suggest"):
+            target = bo.suggest()
+    """
+    return _stage(name) if _enabled else _NULL_STAGE
+
+
+def snapshot():
+    """{stage name: summary dict} for every stage recorded so far, slowest total first."""
+    stats = {name: hist.summary() for name, hist in list(_histograms.items())}
+    return dict(sorted(stats.items(), key=lambda kv: kv[1]["total_ms"], reverse=True))
+
+
+def reset():
+    """Forget all recorded timings."""
+    _histograms.clear()
+
+
+def log_summary():
+    """Print a one-line-per-stage latency summary."""
+    stats = snapshot()
+    if not stats:
+        return
+    print("⏱️ Pipeline latency (ms):")
+    for name, s in stats.items():
+        print(f"   {name:<32} n={s['count']:<6} p50={s['p50_ms']:8.2f} "
+              f"p95={s['p95_ms']:8.2f} p99={s['p99_ms']:8.2f} max={s['max_ms']:8.2f}")
@@ -1,35 +1,61 @@
 import numpy as np #type: ignore
-from data.fake_playlist import DUMMY_PLAYLIST, USER_TASTE_PROFILE
 
-def find_closest_song(suggested_v, suggested_e):
+# Simulated listener: the (valence, energy) each brain state secretly wants.
+# Used by headless simulations in place of a real user pressing SKIP.
+USER_TASTE_PROFILE = {
+    "sad":     {'target_v': 0.25, 'target_e': 0.30},
+    "happy":   {'target_v': 0.80, 'target_e': 0.75},
+    "anger":   {'target_v': 0.20, 'target_e': 0.85},
+    "focus":   {'target_v': 0.45, 'target_e': 0.35},
+    "neutral": {'target_v': 0.55, 'target_e': 0.60},
+}
+
+
+def _audio_features(song):
+    """Accepts a catalog row/dict ({'valence', 'energy'}) or a SongFinder result ({'features': {...}})."""
+    features = song.get('features', song)
+    return features['valence'], features['energy']
+
+
+def find_closest_song(suggested_v, suggested_e, playlist):
     """
-    Finds the 'Nearest Neighbor' in the dummy database.
+    Finds the 'Nearest Neighbor' in the playlist (a catalog DataFrame or a list of song dicts).
     This is exactly how Spotify 'Radio' works.
     """
+    if hasattr(playlist, 'iloc'):
+        # Euclidean distance over the whole catalog at once
+        dist = np.hypot(playlist['valence'].to_numpy() - suggested_v,
+                        playlist['energy'].to_numpy() - suggested_e)
+        return playlist.iloc[int(np.argmin(dist))].to_dict()
+
     best_song = None
     min_dist = float('inf')
-    
-    for song in DUMMY_PLAYLIST:
+
+    for song in playlist:
         # Euclidean distance
-        dist = np.sqrt((song['valence'] - suggested_v)**2 + 
+        dist = np.sqrt((song['valence'] - suggested_v)**2 +
                        (song['energy'] - suggested_e)**2)
         if dist < min_dist:
             min_dist = dist
             best_song = song
-            
+
     return best_song
 
-def get_user_reaction(song, current_mood):
+
+def get_user_reaction(song, current_mood, rng=None):
     """
     Does the user like the song picked?
+    Returns 1 (like) or 0 (skip). Pass a numpy Generator for reproducible runs.
     """
-    target = USER_TASTE_PROFILE[current_mood]
-    
+    target = USER_TASTE_PROFILE.get(current_mood, USER_TASTE_PROFILE['neutral'])
+    valence, energy = _audio_features(song)
+
     # Distance between the SONG and the USER'S DESIRE
-    dist = np.sqrt((song['valence'] - target['target_v'])**2 + 
-                   (song['energy'] - target['target_e'])**2)
-    
+    dist = np.sqrt((valence - target['target_v'])**2 +
+                   (energy - target['target_e'])**2)
+
     # If distance is small (< 0.2), they probably like it
     # We add randomness to make it realistic
-    prob_like = np.exp(-5 * dist) 
-    return 1 if np.random.random() < prob_like else 0
\ No newline at end of file
+    prob_like = np.exp(-5 * dist)
+    draw = rng.random() if rng is not None else np.random.random()
+    return 1 if draw < prob_like else 0
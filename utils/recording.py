@@ -0,0 +1,263 @@
+"""
+EEG recordings: capture once, replay deterministically.
+
+File layout (little-endian):
+    8 bytes   magic b"NDJEEG01"
+    8 bytes   uint64 header size H
+    H bytes   JSON header, space padded: fs, channel names, mood labels, sample count
+    ...       float32 samples, sample-major (n_samples x channels), appended in chunks
+
+The header has room to spare, so it is rewritten in place as labels are added and
+samples appended. Readers memory-map the samples: a window is a view into the page
+cache, so hour-long recordings replay without ever being loaded into RAM.
+
+    python -m utils.recording record --out data/session.eegrec --moods sad happy anger neutral --seconds 60
+    python -m utils.recording replay data/session.eegrec --speed 10
+"""
+import argparse
+import bisect
+import contextlib
+import io
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+if __name__ == "__main__":
+    # Run as a script: add project root to Python path (never touched on import)
+    project_root = Path(__file__).parent.parent
+    sys.path.insert(0, str(project_root))
+
+import numpy as np #type: ignore
+
+MAGIC = b"NDJEEG01"
+HEADER_BYTES = 64 * 1024
+MUSE_CHANNELS = ["AF7", "AF8", "TP9", "TP10"]  # The layout data/brain.py simulates
+_PREFIX = len(MAGIC) + 8
+
+
+class RecordingWriter:
+    """
+    The 'Tape Deck'.
+    Appends (channels x n) sample blocks to a recording file as float32.
+    Mood labels mark where each ground-truth state starts.
+    """
+    def __init__(self, path, fs: int, channels: Sequence[str] = MUSE_CHANNELS,
+                 meta: Optional[Dict[str, Any]] = None, header_bytes: int = HEADER_BYTES):
+        """
+        Args:
+            path: File to create (overwritten)
+            fs: Sampling rate (Hz)
+            channels: Electrode names, in row order of the blocks
+            meta: Free-form JSON-able notes (device, subject, seed...)
+            header_bytes: Room reserved for the header
+        """
+        self.path = Path(path)
+        self.header = {
+            "fs": int(fs), "channels": list(channels), "dtype": "<f4",
+            "n_samples": 0, "labels": [], "meta": meta or {},
+        }
+        self._header_bytes = header_bytes
+        self._file = open(self.path, "w+b")
+        self._file.write(MAGIC + np.uint64(header_bytes).tobytes())
+        self._write_header()
+
+    @property
+    def n_samples(self) -> int:
+        return self.header["n_samples"]
+
+    def _write_header(self):
+        encoded = json.dumps(self.header).encode()
+        if len(encoded) > self._header_bytes:
+            raise ValueError(f"Recording header needs {len(encoded)} bytes; "
+                             f"create it with header_bytes > {self._header_bytes}")
+        self._file.seek(_PREFIX)
+        self._file.write(encoded.ljust(self._header_bytes))
+        self._file.seek(0, 2)
+
+    def label(self, mood: str, at: Optional[int] = None):
+        """Ground truth: the listener is in `mood` from sample `at` (default: now) on."""
+        self.header["labels"].append([self.n_samples if at is None else int(at), mood])
+        self.header["labels"].sort(key=lambda label: label[0])
+
+    def append(self, block: np.ndarray):
+        """Append a (channels, n) block."""
+        if block.shape[0] != len(self.header["channels"]):
+            raise ValueError(f"Expected {len(self.header['channels'])} channels, got {block.shape[0]}")
+        self._file.write(np.ascontiguousarray(block.T, dtype="<f4").tobytes())
+        self.header["n_samples"] += block.shape[1]
+
+    def flush(self):
+        """Bring the header up to date on disk (readers also trust the file size)."""
+        self._write_header()
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Recording:
+    """
+    The 'Tape'.
+    A recording opened read-only: `samples` is a memory-mapped (n_samples x channels)
+    float32 array, and windows come back as (channels x n) views, the shape
+    extract_features takes.
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            prefix = f.read(_PREFIX)
+            if prefix[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a NeuroDJ EEG recording")
+            header_bytes = int(np.frombuffer(prefix[len(MAGIC):], dtype="<u8")[0])
+            self.header = json.loads(f.read(header_bytes).decode())
+
+        self.fs: int = self.header["fs"]
+        self.channels: List[str] = self.header["channels"]
+        self.labels: List[Tuple[int, str]] = [tuple(label) for label in self.header["labels"]]
+        self._label_starts = [start for start, _ in self.labels]
+
+        # The file size is the truth (a recorder that died never updated n_samples)
+        offset = _PREFIX + header_bytes
+        frame = 4 * len(self.channels)
+        self.n_samples = (self.path.stat().st_size - offset) // frame
+        self.samples = (
+            np.memmap(self.path, dtype=self.header["dtype"], mode="r", offset=offset,
+                      shape=(self.n_samples, len(self.channels)))
+            if self.n_samples else np.zeros((0, len(self.channels)), dtype=np.float32)
+        )
+
+    @property
+    def duration(self) -> float:
+        return self.n_samples / self.fs
+
+    def window(self, end: int, length: int) -> np.ndarray:
+        """Samples [end - length, end) as a (channels, length) view."""
+        return self.samples[end - length:end].T
+
+    def mood_at(self, sample: int) -> Optional[str]:
+        """The labelled mood at a sample (None before the first label)."""
+        i = bisect.bisect_right(self._label_starts, sample) - 1
+        return self.labels[i][1] if i >= 0 else None
+
+    def windows(self, window_sec: float = 4.0, hop_sec: float = 1.0) -> Iterator[Tuple[int, np.ndarray]]:
+        """(end sample, window) every `hop_sec`, as fast as they can be read."""
+        length, hop = int(window_sec * self.fs), max(1, int(hop_sec * self.fs))
+        for end in range(length, self.n_samples + 1, hop):
+            yield end, self.window(end, length)
+
+    def replay(self, speed: Optional[float] = 1.0, window_sec: float = 4.0,
+               hop_sec: float = 1.0) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Like windows(), paced like a live headset: `speed` 1.0 is real time, 10.0 is
+        ten times faster, None (or 0) is as fast as possible.
+        """
+        start = time.perf_counter()
+        first = None
+        for end, window in self.windows(window_sec, hop_sec):
+            if speed:
+                first = end if first is None else first
+                delay = start + (end - first) / self.fs / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            yield end, window
+
+
+def record_simulated(path, moods: Sequence[str], seconds: int = 60, seed: int = 0,
+                     chunk_sec: int = 10) -> Path:
+    """
+    Capture the data/brain.py simulator to a recording: `seconds` of each mood in
+    turn, labelled. Same seed, same file.
+    """
+    from data.brain import get_multichannel_eeg
+
+    np.random.seed(seed)  # The simulator uses numpy's global RNG
+    with RecordingWriter(path, fs=256, meta={"source": "data/brain.py", "seed": seed}) as writer:
+        for mood in moods:
+            writer.label(mood)
+            remaining = seconds
+            while remaining > 0:
+                eeg, fs = get_multichannel_eeg(mood=mood, duration_sec=min(chunk_sec, remaining))
+                writer.append(eeg)
+                remaining -= chunk_sec
+            writer.flush()
+    return Path(path)
+
+
+def evaluate(recording: Recording, speed: Optional[float] = None, window_sec: float = 4.0,
+             hop_sec: float = 1.0, quiet: bool = True) -> Dict[str, Any]:
+    """
+    Replay a recording through extract_features + classify_mood and score the
+    detected moods against the labels.
+    """
+    from utils.bci_pipe import extract_features
+    from utils.classifier import classify_mood
+
+    detected, truth, rejected = [], [], []
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+        for end, window in recording.replay(speed, window_sec, hop_sec):
+            features = extract_features(window, recording.fs)
+            detected.append(classify_mood(features))
+            rejected.append(features['rejected'])
+            # A window is labelled by the state it ends in
+            truth.append(recording.mood_at(end - 1))
+    elapsed = time.perf_counter() - start
+
+    detected, truth = np.asarray(detected, dtype=object), np.asarray(truth, dtype=object)
+    per_mood = {
+        str(mood): {str(k): int(v) for k, v in zip(*np.unique(detected[truth == mood], return_counts=True))}
+        for mood in dict.fromkeys(truth) if mood is not None
+    }
+    labelled = truth != None  # noqa: E711 - elementwise
+    return {
+        "windows": len(detected),
+        "accuracy": float((detected[labelled] == truth[labelled]).mean()) if labelled.any() else None,
+        "detected": per_mood,
+        "rejected": float(np.mean(rejected)) if rejected else 0.0,  # Share of EEG dropped as artifacts
+        "seconds": elapsed,
+        "windows_per_s": len(detected) / elapsed if elapsed else float("inf"),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record or replay EEG")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rec = commands.add_parser("record", help="Capture the EEG simulator to a file")
+    rec.add_argument("--out", required=True)
+    rec.add_argument("--moods", nargs="+", default=["sad", "happy", "anger", "neutral"])
+    rec.add_argument("--seconds", type=int, default=60, help="Per mood")
+    rec.add_argument("--seed", type=int, default=0)
+
+    play = commands.add_parser("replay", help="Stream a recording through the mood pipeline")
+    play.add_argument("path")
+    play.add_argument("--speed", type=float, default=0, help="1 = real time, 10 = 10x, 0 = as fast as possible")
+    play.add_argument("--window", type=float, default=4.0, help="Seconds per window")
+    play.add_argument("--hop", type=float, default=1.0, help="Seconds between windows")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        path = record_simulated(args.out, args.moods, seconds=args.seconds, seed=args.seed)
+        recording = Recording(path)
+        print(f"Recorded {recording.duration:.0f}s x {len(recording.channels)} channels to {path} "
+              f"({path.stat().st_size / 1e6:.1f} MB)")
+    else:
+        recording = Recording(args.path)
+        report = evaluate(recording, speed=args.speed or None, window_sec=args.window, hop_sec=args.hop)
+        print(f"Replayed {report['windows']:,} windows in {report['seconds']:.1f}s "
+              f"({report['windows_per_s']:.0f} windows/s)")
+        if report["accuracy"] is not None:
+            print(f"Accuracy vs labels: {report['accuracy']:.3f}")
+        print(f"Artifacts rejected: {report['rejected']:.1%} of segments")
+        for mood, counts in report["detected"].items():
+            print(f"  {mood:<8} -> {counts}")